@@ -1,4 +1,7 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import Count, Prefetch
 
 from airport.models import (
     Airplane,
@@ -10,6 +13,92 @@ from airport.models import (
     Route,
     Ticket,
 )
+from airport_service.counts import EstimatedCountPaginator
+
+CREW_FLIGHTS_SHOWN = 3
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """Filter by a foreign key picked with an autocomplete widget
+
+    Unlike a plain list_filter on the field, the choices are never all
+    loaded. The related model's admin needs search_fields.
+    """
+
+    template = "admin/autocomplete_filter.html"
+
+    def __init__(self, request, params, model, model_admin):
+        self.field = model._meta.get_field(self.parameter_name)
+        self.title = self.field.verbose_name
+        super().__init__(request, params, model, model_admin)
+
+        related_admin = model_admin.admin_site._registry[
+            self.field.related_model
+        ]
+        self.form_field = forms.ModelChoiceField(
+            queryset=related_admin.get_queryset(request),
+            widget=AutocompleteSelect(
+                self.field,
+                model_admin.admin_site,
+                attrs={"style": "width: 100%"},
+            ),
+            required=False,
+        )
+
+    def has_output(self):
+        return True
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field.attname: self.value()})
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            "selected": bool(self.value()),
+            "query_parts": [
+                (name, value)
+                for name, value in changelist.params.items()
+                if name != self.parameter_name
+            ],
+            "widget": self.form_field.widget.render(
+                self.parameter_name, self.value()
+            ),
+        }
+
+
+class FlightFilter(AutocompleteFilter):
+    parameter_name = "flight"
+
+
+class OrderFilter(AutocompleteFilter):
+    parameter_name = "order"
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelists that stay fast on tables with millions of rows
+
+    Counts above ESTIMATED_COUNT_THRESHOLD are estimated and the unfiltered
+    total isn't counted at all.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        if any(
+            isinstance(list_filter, type)
+            and issubclass(list_filter, AutocompleteFilter)
+            for list_filter in self.list_filter
+        ):
+            media += AutocompleteSelect(None, self.admin_site).media
+            media += forms.Media(js=["airport/admin/autocomplete_filter.js"])
+        return media
 
 
 @admin.register(Airplane)
@@ -25,6 +114,7 @@ class AirplaneAdmin(admin.ModelAdmin):
         "airplane_type",
         "capacity",
     ]
+    list_select_related = ("airplane_type", )
 
 
 admin.site.register(AirplaneType)
@@ -44,15 +134,40 @@ class AirportAdmin(admin.ModelAdmin):
 @admin.register(Crew)
 class CrewAdmin(admin.ModelAdmin):
     list_display = ("__str__", "display_flights")
+    search_fields = [
+        "first_name",
+        "last_name",
+    ]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(flights_count=Count("flights"))
+            .prefetch_related(
+                Prefetch(
+                    "flights",
+                    queryset=Flight.objects.select_related(
+                        "airplane", "route__source", "route__destination"
+                    )[:CREW_FLIGHTS_SHOWN],
+                    to_attr="first_flights",
+                )
+            )
+        )
 
     def display_flights(self, obj):
-        return ", ".join([flight.__str__() for flight in obj.flights.all()])
+        flights = ", ".join(str(flight) for flight in obj.first_flights)
+        more = obj.flights_count - len(obj.first_flights)
+        if more > 0:
+            flights += f" and {more} more"
+        return flights
 
     display_flights.short_description = "Flights"
+    display_flights.admin_order_field = "flights_count"
 
 
 @admin.register(Flight)
-class FlightAdmin(admin.ModelAdmin):
+class FlightAdmin(LargeTableAdmin):
     search_fields = [
         "route__source__closest_big_city",
         "route__destination__closest_big_city",
@@ -61,6 +176,16 @@ class FlightAdmin(admin.ModelAdmin):
         "departure_time",
         "arrival_time",
     ]
+    list_display = ("__str__", "departure_time", "arrival_time")
+    autocomplete_fields = ("route", "airplane", "crews")
+
+    def get_queryset(self, request):
+        # Also used by autocomplete results, which show __str__
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("airplane", "route__source", "route__destination")
+        )
 
     def get_form(self, request, obj=None, **kwargs):
         if obj is None:
@@ -73,21 +198,32 @@ class FlightAdmin(admin.ModelAdmin):
 class TicketInline(admin.TabularInline):
     model = Ticket
     extra = 1
+    autocomplete_fields = ("flight", )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            "flight__airplane",
+            "flight__route__source",
+            "flight__route__destination",
+        )
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     inlines = (TicketInline,)
     list_filter = [
         "created_at",
     ]
     search_fields = [
-        "user",
+        "user__email",
     ]
     list_display = [
         "created_at",
         "user",
     ]
+    list_select_related = ("user", )
+    raw_id_fields = ("user", )
+    ordering = ("-id", )
 
 
 @admin.register(Route)
@@ -97,9 +233,27 @@ class RouteAdmin(admin.ModelAdmin):
         "destination__name",
     ]
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("source", "destination")
+        )
+
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(LargeTableAdmin):
     list_filter = [
-        "order",
+        FlightFilter,
+        OrderFilter,
     ]
+    list_display = ("__str__", "flight", "order")
+    list_select_related = (
+        "flight__airplane",
+        "flight__route__source",
+        "flight__route__destination",
+        "order",
+    )
+    autocomplete_fields = ("flight", )
+    raw_id_fields = ("order", )
+    ordering = ("-id", )
@@ -0,0 +1,105 @@
+"""
+Archival of departed flights.
+
+Flights move to ArchivedFlight, their tickets into the compressed
+OrderArchive of each order, so Flight and Ticket only keep the flights that
+bookings and flight searches care about. Orders read their archived tickets
+back, and the load-factor rollups count archived flights too.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from airport.changes import add_tombstones
+from airport.models import ArchivedFlight, Flight, OrderArchive, Ticket
+from airport.serializers import FlightListSerializer
+
+
+def archive_flights(flight_ids, using="default"):
+    """Archive the flights with flight_ids; returns the tickets archived"""
+    with transaction.atomic(using=using):
+        flights = list(
+            Flight.objects.using(using)
+            .filter(pk__in=flight_ids)
+            .select_related(
+                "airplane", "route__source", "route__destination"
+            )
+            .prefetch_related("crews")
+            .annotate(tickets_sold=Count("tickets"))
+        )
+        flight_ids = [flight.id for flight in flights]
+        # Without the seats_available annotation, like the flights of order
+        # details
+        snapshots = {
+            str(flight.id): {
+                "name": str(flight),
+                "detail": FlightListSerializer(flight).data,
+            }
+            for flight in flights
+        }
+
+        tickets = defaultdict(list)
+        for order_id, *ticket in (
+            Ticket.objects.using(using)
+            .filter(flight_id__in=flight_ids)
+            .values_list("order_id", "id", "row", "seat", "flight_id")
+            .order_by("order_id", "row", "seat")
+        ):
+            tickets[order_id].append(ticket)
+
+        archives = {
+            archive.order_id: archive.load()
+            for archive in OrderArchive.objects.using(using)
+            .select_for_update()
+            .filter(order_id__in=tickets)
+        }
+        for order_id, order_tickets in tickets.items():
+            data = archives.setdefault(
+                order_id, {"tickets": [], "flights": {}}
+            )
+            data["tickets"].extend(order_tickets)
+            for *_, flight_id in order_tickets:
+                data["flights"][str(flight_id)] = snapshots[str(flight_id)]
+
+        OrderArchive.objects.using(using).bulk_create(
+            [
+                OrderArchive(
+                    order_id=order_id, tickets=OrderArchive.dump(data)
+                )
+                for order_id, data in archives.items()
+            ],
+            update_conflicts=True,
+            unique_fields=("order",),
+            update_fields=("tickets",),
+            batch_size=1000,
+        )
+        ArchivedFlight.objects.using(using).bulk_create(
+            ArchivedFlight(
+                flight_id=flight.id,
+                departure_time=flight.departure_time,
+                arrival_time=flight.arrival_time,
+                route_id=flight.route_id,
+                airplane_id=flight.airplane_id,
+                capacity=flight.airplane.capacity,
+                tickets_sold=flight.tickets_sold,
+                crews=[crew.id for crew in flight.crews.all()],
+            )
+            for flight in flights
+        )
+
+        # Raw deletes skip the rollup signals; archived flights still count
+        # in the rollups, so there is nothing to adjust. Change feed clients
+        # drop the flights
+        add_tombstones(Flight, flight_ids, using)
+        Ticket.objects.using(using).filter(
+            flight_id__in=flight_ids
+        )._raw_delete(using)
+        Flight.crews.through.objects.using(using).filter(
+            flight_id__in=flight_ids
+        )._raw_delete(using)
+        Flight.objects.using(using).filter(pk__in=flight_ids)._raw_delete(
+            using
+        )
+
+    return sum(len(order_tickets) for order_tickets in tickets.values())
@@ -0,0 +1,98 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+ASYNC_METHODS = ("get", "head")
+
+
+class AsyncReadMixin:
+    """Async list and retrieve for viewsets served over ASGI
+
+    Authentication, permissions and throttling still run through DRF in a
+    worker thread, but the queryset is evaluated with the async ORM, so
+    every relation the serializer touches must be covered by
+    select_related/prefetch_related in get_queryset.
+    """
+
+    @classmethod
+    def as_async_view(cls, actions):
+        """Like as_view, but GET and HEAD are served by async handlers"""
+        sync_view = cls.as_view(actions)
+        read_action = actions["get"]
+
+        async def view(request, *args, **kwargs):
+            if request.method.lower() not in ASYNC_METHODS:
+                return await sync_to_async(sync_view)(
+                    request, *args, **kwargs
+                )
+
+            self = cls()
+            self.action_map = {method: read_action for method in ASYNC_METHODS}
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = {}
+        view.actions = sync_view.actions
+        view.csrf_exempt = True
+        return view
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        instances = [instance async for instance in queryset]
+        serializer = self.get_serializer(instances, many=True)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        try:
+            instance = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise Http404
+
+        self.check_object_permissions(request, instance)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """Async counterpart of APIView.dispatch for read actions"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{self.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        if response.streaming:
+            return response
+
+        # The browsable API may query the database while rendering forms
+        if isinstance(response.accepted_renderer, JSONRenderer):
+            response.render()
+        else:
+            await sync_to_async(response.render)()
+
+        # Return a plain response so Django doesn't hop to a thread to
+        # render it again
+        return HttpResponse(
+            response.content,
+            status=response.status_code,
+            headers=dict(response.items()),
+        )
@@ -0,0 +1,121 @@
+"""
+Ticket creation that stays correct under concurrent bookings.
+
+Each ticket is inserted in its own savepoint, so a seat another booking got
+first is caught as an IntegrityError (or by Ticket.full_clean) and reported
+instead of breaking the order. Transactions that fail with a serialization
+failure or deadlock (or a locked SQLite database) are retried with bounded,
+jittered backoff, unless they run inside an outer transaction.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import IntegrityError, OperationalError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from airport.models import Ticket
+from airport.rollups import ticket_counts_at_commit
+from airport.seat_events import seat_events_at_commit
+
+# serialization_failure, deadlock_detected
+RETRYABLE_PGCODES = ("40001", "40P01")
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seats are already taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats):
+        super().__init__()
+        # Set after __init__, which would turn the numbers into strings
+        self.detail = {
+            "detail": self.detail,
+            "taken_seats": [
+                {"flight": flight_id, "row": row, "seat": seat}
+                for flight_id, row, seat in seats
+            ],
+        }
+
+
+class BookingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many concurrent bookings, try again."
+    default_code = "booking_busy"
+
+
+class RetryBooking(Exception):
+    """Automatically picked seats were taken meanwhile; pick again"""
+
+    def __init__(self, seats):
+        super().__init__(seats)
+        self.seats = seats
+
+
+def is_retryable(exc):
+    if getattr(exc.__cause__, "pgcode", None) in RETRYABLE_PGCODES:
+        return True
+    # SQLite: "database is locked", "database table is locked"
+    return "is locked" in str(exc)
+
+
+def backoff(attempt):
+    """Seconds to wait before retry number attempt (from 0)"""
+    delay = settings.BOOKING_RETRY_DELAY * 2 ** attempt
+    return random.uniform(delay / 2, delay)
+
+
+def run_booking(book, using="default"):
+    """Run book() in a transaction, retrying conflicts that may pass"""
+    retries = (
+        0
+        if transaction.get_connection(using).in_atomic_block
+        else settings.BOOKING_RETRIES
+    )
+    for attempt in range(retries + 1):
+        try:
+            with (
+                transaction.atomic(using=using),
+                ticket_counts_at_commit(using),
+                seat_events_at_commit(using),
+            ):
+                return book()
+        except RetryBooking as exc:
+            if attempt == retries:
+                raise SeatsTaken(exc.seats)
+        except OperationalError as exc:
+            if not is_retryable(exc):
+                raise
+            if attempt == retries:
+                raise BookingBusy()
+        time.sleep(backoff(attempt))
+
+
+def _is_unique_error(exc):
+    return any(
+        error.code == "unique_together"
+        for error in getattr(exc, "error_dict", {}).get(NON_FIELD_ERRORS, ())
+    )
+
+
+def create_tickets(order, tickets, using="default"):
+    """Create tickets of order; returns (flight_id, row, seat) of the taken
+
+    Tickets whose seat is taken are skipped, the caller decides whether to
+    roll the order back.
+    """
+    taken = []
+    for ticket in tickets:
+        try:
+            with transaction.atomic(using=using):
+                Ticket.objects.using(using).create(order=order, **ticket)
+        except IntegrityError:
+            taken.append((ticket["flight"].id, ticket["row"], ticket["seat"]))
+        except ValidationError as exc:
+            if not _is_unique_error(exc):
+                raise
+            taken.append((ticket["flight"].id, ticket["row"], ticket["seat"]))
+    return taken
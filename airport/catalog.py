@@ -0,0 +1,236 @@
+"""
+Snapshot of the static catalog for client bootstrap.
+
+One payload carries every airplane type, airport, airplane and route in
+columns instead of objects:
+
+    {
+        "format": 1,
+        "version": 35633,
+        "strings": ["London", "Paris", ...],
+        "airplane_types": {"id": [...], "name": [...]},
+        "airports": {"id": [...], "name": [...], "closest_big_city": [...]},
+        "airplanes": {"id": [...], "name": [...], "airplane_type": [...],
+                      "rows": [...], "seats_in_row": [...]},
+        "routes": {"id": [...], "source": [...], "destination": [...],
+                   "distance": [...]}
+    }
+
+Rows are in id order and id columns hold the difference to the previous
+id. closest_big_city, shared by many airports, holds indexes into strings,
+where each city is stored once; names are mostly distinct and stay inline.
+airplane_type, source and destination hold row indexes into
+airplane_types and airports. Compressed, that is a fraction of the
+catalog lists.
+
+version is the catalog version: the highest change version of the catalog
+rows and their tombstones. A client continues from the snapshot with
+/changes/?since=<version>. A snapshot is built when the catalog version
+moves on and written to CATALOG_DIR with its compressed copies, so
+workers share it and it outlives restarts.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Max
+
+from airport.changes import TYPE_NAMES
+from airport.models import Airplane, AirplaneType, Airport, Route, Tombstone
+from airport_service.compression import brotli
+from airport_service.files import write_atomic
+
+# Bump on any change of the layout above
+FORMAT = 1
+
+CATALOG_MODELS = (AirplaneType, Airport, Airplane, Route)
+
+# In order of preference
+ENCODED_SUFFIXES = (("br", "br"), ("gzip", "gz"))
+
+
+def catalog_version():
+    """Highest change version of catalog rows and their tombstones"""
+    versions = [
+        model.objects.aggregate(version=Max("version"))["version"]
+        for model in CATALOG_MODELS
+    ]
+    versions.append(
+        Tombstone.objects.filter(
+            object_type__in=[TYPE_NAMES[model] for model in CATALOG_MODELS]
+        ).aggregate(version=Max("version"))["version"]
+    )
+    return max(filter(None, versions), default=0)
+
+
+def _deltas(ids):
+    return [current - previous for previous, current in zip([0, *ids], ids)]
+
+
+def build_catalog(version):
+    """Snapshot payload of the catalog, labelled version
+
+    Take version before reading the rows: rows changed in between are then
+    in the snapshot and in the changes after version, and applying a
+    change twice does no harm.
+    """
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(value, len(strings))
+
+    def rows(model, *fields):
+        return list(
+            model.objects.order_by("id").values_list("id", *fields)
+        )
+
+    airplane_types = rows(AirplaneType, "name")
+    airports = rows(Airport, "name", "closest_big_city")
+    airplanes = rows(
+        Airplane, "name", "airplane_type_id", "rows", "seats_in_row"
+    )
+    routes = rows(Route, "source_id", "destination_id", "distance")
+
+    type_index = {row[0]: index for index, row in enumerate(airplane_types)}
+    airport_index = {row[0]: index for index, row in enumerate(airports)}
+
+    catalog = {
+        "format": FORMAT,
+        "version": version,
+        "airplane_types": {
+            "id": _deltas([row[0] for row in airplane_types]),
+            "name": [row[1] for row in airplane_types],
+        },
+        "airports": {
+            "id": _deltas([row[0] for row in airports]),
+            "name": [row[1] for row in airports],
+            "closest_big_city": [intern(row[2]) for row in airports],
+        },
+        "airplanes": {
+            "id": _deltas([row[0] for row in airplanes]),
+            "name": [row[1] for row in airplanes],
+            "airplane_type": [type_index[row[2]] for row in airplanes],
+            "rows": [row[3] for row in airplanes],
+            "seats_in_row": [row[4] for row in airplanes],
+        },
+        "routes": {
+            "id": _deltas([row[0] for row in routes]),
+            "source": [airport_index[row[1]] for row in routes],
+            "destination": [airport_index[row[2]] for row in routes],
+            "distance": [row[3] for row in routes],
+        },
+    }
+    catalog["strings"] = list(strings)
+    return json.dumps(
+        catalog, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def catalog_path(version, directory=None):
+    directory = Path(directory or settings.CATALOG_DIR)
+    return directory / f"catalog-{FORMAT}-{version}.json"
+
+
+def write_catalog_files(version, directory=None):
+    """Write the snapshot of version with its compressed copies, and drop
+    the snapshots of older versions; returns (content, {encoding: bytes})"""
+    path = catalog_path(version, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    content = build_catalog(version)
+    encoded = {}
+    if brotli:
+        encoded["br"] = brotli.compress(content, quality=11)
+    encoded["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+    # Compressed copies first, the plain file marks a complete snapshot
+    for encoding, suffix in ENCODED_SUFFIXES:
+        if encoding in encoded:
+            write_atomic(
+                path.with_suffix(f".json.{suffix}"), encoded[encoding]
+            )
+    write_atomic(path, content)
+
+    # Leaves newer snapshots, written by workers that saw a newer version
+    for old_path in path.parent.glob("catalog-*.json*"):
+        old_format, _, old_version = (
+            old_path.name.split(".")[0].removeprefix("catalog-").partition("-")
+        )
+        if old_format != str(FORMAT) or int(old_version) < version:
+            old_path.unlink(missing_ok=True)
+    return content, encoded
+
+
+class CatalogSnapshot:
+    __slots__ = ("version", "content", "encoded", "etags")
+
+    def __init__(self, version, content, encoded):
+        self.version = version
+        self.content = content
+        self.encoded = encoded
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        # A strong ETag must not match two encodings, see RFC 9110 8.8.1
+        self.etags = {None: f'"{digest}"'} | {
+            encoding: f'"{digest}-{encoding}"' for encoding in encoded
+        }
+
+    def etag(self, encoding=None):
+        """ETag of the representation with content coding encoding"""
+        return self.etags[encoding]
+
+
+class CatalogCache:
+    """The snapshot of the current catalog version, kept per process
+
+    Each get() looks up the catalog version, which is one index lookup per
+    table. The snapshot is read from CATALOG_DIR, or built there if no
+    worker has built it yet, only when the version has moved on.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = catalog_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = self._snapshot = self._load(version)
+        return snapshot
+
+    def clear(self):
+        self._snapshot = None
+
+    @staticmethod
+    def _load(version):
+        path = catalog_path(version)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            # Not built yet, or dropped by a worker with a newer version;
+            # served from memory, the files may be gone again by now
+            content, encoded = write_catalog_files(version)
+        else:
+            encoded = _read_encoded(path)
+        return CatalogSnapshot(version, content, encoded)
+
+
+def _read_encoded(path):
+    encoded = {}
+    for encoding, suffix in ENCODED_SUFFIXES:
+        try:
+            encoded[encoding] = path.with_suffix(
+                f".json.{suffix}"
+            ).read_bytes()
+        except FileNotFoundError:
+            # Dropped by a worker with a newer version meanwhile
+            pass
+    return encoded
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,132 @@
+"""
+Change feed of flights and catalog data, for incremental sync.
+
+Saving an airplane type, airport, airplane, route or flight gives it the
+next version from ChangeCounter; deleting one leaves a Tombstone with a
+version of its own. changes() lists what changed after a version in
+version order, reading each table by its version index. A client keeps the
+version it synced up to and asks for what came after it.
+
+Writes that skip save() and the delete signals (QuerySet.update(), raw
+deletes) must take versions and leave tombstones themselves, as the bulk
+upserts, archive_flights and generate_dataset do. Fixtures (loaddata)
+skip save() too; their rows take versions as they are loaded.
+"""
+from collections import defaultdict
+from heapq import merge
+from itertools import islice
+from operator import itemgetter
+
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    ChangeCounter,
+    Flight,
+    Route,
+    Tombstone,
+)
+from airport.serializers import CHANGE_SERIALIZERS
+
+TYPES = {
+    name: serializer_class.Meta.model
+    for name, serializer_class in CHANGE_SERIALIZERS.items()
+}
+TYPE_NAMES = {model: name for name, model in TYPES.items()}
+
+
+def add_tombstones(model, object_ids, using="default"):
+    """Record the deletion of object_ids, deleted without signals"""
+    Tombstone.objects.using(using).bulk_create(
+        Tombstone(
+            version=version,
+            object_type=TYPE_NAMES[model],
+            object_id=object_id,
+        )
+        for version, object_id in zip(
+            ChangeCounter.take(len(object_ids), using), object_ids
+        )
+    )
+
+
+@receiver(post_delete, sender=AirplaneType)
+@receiver(post_delete, sender=Airport)
+@receiver(post_delete, sender=Airplane)
+@receiver(post_delete, sender=Route)
+@receiver(post_delete, sender=Flight)
+def leave_tombstone(sender, instance, using, **kwargs):
+    # Runs in the transaction of the delete
+    add_tombstones(sender, [instance.pk], using)
+
+
+@receiver(post_save, sender=AirplaneType)
+@receiver(post_save, sender=Airport)
+@receiver(post_save, sender=Airplane)
+@receiver(post_save, sender=Route)
+@receiver(post_save, sender=Flight)
+def version_fixture_row(sender, instance, raw, using, **kwargs):
+    # loaddata skips save(); its rows, with no version or one of another
+    # database, would never be listed after since=0
+    if raw:
+        instance.version = ChangeCounter.take(using=using)[0]
+        sender.objects.using(using).filter(pk=instance.pk).update(
+            version=instance.version
+        )
+
+
+def _changed_rows(name, since, limit, using):
+    return (
+        (instance.version, name, instance.pk, instance)
+        for instance in TYPES[name]
+        .objects.using(using)
+        .filter(version__gt=since)
+        .order_by("version")[:limit]
+    )
+
+
+def changes(since, types, limit, using=None):
+    """Up to limit changes of types after version since, and whether more
+    follow; each is (version, type, id, instance or None if deleted)"""
+    if using is None:
+        # One database for every table: a replica further behind for one
+        # of them would make the page skip its changes
+        using = router.db_for_read(Tombstone)
+    # The first limit + 1 of each table include those of the merged page
+    sources = [_changed_rows(name, since, limit + 1, using) for name in types]
+    sources.append(
+        (version, object_type, object_id, None)
+        for version, object_type, object_id in Tombstone.objects.using(using)
+        .filter(version__gt=since, object_type__in=types)
+        .order_by("version")
+        .values_list("version", "object_type", "object_id")[:limit + 1]
+    )
+
+    page = list(islice(merge(*sources, key=itemgetter(0)), limit + 1))
+    return page[:limit], len(page) > limit
+
+
+def serialize_changes(page):
+    # One list serializer per type, building serializers per row is slow
+    instances = defaultdict(list)
+    for _, name, _, instance in page:
+        if instance is not None:
+            instances[name].append(instance)
+    data = {
+        name: iter(CHANGE_SERIALIZERS[name](type_instances, many=True).data)
+        for name, type_instances in instances.items()
+    }
+
+    return [
+        {
+            "type": name,
+            "id": object_id,
+            "version": version,
+            "deleted": instance is None,
+            "data": None if instance is None else next(data[name]),
+        }
+        for version, name, object_id, instance in page
+    ]
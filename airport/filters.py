@@ -0,0 +1,50 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_ids(value, param):
+    """Set of the comma-separated ids in value, at most BATCH_MAX_IDS"""
+    try:
+        ids = {int(item) for item in value.split(",") if item.strip()}
+    except ValueError:
+        raise ValidationError(
+            {param: "Expected comma-separated integer ids."}
+        )
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise ValidationError(
+            {param: f"At most {settings.BATCH_MAX_IDS} ids are allowed."}
+        )
+    return ids
+
+
+class IdsFilter(BaseFilterBackend):
+    """Filter lists by primary key with ?ids=1,2,3
+
+    At most BATCH_MAX_IDS ids are accepted, so a client can fetch what it
+    is missing in one request without asking for an unbounded IN list.
+    """
+
+    param = "ids"
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, "action", None) != "list":
+            return queryset
+
+        value = request.query_params.get(self.param)
+        if value is None:
+            return queryset
+
+        return queryset.filter(pk__in=parse_ids(value, self.param))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.param,
+                "required": False,
+                "in": "query",
+                "description": "Comma-separated ids to return "
+                f"(ex. ?ids=1,2,3), at most {settings.BATCH_MAX_IDS}",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -0,0 +1,69 @@
+import calendar
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.archive import archive_flights
+from airport.models import Flight, Ticket
+
+
+def months_ago(moment, months):
+    """moment shifted back by calendar months, clamped to the month end"""
+    year, month = divmod(moment.year * 12 + moment.month - 1 - months, 12)
+    day = min(moment.day, calendar.monthrange(year, month + 1)[1])
+    return moment.replace(year=year, month=month + 1, day=day)
+
+
+class Command(BaseCommand):
+    """Django command that archives flights that departed N months ago
+
+    Flights move to ArchivedFlight and their tickets into the compressed
+    OrderArchive of their orders, one transaction per batch.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months", type=int, default=6,
+            help="Archive flights that departed before N months ago "
+            "(default: 6)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Flights archived per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report what would be archived",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options["months"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--months and --batch-size must be positive")
+
+        cutoff = months_ago(timezone.now(), options["months"])
+        flights = Flight.objects.filter(departure_time__lt=cutoff)
+
+        if options["dry_run"]:
+            tickets = Ticket.objects.filter(flight__in=flights).count()
+            self.stdout.write(
+                f"Would archive {flights.count()} flights and {tickets} "
+                f"tickets departed before {cutoff:%Y-%m-%d %H:%M}"
+            )
+            return
+
+        archived_flights = archived_tickets = 0
+        while flight_ids := list(
+            flights.order_by("departure_time").values_list("id", flat=True)[
+                : options["batch_size"]
+            ]
+        ):
+            archived_tickets += archive_flights(flight_ids)
+            archived_flights += len(flight_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived_flights} flights and {archived_tickets} "
+                "tickets"
+            )
+        )
@@ -0,0 +1,372 @@
+import json
+import statistics
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.management.commands.generate_dataset import PASSWORD
+from airport.models import Flight, Order, Ticket
+
+BASELINE_DIR = Path(settings.BASE_DIR) / "benchmarks"
+
+
+class Scenario:
+    """One benchmarked request; writes are rolled back after each run"""
+
+    def __init__(self, name, method, url, data=None, auth=True, write=False):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.auth = auth
+        self.write = write
+
+    def request(self, client):
+        data = self.data() if callable(self.data) else self.data
+        return getattr(client, self.method)(self.url, data, format="json")
+
+
+def consume(response):
+    """Read streamed bodies too, they are encoded while being read"""
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response.status_code
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    """Django command that benchmarks the main endpoints in-process"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--existing",
+            action="store_true",
+            help="Benchmark the configured database as it is (seeded with "
+                 "generate_dataset) instead of a fresh test database",
+        )
+        parser.add_argument("--flights", type=int, default=2_000)
+        parser.add_argument("--tickets", type=int, default=40_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--baseline",
+            help="Query count baseline file "
+                 "(default: benchmarks/baseline-<vendor>.json)",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store the results as the new baseline",
+        )
+        parser.add_argument(
+            "--latency",
+            action="store_true",
+            help="Also gate on p50/p95 latency, against a baseline recorded "
+                 "on this machine",
+        )
+        parser.add_argument(
+            "--latency-baseline",
+            help="Latency baseline file, not committed "
+                 "(default: benchmarks/latency-<vendor>.local.json)",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed relative latency regression (default: 0.25)",
+        )
+        parser.add_argument("--only", nargs="*", help="Scenario names to run")
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if settings.DEBUG:
+            self.stdout.write(
+                self.style.WARNING(
+                    "DEBUG is on, numbers include debug overhead; consider "
+                    "DJANGO_PROFILE=production"
+                )
+            )
+
+        # Throttling would reject most iterations; it isn't what's measured
+        throttle_classes = APIView.throttle_classes
+        APIView.throttle_classes = ()
+
+        old_config = None
+        if not options["existing"]:
+            old_config = setup_databases(verbosity=0, interactive=False)
+            self.stdout.write("Seeding test database...")
+            call_command(
+                "generate_dataset",
+                scale="small",
+                airports=100,
+                routes=1_000,
+                flights=options["flights"],
+                tickets=options["tickets"],
+                seed=options["seed"],
+                workers=1,
+                stdout=StringIO(),
+            )
+
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                results = self.run_scenarios(
+                    options["iterations"], options["only"]
+                )
+        finally:
+            APIView.throttle_classes = throttle_classes
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+
+        self.report(results, options)
+
+    def build_scenarios(self, user):
+        """Pick realistic targets from the dataset"""
+        flight = (
+            Flight.objects.annotate(sold=Count("tickets"))
+            .order_by("-sold")
+            .select_related("route__source")
+            .first()
+        )
+        if flight is None:
+            raise CommandError("No flights, run generate_dataset first")
+
+        order = Order.objects.filter(user=user).first()
+        booking_flight = (
+            Flight.objects.annotate(
+                free=F("airplane__rows") * F("airplane__seats_in_row")
+                - Count("tickets")
+            )
+            .filter(free__gte=9)
+            .select_related("airplane")
+            .first()
+        )
+        taken = set(
+            Ticket.objects.filter(flight=booking_flight).values_list(
+                "row", "seat"
+            )
+        )
+        free_seats = [
+            {"row": row, "seat": seat, "flight": booking_flight.id}
+            for row in range(1, booking_flight.airplane.rows + 1)
+            for seat in range(1, booking_flight.airplane.seats_in_row + 1)
+            if (row, seat) not in taken
+        ]
+
+        flights_url = reverse("airport:flight-list")
+        departure_date = flight.departure_time.date().isoformat()
+        return [
+            Scenario("flight-list", "get", flights_url),
+            Scenario(
+                "flight-list-by-date",
+                "get",
+                f"{flights_url}?departure_date={departure_date}",
+            ),
+            Scenario(
+                "flight-detail",
+                "get",
+                reverse("airport:flight-detail", args=[flight.id]),
+            ),
+            Scenario(
+                "order-create-1",
+                "post",
+                reverse("airport:order-list"),
+                {"tickets": free_seats[:1]},
+                write=True,
+            ),
+            Scenario(
+                "order-create-9",
+                "post",
+                reverse("airport:order-list"),
+                {"tickets": free_seats[:9]},
+                write=True,
+            ),
+            Scenario("order-list", "get", reverse("airport:order-list")),
+            Scenario(
+                "order-detail",
+                "get",
+                reverse("airport:order-detail", args=[order.id]),
+            ),
+            Scenario(
+                "route-search",
+                "get",
+                f"{reverse('airport:route-list')}"
+                f"?source={flight.route.source.name[:4]}",
+            ),
+            Scenario(
+                "token-obtain",
+                "post",
+                reverse("user:token_obtain_pair"),
+                {"email": user.email, "password": PASSWORD},
+                auth=False,
+                write=True,
+            ),
+            Scenario(
+                "token-refresh",
+                "post",
+                reverse("user:token_refresh"),
+                lambda: {"refresh": str(RefreshToken.for_user(user))},
+                auth=False,
+                write=True,
+            ),
+        ]
+
+    def run_scenarios(self, iterations, only):
+        # Generated users are skewed towards the lowest ids
+        user = (
+            get_user_model()
+            .objects.filter(email__endswith="@example.com")
+            .annotate(orders=Count("order"))
+            .order_by("-orders")
+            .first()
+        )
+        if user is None:
+            raise CommandError("No users, run generate_dataset first")
+
+        access = str(RefreshToken.for_user(user).access_token)
+        results = {}
+        for scenario in self.build_scenarios(user):
+            if only and scenario.name not in only:
+                continue
+
+            client = APIClient()
+            if scenario.auth:
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+            queries = []
+
+            def count_query(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_query):
+                status_code = self.run_once(client, scenario)
+            if status_code >= 400:
+                raise CommandError(f"{scenario.name} answered {status_code}")
+
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                self.run_once(client, scenario)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            timings.sort()
+            results[scenario.name] = {
+                "p50_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(percentile(timings, 0.95), 3),
+                "p99_ms": round(percentile(timings, 0.99), 3),
+                "queries": len(queries),
+            }
+            self.stdout.write(
+                f"{scenario.name:22} "
+                f"p50 {results[scenario.name]['p50_ms']:9.2f} ms  "
+                f"p95 {results[scenario.name]['p95_ms']:9.2f} ms  "
+                f"p99 {results[scenario.name]['p99_ms']:9.2f} ms  "
+                f"{len(queries):4} queries"
+            )
+
+        return results
+
+    @staticmethod
+    def run_once(client, scenario):
+        if not scenario.write:
+            return consume(scenario.request(client))
+
+        with transaction.atomic():
+            status_code = consume(scenario.request(client))
+            transaction.set_rollback(True)
+        return status_code
+
+    def report(self, results, options):
+        path = Path(
+            options["baseline"]
+            or BASELINE_DIR / f"baseline-{connection.vendor}.json"
+        )
+        latency_path = Path(
+            options["latency_baseline"]
+            or BASELINE_DIR / f"latency-{connection.vendor}.local.json"
+        )
+
+        if options["save_baseline"]:
+            # Query counts hold on any machine, timings only on this one
+            path.write_text(
+                json.dumps(
+                    {
+                        name: {"queries": result["queries"]}
+                        for name, result in results.items()
+                    },
+                    indent=2,
+                )
+                + "\n"
+            )
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {path}"))
+            if options["latency"]:
+                latency_path.write_text(json.dumps(results, indent=2) + "\n")
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Latency baseline saved to {latency_path}"
+                    )
+                )
+            return
+
+        regressions = []
+        for name, result, expected in self.compare(results, path):
+            if result["queries"] > expected["queries"]:
+                regressions.append(
+                    f"{name}: {result['queries']} queries, "
+                    f"baseline {expected['queries']}"
+                )
+        if options["latency"]:
+            for name, result, expected in self.compare(results, latency_path):
+                for metric in ("p50_ms", "p95_ms"):
+                    limit = expected[metric] * (1 + options["threshold"])
+                    if result[metric] > limit:
+                        regressions.append(
+                            f"{name}: {metric} {result[metric]:.2f}, "
+                            f"baseline {expected[metric]:.2f}"
+                        )
+
+        if regressions:
+            raise CommandError(
+                "Performance regressions:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    @staticmethod
+    def compare(results, path):
+        """(name, result, baseline) of the scenarios in the baseline"""
+        # Without a baseline there is nothing to gate on, which must not
+        # pass for a clean run
+        if not path.exists():
+            raise CommandError(
+                f"No baseline at {path}, record one with --save-baseline"
+            )
+
+        baseline = json.loads(path.read_text())
+        return [
+            (name, result, baseline[name])
+            for name, result in results.items()
+            if name in baseline
+        ]
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from airport_service.schema import write_schema_files
+
+
+class Command(BaseCommand):
+    """Django command that prebuilds the OpenAPI schema files"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory", help="Output directory (default: SCHEMA_DIR)"
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        write_schema_files(options["directory"])
+        self.stdout.write(self.style.SUCCESS("Schema built"))
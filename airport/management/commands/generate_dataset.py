@@ -0,0 +1,568 @@
+import io
+import math
+import multiprocessing
+import os
+import random
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    ChangeCounter,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.rollups import reconcile
+
+SCALES = {
+    "small": {
+        "airports": 200,
+        "routes": 2_000,
+        "flights": 20_000,
+        "tickets": 200_000,
+    },
+    "medium": {
+        "airports": 1_000,
+        "routes": 20_000,
+        "flights": 1_000_000,
+        "tickets": 10_000_000,
+    },
+    "large": {
+        "airports": 5_000,
+        "routes": 200_000,
+        "flights": 10_000_000,
+        "tickets": 100_000_000,
+    },
+}
+
+AIRPLANE_TYPES = (
+    "Airbus A220",
+    "Airbus A320",
+    "Airbus A321",
+    "Airbus A330",
+    "Airbus A350",
+    "Airbus A380",
+    "Boeing 737",
+    "Boeing 747",
+    "Boeing 767",
+    "Boeing 777",
+    "Boeing 787",
+    "Embraer E190",
+    "Bombardier CRJ900",
+    "ATR 72",
+)
+SYLLABLES = (
+    "ka", "to", "ri", "mo", "sa", "len", "dor", "vi", "na", "bel", "gra",
+    "no", "ber", "lin", "pa", "ris", "ma", "dri", "os", "lo", "ky", "iv",
+    "wa", "shin", "chi", "ca", "go", "ro", "me", "ath", "ens", "ham",
+)
+FIRST_NAMES = (
+    "Anna", "Olena", "John", "Maria", "Taras", "Emma", "Liam", "Sofia",
+    "Noah", "Iryna", "Mark", "Lucas", "Mia", "Andrii", "Kate", "Oleh",
+)
+LAST_NAMES = (
+    "Smith", "Shevchenko", "Johnson", "Kovalenko", "Brown", "Bondarenko",
+    "Miller", "Tkachenko", "Davis", "Kravets", "Wilson", "Melnyk",
+)
+CRUISE_SPEED_KMH = 800
+PASSWORD = "password123"
+
+# Filled in each worker process by _init_worker
+_state = {}
+
+
+def _rng(seed, *key):
+    """Independent generator per (table, chunk), so the output doesn't
+    depend on the number of workers"""
+    return random.Random(":".join(map(str, (seed, *key))))
+
+
+def _zipf_weights(count, exponent):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def _skewed_index(rng, count, skew=3):
+    """Index in range(count) where low indexes are far more likely"""
+    return min(int(count * rng.random() ** skew), count - 1)
+
+
+def _place_name(rng, number):
+    name = "".join(
+        rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))
+    ).capitalize()
+    return f"{name}{number}" if number else name
+
+
+def _format_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", " ")
+
+
+def write_rows(model_or_table, columns, rows):
+    """COPY rows into the table on PostgreSQL, INSERT elsewhere"""
+    table = getattr(
+        getattr(model_or_table, "_meta", None), "db_table", model_or_table
+    )
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write("\t".join(map(_format_value, row)))
+                buffer.write("\n")
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer
+            )
+        else:
+            quoted = ", ".join(connection.ops.quote_name(c) for c in columns)
+            placeholders = ", ".join(["%s"] * len(columns))
+            cursor.executemany(
+                f"INSERT INTO {table} ({quoted}) VALUES ({placeholders})",
+                rows,
+            )
+
+
+def _init_worker(state):
+    # Spawned workers start with a fresh interpreter
+    import django
+
+    django.setup()
+    _state.update(state)
+
+
+def _generate_users(start, count):
+    seed = _state["seed"]
+    rng = _rng(seed, "users", start)
+    joined = _state["start_date"] - timedelta(days=365)
+    rows = []
+    for index in range(start, start + count):
+        user_id = _state["user_offset"] + index
+        rows.append(
+            (
+                user_id,
+                _state["password"],
+                None,
+                False,
+                rng.choice(FIRST_NAMES),
+                rng.choice(LAST_NAMES),
+                False,
+                True,
+                joined + timedelta(minutes=rng.randrange(525_600)),
+                f"user{user_id}@example.com",
+            )
+        )
+
+    with transaction.atomic():
+        write_rows(
+            get_user_model(),
+            (
+                "id", "password", "last_login", "is_superuser",
+                "first_name", "last_name", "is_staff", "is_active",
+                "date_joined", "email",
+            ),
+            rows,
+        )
+    return {"users": len(rows)}
+
+
+def _generate_flights(chunk_index, start, count):
+    """Flights [start, start + count) with their crews, orders and
+    tickets"""
+    state = _state
+    rng = _rng(state["seed"], "flights", chunk_index)
+    routes = state["routes"]
+    airplanes = state["airplanes"]
+    route_cum_weights = state["route_cum_weights"]
+    total_weight = route_cum_weights[-1]
+    span_minutes = state["days"] * 24 * 60
+
+    # Order ids are reserved per chunk so workers never collide
+    order_id = state["order_offset"] + start * state["max_capacity"]
+
+    flights, flight_crews, orders, tickets = [], [], [], []
+    for index in range(start, start + count):
+        flight_id = state["flight_offset"] + index
+        route_index = bisect_left(
+            route_cum_weights, rng.random() * total_weight
+        )
+        route_id, distance, route_weight = routes[route_index]
+        airplane_id, rows, seats_in_row = rng.choice(airplanes)
+        departure = state["start_date"] + timedelta(
+            minutes=rng.randrange(span_minutes) // 5 * 5
+        )
+        arrival = departure + timedelta(
+            minutes=round(distance / CRUISE_SPEED_KMH * 60) + 30
+        )
+        flights.append(
+            (
+                flight_id,
+                departure,
+                arrival,
+                route_id,
+                airplane_id,
+                state["flight_version"] + index,
+            )
+        )
+
+        crew_ids = rng.sample(state["crew_ids"], state["crews_per_flight"])
+        flight_crews.extend((flight_id, crew_id) for crew_id in crew_ids)
+
+        # Popular routes sell out, the long tail flies mostly empty
+        capacity = rows * seats_in_row
+        expected = (
+            state["tickets_per_flight"]
+            * route_weight
+            / state["mean_route_weight"]
+            * rng.lognormvariate(-0.125, 0.5)
+        )
+        sold = min(capacity, int(expected))
+        seats = rng.sample(range(capacity), sold)
+
+        position = 0
+        while position < sold:
+            group = min(rng.choice((1, 1, 1, 2, 2, 3, 4, 6)), sold - position)
+            created_at = departure - timedelta(
+                minutes=rng.randrange(1, 60 * 24 * 90)
+            )
+            user_id = state["user_offset"] + _skewed_index(
+                rng, state["users"]
+            )
+            orders.append((order_id, created_at, user_id))
+            for seat_index in seats[position:position + group]:
+                tickets.append(
+                    (
+                        seat_index // seats_in_row + 1,
+                        seat_index % seats_in_row + 1,
+                        flight_id,
+                        order_id,
+                    )
+                )
+            order_id += 1
+            position += group
+
+    with transaction.atomic():
+        write_rows(
+            Flight,
+            (
+                "id", "departure_time", "arrival_time", "route_id",
+                "airplane_id", "version",
+            ),
+            flights,
+        )
+        write_rows(
+            Flight.crews.through, ("flight_id", "crew_id"), flight_crews
+        )
+        write_rows(Order, ("id", "created_at", "user_id"), orders)
+        write_rows(Ticket, ("row", "seat", "flight_id", "order_id"), tickets)
+    return {
+        "flights": len(flights),
+        "orders": len(orders),
+        "tickets": len(tickets),
+    }
+
+
+def _run_task(task):
+    name, *args = task
+    if name == "users":
+        return _generate_users(*args)
+    return _generate_flights(*args)
+
+
+class Command(BaseCommand):
+    """Django command that generates a large synthetic dataset"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", choices=SCALES, default="small",
+            help="Preset sizes, see the individual options to override",
+        )
+        parser.add_argument("--airports", type=int)
+        parser.add_argument("--routes", type=int)
+        parser.add_argument("--flights", type=int)
+        parser.add_argument(
+            "--tickets", type=int,
+            help="Approximate; flights never sell more than their capacity",
+        )
+        parser.add_argument("--users", type=int)
+        parser.add_argument("--airplanes", type=int)
+        parser.add_argument("--crews", type=int)
+        parser.add_argument("--crews-per-flight", type=int, default=2)
+        parser.add_argument(
+            "--start-date", default="2026-01-01",
+            help="First departure date (default: 2026-01-01)",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Parallel COPY processes (PostgreSQL only)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        sizes = dict(SCALES[options["scale"]])
+        for key in sizes:
+            if options[key] is not None:
+                sizes[key] = options[key]
+        sizes["users"] = options["users"] or max(sizes["tickets"] // 50, 10)
+        sizes["airplanes"] = options["airplanes"] or sizes["airports"] * 2
+        sizes["crews"] = options["crews"] or max(sizes["airplanes"] * 3, 10)
+
+        if sizes["airports"] < 2:
+            raise CommandError("At least two airports are needed for routes")
+        if sizes["routes"] > sizes["airports"] * (sizes["airports"] - 1):
+            raise CommandError("Too many routes for the airports")
+        if options["crews_per_flight"] > sizes["crews"]:
+            raise CommandError("--crews-per-flight exceeds --crews")
+
+        seed = options["seed"]
+        start_date = datetime.fromisoformat(options["start_date"]).replace(
+            tzinfo=timezone.utc
+        )
+        self.stdout.write(
+            "Generating "
+            + ", ".join(f"{count} {name}" for name, count in sizes.items())
+        )
+
+        with transaction.atomic():
+            airplanes = self.create_airplanes(seed, sizes["airplanes"])
+            airport_ids = self.create_airports(seed, sizes["airports"])
+            routes = self.create_routes(seed, airport_ids, sizes["routes"])
+            crew_ids = self.create_crews(seed, sizes["crews"])
+            # Workers write flights in parallel, so their change versions
+            # are taken up front
+            flight_versions = ChangeCounter.take(sizes["flights"])
+
+        route_cum_weights = list(accumulate(weight for *_, weight in routes))
+        state = {
+            "seed": seed,
+            "start_date": start_date,
+            "days": options["days"],
+            "routes": routes,
+            "route_cum_weights": route_cum_weights,
+            # Mean weight of the route of a flight; flights pick routes by
+            # weight, so heavy routes count more than once
+            "mean_route_weight": (
+                sum(weight**2 for *_, weight in routes)
+                / route_cum_weights[-1]
+            ),
+            "airplanes": airplanes,
+            "max_capacity": max(rows * seats for _, rows, seats in airplanes),
+            "crew_ids": crew_ids,
+            "crews_per_flight": options["crews_per_flight"],
+            "users": sizes["users"],
+            "tickets_per_flight": sizes["tickets"] / max(sizes["flights"], 1),
+            "password": make_password(PASSWORD),
+            "user_offset": self.next_id(get_user_model()),
+            "flight_offset": self.next_id(Flight),
+            "flight_version": flight_versions.start,
+            "order_offset": self.next_id(Order),
+        }
+
+        chunk_size = options["chunk_size"]
+        # Users go first, orders reference them
+        self.run_tasks(
+            [
+                ("users", start, min(chunk_size, sizes["users"] - start))
+                for start in range(0, sizes["users"], chunk_size)
+            ],
+            state,
+            options["workers"],
+        )
+        self.run_tasks(
+            [
+                (
+                    "flights",
+                    chunk_index,
+                    start,
+                    min(chunk_size, sizes["flights"] - start),
+                )
+                for chunk_index, start in enumerate(
+                    range(0, sizes["flights"], chunk_size)
+                )
+            ],
+            state,
+            options["workers"],
+        )
+        self.finish()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dataset ready. Users log in as user<N>@example.com "
+                f"with password {PASSWORD}"
+            )
+        )
+
+    def run_tasks(self, tasks, state, workers):
+        totals = Counter()
+        if connection.vendor != "postgresql" or workers <= 1:
+            _state.update(state)
+            results = map(_run_task, tasks)
+        else:
+            # Children must open their own connections
+            connections.close_all()
+            pool = multiprocessing.get_context("spawn").Pool(
+                workers, initializer=_init_worker, initargs=(state,)
+            )
+            results = pool.imap_unordered(_run_task, tasks)
+
+        for done, result in enumerate(results, start=1):
+            totals.update(result)
+            if done % 10 == 0 or done == len(tasks):
+                self.stdout.write(
+                    f"{done}/{len(tasks)} chunks: "
+                    + ", ".join(f"{v} {k}" for k, v in totals.items())
+                )
+
+        if connection.vendor == "postgresql" and workers > 1:
+            pool.close()
+            pool.join()
+
+    @staticmethod
+    def next_id(model):
+        return (model.objects.aggregate(max_id=Max("id"))["max_id"] or 0) + 1
+
+    def create_airplanes(self, seed, count):
+        rng = _rng(seed, "airplanes")
+        type_ids = []
+        for name in AIRPLANE_TYPES:
+            airplane_type, _ = AirplaneType.objects.get_or_create(name=name)
+            type_ids.append(airplane_type.id)
+
+        offset = self.next_id(Airplane)
+        rows = []
+        for index, version in enumerate(ChangeCounter.take(count)):
+            seats_in_row = rng.choice((4, 6, 6, 6, 8, 10))
+            rows.append(
+                (
+                    offset + index,
+                    f"SYN-{seed}-{offset + index}",
+                    rng.randint(15, 60),
+                    seats_in_row,
+                    rng.choice(type_ids),
+                    None,
+                    version,
+                )
+            )
+        write_rows(
+            Airplane,
+            (
+                "id", "name", "rows", "seats_in_row", "airplane_type_id",
+                "image", "version",
+            ),
+            rows,
+        )
+        return [(row[0], row[2], row[3]) for row in rows]
+
+    def create_airports(self, seed, count):
+        rng = _rng(seed, "airports")
+        offset = self.next_id(Airport)
+        rows = []
+        for index, version in enumerate(ChangeCounter.take(count)):
+            # Suffix with the id so reruns never collide on name + city
+            city = _place_name(rng, offset + index - 1)
+            rows.append(
+                (
+                    offset + index,
+                    f"{city} {rng.choice(('International', 'Regional'))} "
+                    f"Airport",
+                    city,
+                    version,
+                )
+            )
+        write_rows(
+            Airport, ("id", "name", "closest_big_city", "version"), rows
+        )
+        return [row[0] for row in rows]
+
+    def create_routes(self, seed, airport_ids, count):
+        """Routes between airports picked by Zipf popularity; returns
+        (id, distance, popularity) for each"""
+        rng = _rng(seed, "routes")
+        weights = _zipf_weights(len(airport_ids), 0.8)
+        cum_weights = list(accumulate(weights))
+        offset = self.next_id(Route)
+        rows, routes, pairs = [], [], set()
+        for index, version in enumerate(ChangeCounter.take(count)):
+            # Routes are unique per source and destination
+            source, destination = 0, 0
+            while source == destination or (source, destination) in pairs:
+                source, destination = (
+                    bisect_left(cum_weights, rng.random() * cum_weights[-1])
+                    for _ in range(2)
+                )
+            pairs.add((source, destination))
+            distance = int(rng.triangular(150, 12_000, 900))
+            rows.append(
+                (
+                    offset + index,
+                    distance,
+                    airport_ids[source],
+                    airport_ids[destination],
+                    version,
+                )
+            )
+            routes.append(
+                (
+                    offset + index,
+                    distance,
+                    math.sqrt(weights[source] * weights[destination]),
+                )
+            )
+        write_rows(
+            Route,
+            ("id", "distance", "source_id", "destination_id", "version"),
+            rows,
+        )
+        return routes
+
+    def create_crews(self, seed, count):
+        rng = _rng(seed, "crews")
+        offset = self.next_id(Crew)
+        rows = [
+            (offset + index, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+            for index in range(count)
+        ]
+        write_rows(Crew, ("id", "first_name", "last_name"), rows)
+        return [row[0] for row in rows]
+
+    def finish(self):
+        """Move sequences past the explicit ids, fill the rollups and refresh
+        statistics"""
+        self.stdout.write("Resetting sequences and analyzing tables...")
+        models = [
+            AirplaneType, Airplane, Airport, Route, Crew, Flight,
+            Flight.crews.through, Order, Ticket, get_user_model(),
+        ]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+        # Rows were copied in bulk, past the rollup signals
+        self.stdout.write("Computing load-factor rollups...")
+        reconcile()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.rollups import reconcile
+
+
+class Command(BaseCommand):
+    """Django command that recomputes the load-factor rollups
+
+    Meant to run nightly; fixes rows that drifted because of bulk writes.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int,
+            help="Only departure days from N days ago on (default: all)",
+        )
+        parser.add_argument("--from", dest="start", type=date.fromisoformat)
+        parser.add_argument("--to", dest="end", type=date.fromisoformat)
+        parser.add_argument(
+            "--window", type=int, default=7,
+            help="Days recomputed at a time (default: 7)",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        start = options["start"]
+        if options["days"] is not None:
+            start = timezone.now().date() - timedelta(days=options["days"])
+
+        fixed = reconcile(start, options["end"], options["window"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Load rollups reconciled, {fixed} rows fixed")
+        )
@@ -0,0 +1,50 @@
+import time
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Django command that waits for database to be available"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Give up after this many seconds (default: 60)",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Upper bound for the delay between attempts (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        self.stdout.write("Waiting to database...")
+        deadline = time.monotonic() + options["timeout"]
+        delay = 0.1
+
+        while True:
+            try:
+                connection.ensure_connection()
+                break
+            except OperationalError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']} "
+                        f"seconds"
+                    )
+
+                delay = min(delay, remaining)
+                self.stdout.write(
+                    f"Database unavailable, waiting {delay:.1f} seconds..."
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, options["max_delay"])
+
+        self.stdout.write(self.style.SUCCESS("Database ready!"))
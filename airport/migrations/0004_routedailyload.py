@@ -0,0 +1,52 @@
+# Generated by Django 4.2.6 on 2026-10-19 10:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0003_airplane_image_alter_flight_crews"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="route",
+            name="distance",
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.CreateModel(
+            name="RouteDailyLoad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("flights", models.IntegerField(default=0)),
+                ("seats", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_loads",
+                        to="airport.route",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["day"], name="airport_rou_day_eb25e4_idx"
+                    )
+                ],
+                "unique_together": {("route", "day")},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-19 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0004_routedailyload"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="flight",
+            name="departure_time",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
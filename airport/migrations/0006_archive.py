@@ -0,0 +1,63 @@
+# Generated by Django 4.2.6 on 2026-10-19 11:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0005_flight_departure_time_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderArchive",
+            fields=[
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="archive",
+                        serialize=False,
+                        to="airport.order",
+                    ),
+                ),
+                ("tickets", models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedFlight",
+            fields=[
+                (
+                    "flight_id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("departure_time", models.DateTimeField(db_index=True)),
+                ("arrival_time", models.DateTimeField()),
+                ("capacity", models.IntegerField()),
+                ("tickets_sold", models.IntegerField()),
+                ("crews", models.JSONField(default=list)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "airplane",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_flights",
+                        to="airport.airplane",
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_flights",
+                        to="airport.route",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["departure_time"],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.6 on 2026-10-19 11:15
+
+from django.db import migrations
+from django.db.models import Count, F, Min
+
+
+def merge_duplicate_routes(apps, schema_editor):
+    """Move the flights and rollups of duplicate routes to the first one"""
+    using = schema_editor.connection.alias
+    Route = apps.get_model("airport", "Route")
+    Flight = apps.get_model("airport", "Flight")
+    ArchivedFlight = apps.get_model("airport", "ArchivedFlight")
+    RouteDailyLoad = apps.get_model("airport", "RouteDailyLoad")
+
+    duplicates = (
+        Route.objects.using(using)
+        .values("source_id", "destination_id")
+        .annotate(count=Count("id"), kept=Min("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for group in duplicates:
+        kept = group["kept"]
+        dropped = list(
+            Route.objects.using(using)
+            .filter(
+                source_id=group["source_id"],
+                destination_id=group["destination_id"],
+            )
+            .exclude(id=kept)
+            .values_list("id", flat=True)
+        )
+        Flight.objects.using(using).filter(route_id__in=dropped).update(
+            route_id=kept
+        )
+        ArchivedFlight.objects.using(using).filter(
+            route_id__in=dropped
+        ).update(route_id=kept)
+        for load in RouteDailyLoad.objects.using(using).filter(
+            route_id__in=dropped
+        ):
+            updated = (
+                RouteDailyLoad.objects.using(using)
+                .filter(route_id=kept, day=load.day)
+                .update(
+                    flights=F("flights") + load.flights,
+                    seats=F("seats") + load.seats,
+                    tickets_sold=F("tickets_sold") + load.tickets_sold,
+                )
+            )
+            if not updated:
+                RouteDailyLoad.objects.using(using).create(
+                    route_id=kept,
+                    day=load.day,
+                    flights=load.flights,
+                    seats=load.seats,
+                    tickets_sold=load.tickets_sold,
+                )
+        Route.objects.using(using).filter(id__in=dropped).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0006_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_routes, migrations.RunPython.noop
+        ),
+        migrations.AlterUniqueTogether(
+            name="route",
+            unique_together={("source", "destination")},
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.6 on 2026-10-19 11:21
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+TRACKED = ("airplanetype", "airport", "airplane", "route", "flight")
+
+
+def number_existing_rows(apps, schema_editor):
+    """Give existing rows distinct versions, table after table"""
+    using = schema_editor.connection.alias
+    last = 0
+    for model_name in TRACKED:
+        model = apps.get_model("airport", model_name)
+        rows = model.objects.using(using)
+        max_id = rows.aggregate(max_id=Max("id"))["max_id"] or 0
+        rows.update(version=F("id") + last)
+        last += max_id
+    apps.get_model("airport", "ChangeCounter").objects.using(using).create(
+        pk=1, value=last
+    )
+
+
+def version_field(**kwargs):
+    return models.BigIntegerField(default=0, editable=False, **kwargs)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0007_route_unique_airports"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "version",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("object_type", models.CharField(max_length=31)),
+                ("object_id", models.BigIntegerField()),
+            ],
+            options={
+                "ordering": ["version"],
+            },
+        ),
+        # Indexed after numbering, which is faster than updating an index
+        *(
+            migrations.AddField(
+                model_name=model_name, name="version", field=version_field()
+            )
+            for model_name in TRACKED
+        ),
+        migrations.RunPython(number_existing_rows, migrations.RunPython.noop),
+        *(
+            migrations.AlterField(
+                model_name=model_name,
+                name="version",
+                field=version_field(db_index=True),
+            )
+            for model_name in TRACKED
+        ),
+    ]
@@ -0,0 +1,423 @@
+from itertools import chain, islice
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from airport.serializers import BulkUpsertResultSerializer
+from airport.values_serializers import get_values_serializer
+from airport_service.db_router import (
+    is_pinned_to_primary,
+    pin_to_primary,
+    set_replica_reads,
+)
+from airport_service.metrics import set_endpoint_label, time_serializer
+from airport_service.parsers import CSVParser
+from airport_service.renderers import astream_json_array, stream_json_array
+
+
+class MetricsMixin:
+    """Label request metrics by viewset action and time serializers"""
+
+    def initial(self, request, *args, **kwargs):
+        basename = self.basename or self.queryset.model._meta.model_name
+        set_endpoint_label(f"{basename}-{self.action}")
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        return time_serializer(super().get_serializer(*args, **kwargs))
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests from read replicas
+
+    Users who have just written something are pinned to the primary for
+    REPLICA_PIN_SECONDS so they read their own writes, by a timestamp on
+    their row that every worker can check.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        set_replica_reads(
+            request.method in SAFE_METHODS
+            and not is_pinned_to_primary(request.user)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        set_replica_reads(False)
+
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """Narrow read responses with ?fields=a,b and ?exclude=c
+
+    Dropped fields are removed from the serializer, and relations only they
+    used lose their select_related/prefetch_related. Columns are narrowed
+    with .only(). field_dependencies lists the model fields read by
+    serializer fields that aren't model fields themselves, like properties.
+    Fields whose source is unknown keep the queryset unchanged.
+    Annotations are skipped by get_queryset through wants_field.
+    """
+
+    field_dependencies = {}
+
+    def get_sparse_fields(self):
+        """Names of the fields to keep, None when all fields are wanted"""
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+
+        cache = self.__dict__.setdefault("_sparse_fields", {})
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in cache:
+            cache[serializer_class] = self.parse_sparse_fields(
+                list(serializer_class().fields)
+            )
+        return cache[serializer_class]
+
+    def parse_sparse_fields(self, names):
+        params = {}
+        for param in ("fields", "exclude"):
+            value = self.request.query_params.get(param)
+            if value is not None:
+                params[param] = {
+                    name.strip() for name in value.split(",") if name.strip()
+                }
+
+        if not params:
+            return None
+
+        unknown = set().union(*params.values()) - set(names)
+        if unknown:
+            raise ValidationError(
+                {
+                    param: f"Unknown fields: {', '.join(sorted(unknown))}"
+                    for param, requested in params.items()
+                    if requested & unknown
+                }
+            )
+
+        return [
+            name
+            for name in names
+            if name in params.get("fields", names)
+            and name not in params.get("exclude", ())
+        ]
+
+    def wants_field(self, name):
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def get_values_serializer_class(self):
+        values_serializer_class = super().get_values_serializer_class()
+        fields = self.get_sparse_fields()
+        if values_serializer_class is None or fields is None:
+            return values_serializer_class
+        return values_serializer_class.with_fields(fields)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        return self.prune_queryset(queryset, fields)
+
+    def prune_queryset(self, queryset, fields):
+        """Drop the relations and columns no kept field reads"""
+        serializer_fields = self.get_serializer_class()().fields
+        opts = queryset.model._meta
+        relations = set()
+        columns = {opts.pk.name}
+
+        for name in fields:
+            source = serializer_fields[name].source
+            paths = self.field_dependencies.get(name)
+            if paths is None:
+                if source == "*":
+                    return queryset
+                paths = [source.split(".")[0]]
+
+            for path in paths:
+                attribute = path.split("__")[0]
+                if attribute in queryset.query.annotations:
+                    continue
+                try:
+                    field = opts.get_field(attribute)
+                except FieldDoesNotExist:
+                    if attribute == "pk":
+                        continue
+                    return queryset
+
+                if field.is_relation:
+                    relations.add(attribute)
+                if field.concrete and not field.many_to_many:
+                    columns.add(attribute)
+
+        if isinstance(queryset.query.select_related, dict):
+            select_related = [
+                lookup
+                for lookup in _select_related_lookups(
+                    queryset.query.select_related
+                )
+                if lookup.split("__")[0] in relations
+            ]
+            queryset = queryset.select_related(None)
+            # select_related() without lookups would follow every relation
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+
+        prefetch_related = [
+            lookup
+            for lookup in queryset._prefetch_related_lookups
+            if (
+                lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+            ).split("__")[0]
+            in relations
+        ]
+        return (
+            queryset.prefetch_related(None)
+            .prefetch_related(*prefetch_related)
+            .only(*columns)
+        )
+
+
+def _select_related_lookups(tree, prefix=""):
+    for name, subtree in tree.items():
+        if subtree:
+            yield from _select_related_lookups(subtree, f"{prefix}{name}__")
+        else:
+            yield f"{prefix}{name}"
+
+
+class ValuesListMixin:
+    """Serve list actions with the values serializer of the list serializer
+
+    Lists whose serializer has no values counterpart (see
+    airport.values_serializers) go through the regular serializer.
+    Unpaginated JSON lists longer than stream_batch_size are streamed,
+    encoded batch by batch from a queryset iterator.
+    """
+
+    stream_batch_size = 500
+
+    def get_values_serializer_class(self):
+        return get_values_serializer(self.get_serializer_class())
+
+    def get_values_serializer(self, rows):
+        return time_serializer(
+            self.get_values_serializer_class()(
+                rows, many=True, context=self.get_serializer_context()
+            )
+        )
+
+    def get_values_queryset(self):
+        values_serializer_class = self.get_values_serializer_class()
+        if values_serializer_class is None:
+            return None
+
+        queryset = values_serializer_class.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        # Streaming outlives the request's replica routing, pin the database
+        return queryset.using(queryset.db)
+
+    def streaming_response(self, content):
+        return StreamingHttpResponse(
+            content, content_type=self.request.accepted_renderer.media_type
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_values_queryset()
+        if queryset is None:
+            return super().list(request, *args, **kwargs)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_values_serializer(page)
+            return self.get_paginated_response(serializer.data)
+
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return Response(self.get_values_serializer(queryset).data)
+
+        size = self.stream_batch_size
+        rows = queryset.iterator(chunk_size=size)
+        first_batch = _next_batch(rows, size)
+        serializer = self.get_values_serializer(first_batch)
+        if len(first_batch) < size:
+            return Response(serializer.data)
+
+        batches = (
+            serializer.to_representation(batch)
+            for batch in iter(lambda: _next_batch(rows, size), [])
+        )
+        return self.streaming_response(
+            stream_json_array(
+                chain([serializer.data], batches), request.accepted_renderer
+            )
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.get_values_queryset()
+        if queryset is None:
+            return await super().alist(request, *args, **kwargs)
+
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            rows = [row async for row in queryset]
+            return Response(self.get_values_serializer(rows).data)
+
+        serializer = self.get_values_serializer(None)
+
+        async def represent(batch):
+            if serializer.has_nested:
+                return await sync_to_async(serializer.to_representation)(
+                    batch
+                )
+            return serializer.to_representation(batch)
+
+        # QuerySet.aiterator() runs values_list queries in the event loop,
+        # so advance a sync iterator in the thread the ORM uses instead
+        size = self.stream_batch_size
+        rows = queryset.iterator(chunk_size=size)
+        first_batch = await sync_to_async(_next_batch)(rows, size)
+        if len(first_batch) < size:
+            return Response(await represent(first_batch))
+
+        async def batches():
+            yield await represent(first_batch)
+            while True:
+                batch = await sync_to_async(_next_batch)(rows, size)
+                if not batch:
+                    return
+                yield await represent(batch)
+
+        return self.streaming_response(
+            astream_json_array(batches(), request.accepted_renderer)
+        )
+
+
+def _next_batch(rows, size):
+    return list(islice(rows, size))
+
+
+class BatchRetrieveMixin:
+    """Retrieve several objects with one query for the batch endpoint
+
+    Authentication, permissions and throttling run once, and
+    select_related/prefetch_related are shared by all the objects, which
+    are still checked and serialized one by one as retrieve would.
+    """
+
+    @classmethod
+    def batch_retrieve(cls, view, request, kwargs_list):
+        """Responses for the retrieve URL kwargs in kwargs_list, in order
+
+        view is the function the URLs resolved to and request the GET
+        request of the first of them.
+        """
+        self = cls(**view.initkwargs)
+        self.action_map = view.actions
+        self.args = ()
+        self.kwargs = kwargs_list[0]
+        request = self.initialize_request(request)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            return self._batch_retrieve(request, kwargs_list)
+        finally:
+            set_replica_reads(False)
+
+    def _batch_retrieve(self, request, kwargs_list):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        try:
+            self.initial(request)
+            queryset = self.filter_queryset(self.get_queryset())
+            opts = queryset.model._meta
+            if self.lookup_field == "pk":
+                field = opts.pk
+            else:
+                field = opts.get_field(self.lookup_field)
+            keys = []
+            for kwargs in kwargs_list:
+                try:
+                    keys.append(field.to_python(kwargs[lookup_url_kwarg]))
+                except DjangoValidationError:
+                    keys.append(None)
+            instances = {
+                getattr(instance, self.lookup_field): instance
+                for instance in queryset.filter(
+                    **{f"{self.lookup_field}__in": set(keys) - {None}}
+                )
+            }
+        except Exception as exc:
+            return [self.handle_exception(exc)] * len(kwargs_list)
+
+        responses = []
+        for key in keys:
+            try:
+                instance = instances.get(key)
+                if instance is None:
+                    raise Http404
+                self.check_object_permissions(request, instance)
+                response = Response(self.get_serializer(instance).data)
+            except Exception as exc:
+                response = self.handle_exception(exc)
+            responses.append(response)
+        return responses
+
+
+class BulkUpsertMixin:
+    """Upsert a JSON or CSV array of rows with POST to .../bulk/
+
+    Rows are matched to stored ones by natural key with bulk_upsert_class,
+    see airport.upsert. Admins only.
+    """
+
+    bulk_upsert_class = None
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "bulk":
+            kwargs.setdefault("context", self.get_serializer_context())
+            return self.bulk_upsert_class.serializer_class(
+                *args, many=True, **kwargs
+            )
+        return super().get_serializer(*args, **kwargs)
+
+    @extend_schema(responses=BulkUpsertResultSerializer)
+    @action(
+        methods=["POST"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+        parser_classes=[JSONParser, CSVParser],
+    )
+    def bulk(self, request):
+        """Create or update rows by natural key, all or none"""
+        return Response(self.bulk_upsert_class().run(request.data))
@@ -1,14 +1,90 @@
+import json
 import os
 import uuid
+import zlib
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
 from django.utils.text import slugify
 
 
-class Flight(models.Model):
-    departure_time = models.DateTimeField()
+def format_duration(departure_time, arrival_time) -> str:
+    duration = arrival_time - departure_time
+    hours, remainder = divmod(duration.total_seconds(), 3600)
+    minutes = remainder // 60
+    return f"{int(hours):02d}:{int(minutes):02d}"
+
+
+class ChangeCounter(models.Model):
+    """The last version given to a change, in the only row
+
+    Taking versions locks the row until the transaction commits, so
+    versions become visible in order: whoever sees a version sees all the
+    versions before it.
+    """
+
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def take(cls, number=1, using="default"):
+        """range of number new versions; call in a transaction"""
+        counters = cls.objects.using(using).filter(pk=1)
+        if not counters.update(value=F("value") + number):
+            # Created by the migration, but gone after a test flush
+            cls.objects.using(using).get_or_create(pk=1)
+            counters.update(value=F("value") + number)
+        last = counters.values_list("value", flat=True).get()
+        return range(last - number + 1, last + 1)
+
+
+class ChangeTracked(models.Model):
+    """A model listed by the change feed, see airport.changes
+
+    Each save gives the row the next version.
+    """
+
+    version = models.BigIntegerField(
+        default=0, db_index=True, editable=False
+    )
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        using = using or router.db_for_write(type(self), instance=self)
+        if update_fields:
+            update_fields = {*update_fields, "version"}
+        with transaction.atomic(using=using, savepoint=False):
+            self.version = ChangeCounter.take(using=using)[0]
+            return super().save(
+                force_insert, force_update, using, update_fields
+            )
+
+    class Meta:
+        abstract = True
+
+
+class Tombstone(models.Model):
+    """A deleted row of a ChangeTracked model, for the change feed"""
+
+    version = models.BigIntegerField(primary_key=True)
+    object_type = models.CharField(max_length=31)
+    object_id = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} ({self.version})"
+
+    class Meta:
+        ordering = ["version"]
+
+
+class Flight(ChangeTracked):
+    departure_time = models.DateTimeField(db_index=True)
     arrival_time = models.DateTimeField()
     route = models.ForeignKey(
         "Route", on_delete=models.CASCADE, related_name="flights"
@@ -20,10 +96,7 @@ class Flight(models.Model):
 
     @property
     def duration(self) -> str:
-        duration = self.arrival_time - self.departure_time
-        hours, remainder = divmod(duration.total_seconds(), 3600)
-        minutes = remainder // 60
-        return f"{int(hours):02d}:{int(minutes):02d}"
+        return format_duration(self.departure_time, self.arrival_time)
 
     def __str__(self):
         return (
@@ -37,7 +110,7 @@ class Flight(models.Model):
         ]
 
 
-class Route(models.Model):
+class Route(ChangeTracked):
     distance = models.PositiveIntegerField()
     source = models.ForeignKey(
         "Airport", on_delete=models.CASCADE, related_name="source_routes"
@@ -70,9 +143,13 @@ class Route(models.Model):
             "source",
             "destination",
         ]
+        unique_together = (
+            "source",
+            "destination",
+        )
 
 
-class Airport(models.Model):
+class Airport(ChangeTracked):
     name = models.CharField(max_length=255)
     closest_big_city = models.CharField(max_length=63)
 
@@ -96,7 +173,7 @@ def airplane_image_path(instance, filename):
     return os.path.join("uploads/airplanes/", filename)
 
 
-class Airplane(models.Model):
+class Airplane(ChangeTracked):
     name = models.CharField(max_length=255, unique=True)
     rows = models.IntegerField()
     seats_in_row = models.IntegerField()
@@ -118,7 +195,7 @@ class Airplane(models.Model):
         ]
 
 
-class AirplaneType(models.Model):
+class AirplaneType(ChangeTracked):
     name = models.CharField(max_length=127, unique=True)
 
     def __str__(self):
@@ -200,3 +277,99 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+
+
+class RouteDailyLoad(models.Model):
+    """Flights, seats and tickets sold per route and departure day (UTC)
+
+    Kept up to date by airport.rollups, see reconcile_load_rollups.
+    """
+
+    route = models.ForeignKey(
+        "Route", on_delete=models.CASCADE, related_name="daily_loads"
+    )
+    day = models.DateField()
+    flights = models.IntegerField(default=0)
+    seats = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.route_id} {self.day}"
+
+    class Meta:
+        unique_together = ("route", "day")
+        indexes = [models.Index(fields=["day"])]
+
+
+class ArchivedFlight(models.Model):
+    """A departed flight moved out of Flight by archive_flights
+
+    Keeps what the load-factor rollups need; the tickets live on in the
+    OrderArchive of their orders.
+    """
+
+    flight_id = models.BigIntegerField(primary_key=True)
+    departure_time = models.DateTimeField(db_index=True)
+    arrival_time = models.DateTimeField()
+    route = models.ForeignKey(
+        "Route", on_delete=models.CASCADE, related_name="archived_flights"
+    )
+    airplane = models.ForeignKey(
+        "Airplane", on_delete=models.CASCADE, related_name="archived_flights"
+    )
+    capacity = models.IntegerField()
+    tickets_sold = models.IntegerField()
+    crews = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.flight_id} ({self.departure_time:%d/%m/%Y %H:%M})"
+
+    class Meta:
+        ordering = [
+            "departure_time",
+        ]
+
+
+class OrderArchive(models.Model):
+    """Compressed snapshot of the tickets of an order on archived flights
+
+    tickets is zlib-compressed JSON: {"tickets": [[id, row, seat,
+    flight_id], ...], "flights": {flight_id: {"name": str(flight),
+    "detail": FlightListSerializer data}}}.
+    """
+
+    order = models.OneToOneField(
+        "Order",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="archive",
+    )
+    tickets = models.BinaryField()
+
+    def load(self):
+        return json.loads(zlib.decompress(self.tickets))
+
+    @staticmethod
+    def dump(data):
+        return zlib.compress(
+            json.dumps(data, separators=(",", ":")).encode(), 9
+        )
+
+    def ticket_representations(self, detail=False):
+        """Tickets as TicketListSerializer, or TicketDetailSerializer,
+        would represent them"""
+        data = self.load()
+        key = "detail" if detail else "name"
+        return [
+            {
+                "id": ticket_id,
+                "row": row,
+                "seat": seat,
+                "flight": data["flights"][str(flight_id)][key],
+            }
+            for ticket_id, row, seat, flight_id in data["tickets"]
+        ]
+
+    def __str__(self):
+        return f"Archive of order {self.order_id}"
@@ -0,0 +1,38 @@
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from airport_service.counts import EstimatedCountPaginator
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Page numbers without an exact COUNT(*) over large results
+
+    Counts are exact up to ESTIMATED_COUNT_THRESHOLD rows and approximate
+    above it (see airport_service.counts), which responses tell with
+    count_is_approximate. Links to further pages follow the count, so the
+    last page of an approximate count may come back empty.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        paginator = self.page.paginator
+        return Response(
+            {
+                "count": paginator.count,
+                "count_is_approximate": paginator.count_is_approximate,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        properties = response_schema["properties"]
+        response_schema["properties"] = {
+            "count": properties.pop("count"),
+            "count_is_approximate": {"type": "boolean", "example": False},
+            **properties,
+        }
+        return response_schema
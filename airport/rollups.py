@@ -0,0 +1,380 @@
+"""
+Route and day rollups of flights, seats and tickets sold (RouteDailyLoad).
+
+Creating or deleting a ticket adjusts the row of its flight with a single
+UPDATE once the transaction commits, so bookings don't hold the lock of the
+shared row; a booking (ticket_counts_at_commit) adds its tickets up per row
+and updates each row once, in key order. Flight and airplane changes
+recompute the few rows they touch.
+Bulk writes (QuerySet.update(), bulk_create(), generate_dataset) skip the
+signals, and so do fixtures (loaddata); concurrent recomputes may race and
+a crash can lose counts between a commit and its update. reconcile()
+recomputes every row and fixes such drift, see
+"manage.py reconcile_load_rollups".
+
+Archived flights (ArchivedFlight) keep counting in the rows of their days.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time, timedelta, timezone
+from functools import partial, reduce
+from itertools import islice
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    ArchivedFlight,
+    Flight,
+    Route,
+    RouteDailyLoad,
+    Ticket,
+)
+
+# Deleting any of these deletes flights too; the flights recompute their
+# rows, so the tickets deleted with them don't adjust anything
+FLIGHT_OWNERS = (Flight, Route, Airplane, Airport, AirplaneType)
+FIELDS = ("flights", "seats", "tickets_sold")
+KEYS_PER_QUERY = 500
+UTC = timezone.utc
+
+_pending_counts = ContextVar("pending_ticket_counts", default=None)
+
+
+def departure_day(departure_time):
+    return departure_time.astimezone(UTC).date()
+
+
+def day_start(day):
+    return datetime.combine(day, time.min, tzinfo=UTC)
+
+
+def expected_rows(flights, using="default"):
+    """{(route_id, day): (flights, seats, tickets_sold)} of flights
+
+    flights is a Q on route and departure_time, matched against both live
+    and archived flights.
+    """
+    day = TruncDate("departure_time", tzinfo=UTC)
+    flights = (
+        Flight.objects.using(using).filter(flights),
+        ArchivedFlight.objects.using(using).filter(flights),
+    )
+    rows = {
+        (row["route_id"], row["day"]): [row["flights"], row["seats"], 0]
+        for row in flights[0].annotate(day=day)
+        .values("route_id", "day")
+        .annotate(
+            flights=Count("id"),
+            seats=Sum(F("airplane__rows") * F("airplane__seats_in_row")),
+        )
+        .order_by()
+    }
+    tickets = (
+        Ticket.objects.using(using)
+        .filter(flight__in=flights[0].values("pk"))
+        .annotate(day=TruncDate("flight__departure_time", tzinfo=UTC))
+        .values("flight__route_id", "day")
+        .annotate(tickets_sold=Count("id"))
+        .order_by()
+    )
+    for row in tickets:
+        rows[row["flight__route_id"], row["day"]][2] = row["tickets_sold"]
+    archived = (
+        flights[1].annotate(day=day)
+        .values("route_id", "day")
+        .annotate(
+            flights=Count("pk"),
+            seats=Sum("capacity"),
+            tickets_sold=Sum("tickets_sold"),
+        )
+        .order_by()
+    )
+    for row in archived:
+        values = rows.setdefault((row["route_id"], row["day"]), [0, 0, 0])
+        for index, field in enumerate(FIELDS):
+            values[index] += row[field]
+    return {key: tuple(values) for key, values in rows.items()}
+
+
+def sync(flights, rollups):
+    """Make the rollups match flights; returns the number of rows fixed
+
+    rollups must cover the same routes and days as the flights Q.
+    """
+    expected = expected_rows(flights, rollups.db)
+    existing = {
+        (rollup.route_id, rollup.day): rollup
+        for rollup in rollups.only("route", "day", *FIELDS)
+    }
+
+    changed = [
+        RouteDailyLoad(route_id=route_id, day=day, **dict(zip(FIELDS, row)))
+        for (route_id, day), row in expected.items()
+        if (route_id, day) not in existing
+        or tuple(
+            getattr(existing[route_id, day], field) for field in FIELDS
+        ) != row
+    ]
+    stale = [
+        rollup.pk
+        for key, rollup in existing.items()
+        if key not in expected
+    ]
+
+    with transaction.atomic(using=rollups.db):
+        RouteDailyLoad.objects.using(rollups.db).bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=("route", "day"),
+            update_fields=FIELDS,
+            batch_size=1000,
+        )
+        RouteDailyLoad.objects.using(rollups.db).filter(
+            pk__in=stale
+        ).delete()
+    return len(changed) + len(stale)
+
+
+def refresh(keys, using="default"):
+    """Recompute the rows of the (route_id, day) keys"""
+    keys = iter(keys)
+    while batch := list(islice(keys, KEYS_PER_QUERY)):
+        flights = reduce(
+            or_,
+            (
+                Q(
+                    route_id=route_id,
+                    departure_time__gte=day_start(day),
+                    departure_time__lt=day_start(day + timedelta(days=1)),
+                )
+                for route_id, day in batch
+            ),
+        )
+        rollups = reduce(
+            or_,
+            (Q(route_id=route_id, day=day) for route_id, day in batch),
+        )
+        sync(flights, RouteDailyLoad.objects.using(using).filter(rollups))
+
+
+def reconcile(start=None, end=None, window=7, using="default"):
+    """Recompute the rows of days start to end (inclusive), all by default
+
+    Days are processed window at a time to bound memory. Returns the number
+    of rows that had drifted.
+    """
+    rollups = RouteDailyLoad.objects.using(using)
+    no_flights = Q(pk__in=[])
+    bounds = [
+        model.objects.using(using).aggregate(
+            first=Min("departure_time"), last=Max("departure_time")
+        )
+        for model in (Flight, ArchivedFlight)
+    ]
+    firsts = [bound["first"] for bound in bounds if bound["first"]]
+    if not firsts:
+        if start is not None:
+            rollups = rollups.filter(day__gte=start)
+        if end is not None:
+            rollups = rollups.filter(day__lte=end)
+        return sync(no_flights, rollups)
+
+    fixed = 0
+    # Rows outside the days of any flight can only be stale
+    if start is None:
+        start = departure_day(min(firsts))
+        fixed += sync(no_flights, rollups.filter(day__lt=start))
+    if end is None:
+        end = departure_day(
+            max(bound["last"] for bound in bounds if bound["last"])
+        )
+        fixed += sync(no_flights, rollups.filter(day__gt=end))
+
+    day = start
+    while day <= end:
+        until = min(day + timedelta(days=window - 1), end)
+        fixed += sync(
+            Q(
+                departure_time__gte=day_start(day),
+                departure_time__lt=day_start(until + timedelta(days=1)),
+            ),
+            rollups.filter(day__range=(day, until)),
+        )
+        day = until + timedelta(days=1)
+    return fixed
+
+
+def apply_ticket_counts(counts, using="default"):
+    """Add tickets sold to the rows of the (route_id, day) keys of counts"""
+    # In key order, so concurrent updates lock rows in the same order
+    for key, number in sorted(counts.items()):
+        if not number:
+            continue
+        updated = (
+            RouteDailyLoad.objects.using(using)
+            .filter(route_id=key[0], day=key[1])
+            .update(tickets_sold=F("tickets_sold") + number)
+        )
+        if not updated:
+            refresh([key], using)
+
+
+@contextmanager
+def ticket_counts_at_commit(using="default"):
+    """Count the tickets of the block per row and apply them at commit
+
+    Use inside the transaction; if the block raises, its counts are
+    dropped along with the transaction.
+    """
+    counts = defaultdict(int)
+    token = _pending_counts.set(counts)
+    try:
+        yield
+    finally:
+        _pending_counts.reset(token)
+    if counts:
+        transaction.on_commit(
+            partial(apply_ticket_counts, dict(counts), using), using
+        )
+
+
+def add_tickets(flight, number, using="default"):
+    key = (flight.route_id, departure_day(flight.departure_time))
+    counts = _pending_counts.get()
+    if counts is not None:
+        counts[key] += number
+    else:
+        transaction.on_commit(
+            partial(apply_ticket_counts, {key: number}, using), using
+        )
+
+
+def airplanes_resized(airplane_ids, using="default"):
+    """Recompute the rows of the flights of airplanes whose capacity changed"""
+    refresh(
+        (
+            (route_id, day)
+            for route_id, day in Flight.objects.using(using)
+            .filter(airplane_id__in=airplane_ids)
+            .annotate(day=TruncDate("departure_time", tzinfo=UTC))
+            .values_list("route_id", "day")
+            .distinct()
+            .order_by()
+        ),
+        using,
+    )
+
+
+def _ticket_flight(flight_id, using):
+    return (
+        Flight.objects.using(using)
+        .only("route_id", "departure_time")
+        .filter(pk=flight_id)
+        .first()
+    )
+
+
+def _deletes_flights(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, FLIGHT_OWNERS)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_flight(sender, instance, using, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._rollup_flight_id = (
+            Ticket.objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list("flight_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, using, raw=False, **kwargs):
+    # Fixtures may come before their flights; reconcile() counts them
+    if raw:
+        return
+    previous = None if created else instance._rollup_flight_id
+    if previous == instance.flight_id:
+        return
+
+    if previous is not None:
+        flight = _ticket_flight(previous, using)
+        if flight is not None:
+            add_tickets(flight, -1, using)
+    add_tickets(instance.flight, 1, using)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, using, origin=None, **kwargs):
+    if origin is not None and _deletes_flights(origin):
+        return
+
+    if Ticket.flight.is_cached(instance):
+        flight = instance.flight
+    else:
+        flight = _ticket_flight(instance.flight_id, using)
+    if flight is not None:
+        add_tickets(flight, -1, using)
+
+
+@receiver(pre_save, sender=Flight)
+def remember_flight_key(sender, instance, using, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._rollup_key = (
+            Flight.objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list("route_id", "departure_time")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Flight)
+def flight_saved(sender, instance, created, using, raw=False, **kwargs):
+    if raw:
+        return
+
+    keys = {(instance.route_id, departure_day(instance.departure_time))}
+    previous = None if created else instance._rollup_key
+    if previous is not None:
+        keys.add((previous[0], departure_day(previous[1])))
+    refresh(keys, using)
+
+
+@receiver(post_delete, sender=Flight)
+def flight_deleted(sender, instance, using, **kwargs):
+    refresh(
+        [(instance.route_id, departure_day(instance.departure_time))], using
+    )
+
+
+@receiver(pre_save, sender=Airplane)
+def remember_capacity(sender, instance, using, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._rollup_capacity = (
+            Airplane.objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list("rows", "seats_in_row")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Airplane)
+def airplane_saved(sender, instance, created, using, raw=False, **kwargs):
+    if raw or created or instance._rollup_capacity in (
+        None,
+        (instance.rows, instance.seats_in_row),
+    ):
+        return
+
+    airplanes_resized([instance.pk], using)
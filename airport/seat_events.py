@@ -0,0 +1,232 @@
+"""
+Server-sent events of seat changes, for seat pickers and departure boards.
+
+Creating, moving or deleting a ticket publishes, once its transaction
+commits, a message on the topic of its flight; a booking
+(seat_events_at_commit) sends one message per flight for all its tickets.
+A stream starts with a snapshot of the taken seats of each subscribed
+flight, then sends a "seats" event per change with the seats taken and
+released and the seats_available delta. Bulk writes (bulk_create,
+archiving) and fixtures (loaddata) skip the signals, so they publish
+nothing.
+"""
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from airport.models import Flight, Ticket
+from airport_service.events import hub
+
+
+_pending_seats = ContextVar("pending_seat_changes", default=None)
+
+
+def flight_topic(flight_id):
+    return f"flight.{flight_id}"
+
+
+def seats_message(flight_id, taken=(), released=()):
+    return {
+        "flight": flight_id,
+        "taken": [list(seat) for seat in taken],
+        "released": [list(seat) for seat in released],
+        "seats_available_delta": len(released) - len(taken),
+    }
+
+
+def publish_messages(messages):
+    # After the commit, a failing channel mustn't fail the request
+    for message in messages:
+        hub.publish(flight_topic(message["flight"]), message)
+
+
+@contextmanager
+def seat_events_at_commit(using="default"):
+    """Collect the seat changes of the block into one message per flight,
+    published at commit
+
+    Use inside the transaction; if the block raises, its changes are
+    dropped along with the transaction.
+    """
+    changes = defaultdict(lambda: ({}, {}))
+    token = _pending_seats.set(changes)
+    try:
+        yield
+    finally:
+        _pending_seats.reset(token)
+    messages = [
+        seats_message(flight_id, taken, released)
+        for flight_id, (taken, released) in changes.items()
+        if taken or released
+    ]
+    if messages:
+        # A lambda: robust on_commit logs failures by __qualname__
+        transaction.on_commit(
+            lambda: publish_messages(messages), using, robust=True
+        )
+
+
+def publish_seats(flight_id, taken=(), released=(), using="default"):
+    """Publish a seat change of flight_id once the transaction commits"""
+    changes = _pending_seats.get()
+    if changes is None:
+        messages = [seats_message(flight_id, taken, released)]
+        transaction.on_commit(
+            lambda: publish_messages(messages), using, robust=True
+        )
+        return
+
+    # Dicts keep the seats in order; a seat released and taken again
+    # within the block hasn't changed
+    pending_taken, pending_released = changes[flight_id]
+    for seat in taken:
+        if seat in pending_released:
+            del pending_released[seat]
+        else:
+            pending_taken[seat] = None
+    for seat in released:
+        if seat in pending_taken:
+            del pending_taken[seat]
+        else:
+            pending_released[seat] = None
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_seat(sender, instance, using, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._event_seat = (
+            Ticket.objects.using(using)
+            .filter(pk=instance.pk)
+            .values_list("flight_id", "row", "seat")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, using, raw, **kwargs):
+    # Fixtures (loaddata) aren't bookings, and the channel may not be there
+    if raw:
+        return
+    seat = (instance.flight_id, instance.row, instance.seat)
+    previous = None if created else instance._event_seat
+    if previous == seat:
+        return
+
+    if previous is not None:
+        publish_seats(previous[0], released=[previous[1:]], using=using)
+    publish_seats(seat[0], taken=[seat[1:]], using=using)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, using, **kwargs):
+    publish_seats(
+        instance.flight_id,
+        released=[(instance.row, instance.seat)],
+        using=using,
+    )
+
+
+def snapshot(flight_ids):
+    """{flight_id: {"taken": seats, "seats_available": n}} of flight_ids"""
+    flights = {
+        flight_id: {"taken": set(), "seats_available": rows * seats_in_row}
+        for flight_id, rows, seats_in_row in Flight.objects.filter(
+            pk__in=flight_ids
+        ).values_list("pk", "airplane__rows", "airplane__seats_in_row")
+    }
+    for flight_id, row, seat in (
+        Ticket.objects.filter(flight_id__in=flights)
+        .values_list("flight_id", "row", "seat")
+        .order_by()
+    ):
+        flights[flight_id]["taken"].add((row, seat))
+        flights[flight_id]["seats_available"] -= 1
+    return flights
+
+
+def read_snapshot(flight_ids):
+    """snapshot() on a pooled thread, closing its connection after
+
+    Thread-sensitive calls would run on the thread of the request, which
+    with its connection lasts as long as the stream; an idle stream holds
+    nothing but its queue this way.
+    """
+    try:
+        return snapshot(flight_ids)
+    finally:
+        connections.close_all()
+
+
+def unseen(message, snapshot):
+    """The part of a message queued before snapshot was read that it misses"""
+    taken = snapshot.get(message["flight"], {"taken": set()})["taken"]
+    message = {
+        **message,
+        "taken": [
+            seat for seat in message["taken"] if tuple(seat) not in taken
+        ],
+        "released": [
+            seat for seat in message["released"] if tuple(seat) in taken
+        ],
+    }
+    message["seats_available_delta"] = len(message["released"]) - len(
+        message["taken"]
+    )
+    return message
+
+
+def event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def seat_event_stream(flight_ids):
+    """SSE stream of the seat changes of flight_ids"""
+    async with hub.subscribe(
+        [flight_topic(flight_id) for flight_id in flight_ids]
+    ) as subscription:
+        # Subscribed first, so no change is missed while the snapshot is read
+        flights = await sync_to_async(
+            read_snapshot, thread_sensitive=False
+        )(flight_ids)
+        yield b"retry: %d\n\n" % settings.SEAT_EVENTS_RETRY_MS + event(
+            "snapshot",
+            [
+                {
+                    "flight": flight_id,
+                    "taken": sorted(state["taken"]),
+                    "seats_available": state["seats_available"],
+                }
+                for flight_id, state in flights.items()
+            ],
+        )
+
+        messages = [
+            unseen(message, flights) for message in subscription.pending()
+        ]
+        # Idle streams shouldn't hold on to the seat sets
+        del flights
+        while not subscription.overflowed:
+            chunk = b"".join(
+                event("seats", message)
+                for message in messages
+                if message["taken"] or message["released"]
+            )
+            if chunk:
+                yield chunk
+
+            message = await subscription.get(settings.SEAT_EVENTS_KEEPALIVE)
+            if message is None:
+                yield b": keepalive\n\n"
+                messages = []
+            else:
+                messages = [message, *subscription.pending()]
+
+        # Too far behind; the client reconnects and gets a new snapshot
+        yield event("reset", {})
@@ -0,0 +1,99 @@
+"""
+Automatic seat assignment for group bookings.
+
+SeatMap keeps one bitmask of taken seats per row (bit 0 is seat 1) and picks
+seats for a group: the tightest block of free seats in one row that fits the
+whole group, else the fewest blocks that do. assign_seats() locks the
+flight row so concurrent assignments on a flight queue up instead of
+picking the same seats.
+"""
+from airport.models import Flight, Ticket
+
+
+class SeatMap:
+    """Occupancy bitmap of a flight"""
+
+    def __init__(self, rows, seats_in_row, taken=()):
+        self.seats_in_row = seats_in_row
+        self.full = (1 << seats_in_row) - 1
+        self.rows = [0] * rows
+        for row, seat in taken:
+            self.rows[row - 1] |= 1 << (seat - 1)
+
+    @classmethod
+    def of_flight(cls, flight, using="default"):
+        return cls(
+            flight.airplane.rows,
+            flight.airplane.seats_in_row,
+            Ticket.objects.using(using)
+            .filter(flight=flight)
+            .values_list("row", "seat")
+            .order_by(),
+        )
+
+    @property
+    def free(self):
+        return sum(
+            self.seats_in_row - taken.bit_count() for taken in self.rows
+        )
+
+    def runs(self):
+        """(length, row, first seat) of every block of free seats"""
+        for index, taken in enumerate(self.rows):
+            free = ~taken & self.full
+            while free:
+                start = (free & -free).bit_length() - 1
+                shifted = free >> start
+                # shifted ends in length ones, adding 1 carries through them
+                length = (shifted ^ (shifted + 1)).bit_length() - 1
+                yield length, index + 1, start + 1
+                free &= ~(((1 << length) - 1) << start)
+
+    def take(self, row, seat, number):
+        """Mark number seats from row, seat on as taken; returns them"""
+        self.rows[row - 1] |= ((1 << number) - 1) << (seat - 1)
+        return [(row, seat + offset) for offset in range(number)]
+
+    def allocate(self, number):
+        """Take seats for a group of number; None if too few are free
+
+        Blocks start at the edge of their free run, so no single seats are
+        stranded next to the group.
+        """
+        if number > self.free:
+            return None
+
+        runs = sorted(self.runs())
+        fitting = [run for run in runs if run[0] >= number]
+        if fitting:
+            _, row, seat = fitting[0]
+            return self.take(row, seat, number)
+
+        # The largest runs cover the group in the fewest blocks, the last
+        # block goes to the tightest run that still fits the rest
+        runs.sort(key=lambda run: (-run[0], run[1], run[2]))
+        seats = []
+        for index, (length, row, seat) in enumerate(runs):
+            left = number - len(seats)
+            if length >= left:
+                _, row, seat = min(
+                    run for run in runs[index:] if run[0] >= left
+                )
+                return seats + self.take(row, seat, left)
+            seats += self.take(row, seat, length)
+
+
+def assign_seats(flight_id, number, using="default"):
+    """Pick (row, seat) pairs for a group of number on a flight
+
+    Must run in a transaction; the flight stays locked until it commits, so
+    the tickets must be created in the same transaction. Returns None if
+    the flight has fewer than number free seats.
+    """
+    flight = (
+        Flight.objects.using(using)
+        .select_for_update(of=("self",))
+        .select_related("airplane")
+        .get(pk=flight_id)
+    )
+    return SeatMap.of_flight(flight, using).allocate(number)
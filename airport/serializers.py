@@ -1,4 +1,4 @@
-from django.db import transaction
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -9,9 +9,19 @@ from airport.models import (
     Crew,
     Flight,
     Order,
+    OrderArchive,
     Route,
+    RouteDailyLoad,
     Ticket,
 )
+from airport.booking import (
+    RetryBooking,
+    SeatsTaken,
+    create_tickets,
+    run_booking,
+)
+from airport.seating import assign_seats
+from airport_service.db_router import primary_reads
 
 
 class AirplaneTypeSerializer(serializers.ModelSerializer):
@@ -79,6 +89,55 @@ class RouteDetailSerializer(RouteSerializer):
     destination = AirportSerializer(many=False, read_only=True)
 
 
+class AirportRowSerializer(serializers.ModelSerializer):
+    """An airport of a bulk upsert"""
+
+    class Meta:
+        model = Airport
+        fields = ("name", "closest_big_city")
+        # Existing airports are updated, not rejected
+        validators = []
+
+
+class RouteRowSerializer(serializers.ModelSerializer):
+    """A route of a bulk upsert, airports given by name and city"""
+
+    source_name = serializers.CharField(max_length=255)
+    source_city = serializers.CharField(max_length=63)
+    destination_name = serializers.CharField(max_length=255)
+    destination_city = serializers.CharField(max_length=63)
+
+    class Meta:
+        model = Route
+        fields = (
+            "source_name",
+            "source_city",
+            "destination_name",
+            "destination_city",
+            "distance",
+        )
+        # Checked by Route.full_clean() elsewhere, but bulk_create skips it
+        extra_kwargs = {"distance": {"min_value": 0}}
+        validators = []
+
+
+class AirplaneRowSerializer(serializers.ModelSerializer):
+    """An airplane of a bulk upsert, its type given by name"""
+
+    name = serializers.CharField(max_length=255)
+    airplane_type = serializers.CharField(max_length=127)
+
+    class Meta:
+        model = Airplane
+        fields = ("name", "airplane_type", "rows", "seats_in_row")
+
+
+class BulkUpsertResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    unchanged = serializers.IntegerField()
+
+
 class TicketSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         data = super().validate(attrs=attrs)
@@ -93,29 +152,121 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        # Taken seats are reported with a 409 by OrderSerializer.create,
+        # which also catches seats taken after validation
+        validators = []
+
+
+class AutoAssignSerializer(serializers.Serializer):
+    flight = serializers.PrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+    seats = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        capacity = attrs["flight"].airplane.capacity
+        if attrs["seats"] > capacity:
+            raise ValidationError(
+                {"seats": f"The airplane only has {capacity} seats."}
+            )
+        return attrs
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = TicketSerializer(
+        many=True, read_only=False, allow_empty=False, required=False
+    )
+    auto_assign = AutoAssignSerializer(
+        many=True,
+        write_only=True,
+        allow_empty=False,
+        required=False,
+        help_text="Seats to pick automatically, together where possible",
+    )
 
     class Meta:
         model = Order
-        fields = ("id", "tickets", "created_at")
+        fields = ("id", "tickets", "auto_assign", "created_at")
+
+    def validate(self, attrs):
+        if not attrs.get("tickets") and not attrs.get("auto_assign"):
+            raise ValidationError(
+                {"tickets": "Either tickets or auto_assign is required."}
+            )
+        seats = [
+            (ticket["flight"].id, ticket["row"], ticket["seat"])
+            for ticket in attrs.get("tickets", [])
+        ]
+        if len(set(seats)) < len(seats):
+            raise ValidationError({"tickets": "A seat is listed twice."})
+        return attrs
 
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
+        tickets_data = validated_data.pop("tickets", [])
+        auto_assign = validated_data.pop("auto_assign", [])
+
+        def book():
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            taken = create_tickets(order, tickets_data)
+            if taken:
+                raise SeatsTaken(taken)
+
+            # Lock flights in a fixed order so concurrent orders can't
+            # deadlock
+            for group in sorted(auto_assign, key=lambda g: g["flight"].id):
+                flight = group["flight"]
+                seats = assign_seats(flight.id, group["seats"])
+                if seats is None:
+                    raise ValidationError(
+                        {
+                            "auto_assign": f"Not enough free seats on "
+                            f"flight {flight.id}."
+                        }
+                    )
+                taken = create_tickets(
+                    order,
+                    [
+                        {"flight": flight, "row": row, "seat": seat}
+                        for row, seat in seats
+                    ],
+                )
+                if taken:
+                    # Taken by a booking that picked its seats itself
+                    raise RetryBooking(taken)
             return order
 
+        with primary_reads():
+            return run_booking(book)
+
+
+def archived_tickets(order, detail=False):
+    """Representations of the tickets of order on archived flights"""
+    try:
+        archive = order.archive
+    except OrderArchive.DoesNotExist:
+        return []
+    return archive.ticket_representations(detail)
+
+
+class ArchivedTicketsMixin:
+    """Append the archived tickets of the order to its tickets"""
+
+    detailed_archive = False
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if "tickets" in data:
+            data["tickets"] += archived_tickets(
+                instance, self.detailed_archive
+            )
+        return data
+
 
 class TicketListSerializer(TicketSerializer):
     flight = serializers.StringRelatedField(many=False, read_only=True)
 
 
-class OrderListSerializer(OrderSerializer):
+class OrderListSerializer(ArchivedTicketsMixin, OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
 
 
@@ -158,8 +309,9 @@ class TicketDetailSerializer(TicketSerializer):
     flight = FlightListSerializer()
 
 
-class OrderDetailSerializer(OrderSerializer):
+class OrderDetailSerializer(ArchivedTicketsMixin, OrderSerializer):
     tickets = TicketDetailSerializer(many=True, read_only=True)
+    detailed_archive = True
 
 
 class TicketSeatsSerializer(TicketSerializer):
@@ -210,3 +362,136 @@ class CrewDetailSerializer(CrewSerializer):
     class Meta:
         model = Crew
         fields = ("id", "first_name", "last_name", "flights")
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=("GET",), default="GET")
+    path = serializers.CharField(max_length=2000)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests "
+                f"are allowed."
+            )
+        return value
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    body = serializers.JSONField()
+
+
+class BatchResultSerializer(serializers.Serializer):
+    responses = BatchResponseSerializer(many=True)
+
+
+class LoadFactorQuerySerializer(serializers.Serializer):
+    route = serializers.IntegerField(required=False, min_value=1)
+    start = serializers.DateField(
+        required=False, help_text="First day (default: 30 days before to)"
+    )
+    end = serializers.DateField(
+        required=False, help_text="Last day (default: today)"
+    )
+    granularity = serializers.ChoiceField(
+        choices=("day", "week"), default="day"
+    )
+
+    def get_fields(self):
+        # "from" can't be an attribute name
+        fields = super().get_fields()
+        fields["from"] = fields.pop("start")
+        fields["to"] = fields.pop("end")
+        return fields
+
+    def validate(self, attrs):
+        if attrs.get("from") and attrs.get("to") and (
+            attrs["from"] > attrs["to"]
+        ):
+            raise ValidationError({"from": "Must not be after to."})
+        return attrs
+
+
+class LoadFactorSerializer(serializers.ModelSerializer):
+    period = serializers.DateField()
+    load_factor = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RouteDailyLoad
+        fields = ("period", "flights", "seats", "tickets_sold", "load_factor")
+
+    def get_load_factor(self, row) -> float | None:
+        if not row["seats"]:
+            return None
+        return round(row["tickets_sold"] / row["seats"], 4)
+
+
+# Representations of the rows in the change feed, by type
+CHANGE_SERIALIZERS = {
+    "airplane_type": AirplaneTypeSerializer,
+    "airport": AirportSerializer,
+    "airplane": AirplaneSerializer,
+    "route": RouteSerializer,
+    "flight": FlightSerializer,
+}
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(
+        min_value=0,
+        default=0,
+        help_text="Version the client has synced up to (default: 0, all)",
+    )
+    types = serializers.CharField(
+        required=False,
+        help_text=(
+            "Comma-separated types, of "
+            + ", ".join(CHANGE_SERIALIZERS)
+            + " (default: all)"
+        ),
+    )
+
+    def validate_types(self, value):
+        types = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(types) - CHANGE_SERIALIZERS.keys()
+        if not types or unknown:
+            raise ValidationError(
+                "Choose from " + ", ".join(CHANGE_SERIALIZERS) + "."
+            )
+        return types
+
+    def validate(self, attrs):
+        attrs.setdefault("types", list(CHANGE_SERIALIZERS))
+        return attrs
+
+
+class ChangeSerializer(serializers.Serializer):
+    object_type = serializers.ChoiceField(choices=tuple(CHANGE_SERIALIZERS))
+    object_id = serializers.IntegerField()
+    version = serializers.IntegerField()
+    deleted = serializers.BooleanField()
+    data = serializers.JSONField(
+        allow_null=True, help_text="The row as its endpoint shows it"
+    )
+
+    def get_fields(self):
+        # "type" and "id" would shadow builtins as attribute names
+        fields = super().get_fields()
+        return {
+            {"object_type": "type", "object_id": "id"}.get(name, name): field
+            for name, field in fields.items()
+        }
+
+
+class ChangesSerializer(serializers.Serializer):
+    changes = ChangeSerializer(many=True)
+    until = serializers.IntegerField(
+        help_text="Version of the last change, since of the next request"
+    )
+    has_more = serializers.BooleanField()
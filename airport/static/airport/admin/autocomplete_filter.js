@@ -0,0 +1,10 @@
+"use strict";
+{
+    const $ = django.jQuery;
+    // Apply an autocomplete list filter as soon as a choice is picked
+    $(function() {
+        $(".autocomplete-filter select").on("change", function() {
+            this.form.submit();
+        });
+    });
+}
@@ -0,0 +1,222 @@
+"""
+Fixture factories for the airport tests.
+
+``make_*`` create one saved object with sensible defaults; keyword arguments
+override them. ``bulk_*`` insert many rows with a single ``bulk_create`` and
+skip ``Model.save`` (and its ``full_clean``), so use them in
+``setUpTestData`` for large fixtures.
+"""
+from datetime import datetime, timedelta, timezone
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+DEPARTURE_TIME = datetime(2024, 10, 8, 10, tzinfo=timezone.utc)
+
+_sequence = count(1)
+
+
+def make_user(**params):
+    number = next(_sequence)
+    defaults = {
+        "email": f"user{number}@test.com",
+        "password": "test12345",
+    }
+    defaults.update(params)
+
+    return get_user_model().objects.create_user(**defaults)
+
+
+def make_airplane_type(**params):
+    defaults = {"name": f"Airplane type {next(_sequence)}"}
+    defaults.update(params)
+
+    return AirplaneType.objects.create(**defaults)
+
+
+def make_airplane(**params):
+    defaults = {
+        "name": f"Airplane {next(_sequence)}",
+        "rows": 10,
+        "seats_in_row": 6,
+    }
+    defaults.update(params)
+    if "airplane_type" not in defaults:
+        defaults["airplane_type"] = make_airplane_type()
+
+    return Airplane.objects.create(**defaults)
+
+
+def make_airport(**params):
+    number = next(_sequence)
+    defaults = {
+        "name": f"Airport {number}",
+        "closest_big_city": f"City {number}",
+    }
+    defaults.update(params)
+
+    return Airport.objects.create(**defaults)
+
+
+def make_route(**params):
+    defaults = {"distance": 900}
+    defaults.update(params)
+    if "source" not in defaults:
+        defaults["source"] = make_airport()
+    if "destination" not in defaults:
+        defaults["destination"] = make_airport()
+
+    return Route.objects.create(**defaults)
+
+
+def make_crew(**params):
+    defaults = {"first_name": "John", "last_name": f"Doe {next(_sequence)}"}
+    defaults.update(params)
+
+    return Crew.objects.create(**defaults)
+
+
+def make_flight(**params):
+    defaults = {
+        "departure_time": DEPARTURE_TIME,
+        "arrival_time": DEPARTURE_TIME + timedelta(hours=2),
+    }
+    defaults.update(params)
+    if "route" not in defaults:
+        defaults["route"] = make_route()
+    if "airplane" not in defaults:
+        defaults["airplane"] = make_airplane()
+
+    return Flight.objects.create(**defaults)
+
+
+def make_order(**params):
+    defaults = {}
+    defaults.update(params)
+    if "user" not in defaults:
+        defaults["user"] = make_user()
+
+    return Order.objects.create(**defaults)
+
+
+def make_ticket(**params):
+    defaults = {"row": 1, "seat": 1}
+    defaults.update(params)
+    if "flight" not in defaults:
+        defaults["flight"] = make_flight()
+    if "order" not in defaults:
+        defaults["order"] = make_order()
+
+    return Ticket.objects.create(**defaults)
+
+
+def bulk_users(number, password="test12345"):
+    """Create users sharing one password hash, hashed only once"""
+    user_model = get_user_model()
+    password_hash = make_password(password)
+
+    return user_model.objects.bulk_create(
+        user_model(
+            email=f"user{next(_sequence)}@test.com", password=password_hash
+        )
+        for _ in range(number)
+    )
+
+
+def bulk_airplane_types(number):
+    return AirplaneType.objects.bulk_create(
+        AirplaneType(name=f"Airplane type {next(_sequence)}")
+        for _ in range(number)
+    )
+
+
+def bulk_airplanes(number, airplane_types=None, rows=10, seats_in_row=6):
+    airplane_types = airplane_types or bulk_airplane_types(1)
+
+    return Airplane.objects.bulk_create(
+        Airplane(
+            name=f"Airplane {next(_sequence)}",
+            rows=rows,
+            seats_in_row=seats_in_row,
+            airplane_type=airplane_types[index % len(airplane_types)],
+        )
+        for index in range(number)
+    )
+
+
+def bulk_airports(number):
+    numbers = [next(_sequence) for _ in range(number)]
+
+    return Airport.objects.bulk_create(
+        Airport(name=f"Airport {number}", closest_big_city=f"City {number}")
+        for number in numbers
+    )
+
+
+def bulk_routes(number, airports=None):
+    airports = airports or bulk_airports(max(number + 1, 2))
+
+    return Route.objects.bulk_create(
+        Route(
+            source=airports[index % len(airports)],
+            destination=airports[(index + 1) % len(airports)],
+            distance=900 + index,
+        )
+        for index in range(number)
+    )
+
+
+def bulk_crews(number):
+    return Crew.objects.bulk_create(
+        Crew(first_name="John", last_name=f"Doe {next(_sequence)}")
+        for _ in range(number)
+    )
+
+
+def bulk_flights(number, routes=None, airplanes=None):
+    routes = routes or bulk_routes(1)
+    airplanes = airplanes or bulk_airplanes(1)
+
+    return Flight.objects.bulk_create(
+        Flight(
+            route=routes[index % len(routes)],
+            airplane=airplanes[index % len(airplanes)],
+            departure_time=DEPARTURE_TIME + timedelta(hours=index),
+            arrival_time=DEPARTURE_TIME + timedelta(hours=index + 2),
+        )
+        for index in range(number)
+    )
+
+
+def bulk_orders(number, user=None):
+    user = user or make_user()
+
+    return Order.objects.bulk_create(Order(user=user) for _ in range(number))
+
+
+def bulk_tickets(flight, orders, number=None):
+    """Fill the flight row by row, spreading tickets over the orders"""
+    seats_in_row = flight.airplane.seats_in_row
+    number = number or flight.airplane.capacity
+
+    return Ticket.objects.bulk_create(
+        Ticket(
+            flight=flight,
+            order=orders[index % len(orders)],
+            row=index // seats_in_row + 1,
+            seat=index % seats_in_row + 1,
+        )
+        for index in range(number)
+    )
@@ -0,0 +1,147 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from airport.models import Flight, Ticket
+from airport.tests.factories import (
+    bulk_crews,
+    bulk_flights,
+    bulk_orders,
+    bulk_tickets,
+    make_user,
+)
+from airport_service.counts import estimated_count
+
+CHANGELISTS = (
+    "admin:airport_flight_changelist",
+    "admin:airport_ticket_changelist",
+    "admin:airport_order_changelist",
+    "admin:airport_crew_changelist",
+)
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user(is_staff=True, is_superuser=True)
+        cls.flights = bulk_flights(3)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, number):
+        flights = bulk_flights(number)
+        crews = bulk_crews(number)
+        orders = bulk_orders(number, user=make_user())
+        for flight, crew in zip(flights, crews):
+            crew.flights.add(*self.flights, flight)
+            bulk_tickets(flight, orders, number=2)
+
+    def count_queries(self, url, params=None):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_rows(2)
+        before = {
+            name: self.count_queries(reverse(name)) for name in CHANGELISTS
+        }
+
+        self.add_rows(10)
+        after = {
+            name: self.count_queries(reverse(name)) for name in CHANGELISTS
+        }
+
+        self.assertEqual(after, before)
+
+    def test_crew_flights_are_truncated(self):
+        self.add_rows(1)
+
+        res = self.client.get(reverse("admin:airport_crew_changelist"))
+
+        self.assertContains(res, "and 1 more")
+
+    def test_ticket_filters_use_autocomplete(self):
+        self.add_rows(2)
+        flight = Flight.objects.order_by("-id").first()
+
+        res = self.client.get(
+            reverse("admin:airport_ticket_changelist"), {"flight": flight.id}
+        )
+
+        self.assertEqual(
+            {ticket.flight_id for ticket in res.context["cl"].result_list},
+            {flight.id},
+        )
+        self.assertContains(res, "admin-autocomplete")
+        self.assertContains(res, "autocomplete_filter.js")
+
+    def test_order_search_by_user_email(self):
+        user = make_user(email="searched@test.com")
+        bulk_orders(2, user=user)
+        bulk_orders(3)
+
+        res = self.client.get(
+            reverse("admin:airport_order_changelist"), {"q": "searched@"}
+        )
+
+        self.assertEqual(res.context["cl"].result_count, 2)
+
+    def test_forms_use_autocomplete_and_raw_id_widgets(self):
+        self.add_rows(1)
+        ticket = Ticket.objects.first()
+
+        for url in (
+            reverse("admin:airport_order_change", args=[ticket.order_id]),
+            reverse("admin:airport_ticket_change", args=[ticket.id]),
+            reverse("admin:airport_flight_change", args=[ticket.flight_id]),
+        ):
+            res = self.client.get(url)
+            self.assertContains(res, "admin-autocomplete")
+
+        res = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "airport",
+                "model_name": "ticket",
+                "field_name": "flight",
+                "term": "City",
+            },
+        )
+        self.assertEqual(res.status_code, 200)
+
+
+class EstimatedCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        flight = bulk_flights(1)[0]
+        bulk_tickets(flight, bulk_orders(2), number=10)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_exact_below_threshold(self):
+        self.assertEqual(estimated_count(Ticket.objects.all(), 10), (10, True))
+
+    def test_estimate_above_threshold(self):
+        with patch(
+            "airport_service.counts.planner_estimate", return_value=9
+        ), patch("airport_service.counts.refresh_count_in_background"):
+            self.assertEqual(
+                estimated_count(Ticket.objects.all(), 5), (9, False)
+            )
+
+    def test_exact_without_planner(self):
+        # SQLite has no planner estimate, so counts stay exact
+        self.assertEqual(estimated_count(Ticket.objects.all(), 5), (10, True))
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.archive import archive_flights
+from airport.management.commands.archive_flights import months_ago
+from airport.models import (
+    ArchivedFlight,
+    Flight,
+    OrderArchive,
+    RouteDailyLoad,
+    Ticket,
+)
+from airport.rollups import reconcile
+from airport.tests.factories import (
+    DEPARTURE_TIME,
+    bulk_tickets,
+    make_airplane,
+    make_crew,
+    make_flight,
+    make_order,
+    make_route,
+    make_user,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+def order_detail_url(order_id):
+    return reverse("airport:order-detail", args=[order_id])
+
+
+def by_id(tickets):
+    return sorted(tickets, key=lambda ticket: ticket["id"])
+
+
+class ArchiveFlightsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.route = make_route()
+        airplane = make_airplane(rows=10, seats_in_row=6)
+        cls.old_flights = [
+            make_flight(
+                route=cls.route,
+                airplane=airplane,
+                departure_time=DEPARTURE_TIME + timedelta(days=days),
+                arrival_time=DEPARTURE_TIME + timedelta(days=days, hours=2),
+            )
+            for days in (0, 1)
+        ]
+        cls.old_flights[0].crews.add(make_crew())
+        departure_time = timezone.now() + timedelta(days=3)
+        cls.upcoming = make_flight(
+            route=cls.route,
+            airplane=airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+        )
+        cls.orders = [make_order(user=cls.user) for _ in range(2)]
+        for flight in (*cls.old_flights, cls.upcoming):
+            bulk_tickets(flight, cls.orders, number=4)
+        reconcile()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def responses(self):
+        orders = self.client.get(ORDER_URL).data["results"]
+        details = [
+            self.client.get(order_detail_url(order.id)).data
+            for order in self.orders
+        ]
+        return [
+            (response["id"], by_id(response["tickets"]))
+            for response in (*orders, *details)
+        ]
+
+    def test_command_moves_old_flights_and_tickets(self):
+        before = self.responses()
+        rollups = list(RouteDailyLoad.objects.values_list())
+
+        out = StringIO()
+        call_command("archive_flights", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Archived 2 flights and 8 tickets", out.getvalue())
+        self.assertEqual(list(Flight.objects.all()), [self.upcoming])
+        self.assertEqual(
+            set(Ticket.objects.values_list("flight_id", flat=True)),
+            {self.upcoming.id},
+        )
+        archived = ArchivedFlight.objects.get(pk=self.old_flights[0].id)
+        self.assertEqual((archived.capacity, archived.tickets_sold), (60, 4))
+        self.assertEqual(len(archived.crews), 1)
+        self.assertEqual(OrderArchive.objects.count(), 2)
+
+        self.assertEqual(self.responses(), before)
+        self.assertEqual(reconcile(), 0)
+        self.assertEqual(list(RouteDailyLoad.objects.values_list()), rollups)
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command("archive_flights", "--dry-run", stdout=out)
+
+        self.assertIn("Would archive 2 flights and 8 tickets", out.getvalue())
+        self.assertEqual(Flight.objects.count(), 3)
+        self.assertFalse(OrderArchive.objects.exists())
+
+    def test_sparse_order_fields_keep_archived_tickets(self):
+        archive_flights([self.old_flights[0].id])
+
+        res = self.client.get(
+            order_detail_url(self.orders[0].id), {"fields": "id,tickets"}
+        )
+
+        self.assertEqual(len(res.data["tickets"]), 6)
+        self.assertEqual(
+            res.data["tickets"][-1]["flight"]["id"], self.old_flights[0].id
+        )
+
+    def test_months_ago_clamps_to_month_end(self):
+        moment = DEPARTURE_TIME.replace(month=8, day=31)
+
+        self.assertEqual(months_ago(moment, 6), moment.replace(month=2, day=29))
+        self.assertEqual(
+            months_ago(moment, 9), moment.replace(year=2023, month=11, day=30)
+        )
@@ -0,0 +1,92 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
+
+from airport.tests.factories import (
+    make_crew,
+    make_flight,
+    make_order,
+    make_ticket,
+    make_user,
+)
+from airport.views import AirportViewSet, FlightViewSet, RouteViewSet
+
+FLIGHT_LIST = FlightViewSet.as_async_view({"get": "list", "post": "create"})
+FLIGHT_DETAIL = FlightViewSet.as_async_view({"get": "retrieve"})
+ROUTE_LIST = RouteViewSet.as_async_view({"get": "list"})
+AIRPORT_LIST = AirportViewSet.as_async_view(
+    {"get": "list", "post": "create"}
+)
+
+
+class AsyncReadViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.flight = make_flight()
+        cls.flight.crews.add(make_crew())
+        make_ticket(flight=cls.flight, order=make_order(user=cls.user))
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, view, url, **kwargs):
+        request = self.factory.get(url)
+        force_authenticate(request, self.user)
+        return view(request, **kwargs)
+
+    async def test_flight_list_matches_sync_view(self):
+        url = reverse("airport:flight-list")
+
+        res = await self.get(FLIGHT_LIST, url)
+        expected = await self.async_get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+
+    async def test_flight_detail_matches_sync_view(self):
+        url = reverse("airport:flight-detail", args=[self.flight.id])
+
+        res = await self.get(FLIGHT_DETAIL, url, pk=self.flight.id)
+        expected = await self.async_get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+
+    async def test_flight_detail_not_found(self):
+        url = reverse("airport:flight-detail", args=[0])
+
+        res = await self.get(FLIGHT_DETAIL, url, pk=0)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_route_list_auth_required(self):
+        request = self.factory.get(reverse("airport:route-list"))
+
+        res = await ROUTE_LIST(request)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_write_methods_use_sync_view(self):
+        request = self.factory.post(
+            reverse("airport:airport-list"),
+            {"name": "Kyiv Airport", "closest_big_city": "Kyiv"},
+        )
+        force_authenticate(request, self.user)
+
+        res = await AIRPORT_LIST(request)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def async_get(self, url):
+        return await sync_to_async(self.client.get)(url)
@@ -0,0 +1,163 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from airport.models import Flight
+from airport.tests.factories import (
+    bulk_flights,
+    bulk_orders,
+    bulk_tickets,
+    make_crew,
+    make_user,
+)
+
+BATCH_URL = reverse("airport:batch")
+FLIGHT_URL = reverse("airport:flight-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+def flight_detail_url(flight_id):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+def order_detail_url(order_id):
+    return reverse("airport:order-detail", args=[order_id])
+
+
+class BatchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.flights = bulk_flights(4)
+        crew = make_crew()
+        for flight in cls.flights:
+            flight.crews.add(crew)
+        cls.orders = bulk_orders(2, user=cls.user)
+        bulk_tickets(cls.flights[0], cls.orders, number=4)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, *paths):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            res = self.client.post(
+                BATCH_URL,
+                {"requests": [{"path": path} for path in paths]},
+                format="json",
+            )
+        return res, queries
+
+    def test_ids_filter(self):
+        ids = [self.flights[0].id, self.flights[2].id]
+
+        res = self.client.get(FLIGHT_URL, {"ids": ",".join(map(str, ids))})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([flight["id"] for flight in res.data], ids)
+
+    @override_settings(BATCH_MAX_IDS=2)
+    def test_ids_filter_is_bounded_and_validated(self):
+        res = self.client.get(FLIGHT_URL, {"ids": "1,2,3"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ids", res.data)
+
+        res = self.client.get(ROUTE_URL, {"ids": "1,x"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_matches_separate_requests(self):
+        paths = [
+            flight_detail_url(self.flights[1].id),
+            f"{ROUTE_URL}?ids={self.flights[0].route_id}",
+            flight_detail_url(self.flights[0].id),
+            order_detail_url(self.orders[0].id),
+        ]
+
+        res, _ = self.batch(*paths)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for path, response in zip(paths, res.data["responses"]):
+            expected = self.client.get(path)
+            self.assertEqual(response["path"], path)
+            self.assertEqual(response["status"], status.HTTP_200_OK)
+            self.assertEqual(response["body"], expected.data)
+
+    def test_retrieves_share_queries(self):
+        _, one = self.batch(flight_detail_url(self.flights[0].id))
+        _, many = self.batch(
+            *[flight_detail_url(flight.id) for flight in self.flights]
+        )
+
+        self.assertEqual(len(many), len(one))
+
+    def test_errors_are_per_sub_request(self):
+        other_order = bulk_orders(1, user=make_user())[0]
+        missing = Flight.objects.order_by("-id").first().id + 1
+
+        res, _ = self.batch(
+            flight_detail_url(self.flights[0].id),
+            flight_detail_url(missing),
+            order_detail_url(other_order.id),
+            "/api/airport/unknown/",
+            "/admin/",
+            BATCH_URL,
+        )
+
+        self.assertEqual(
+            [response["status"] for response in res.data["responses"]],
+            [200, 404, 404, 404, 404, 404],
+        )
+
+    def test_authentication_is_shared(self):
+        self.client.force_authenticate(None)
+
+        res, _ = self.batch(
+            flight_detail_url(self.flights[0].id),
+            order_detail_url(self.orders[0].id),
+        )
+
+        self.assertEqual(
+            [response["status"] for response in res.data["responses"]],
+            [status.HTTP_200_OK, status.HTTP_401_UNAUTHORIZED],
+        )
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_batch_is_bounded_and_read_only(self):
+        res, _ = self.batch(FLIGHT_URL, FLIGHT_URL, FLIGHT_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            BATCH_URL,
+            {"requests": [{"method": "POST", "path": FLIGHT_URL}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch.object(UserRateThrottle, "THROTTLE_RATES", {"user": "2/minute"})
+    def test_batch_is_throttled_once(self):
+        res, _ = self.batch(FLIGHT_URL, ROUTE_URL, FLIGHT_URL)
+
+        self.assertEqual(
+            [response["status"] for response in res.data["responses"]],
+            [status.HTTP_200_OK] * 3,
+        )
+        self.assertEqual(
+            self.client.get(FLIGHT_URL).status_code, status.HTTP_200_OK
+        )
+        self.assertEqual(
+            self.client.get(FLIGHT_URL).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
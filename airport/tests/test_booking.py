@@ -0,0 +1,181 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.booking import (
+    BookingBusy,
+    RetryBooking,
+    SeatsTaken,
+    run_booking,
+)
+from airport.models import Order, Ticket
+from airport.tests.factories import (
+    make_airplane,
+    make_flight,
+    make_ticket,
+    make_user,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class SeatConflictTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.flight = make_flight(airplane=make_airplane(rows=2, seats_in_row=2))
+        make_ticket(flight=cls.flight, row=1, seat=1)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def order(self, *seats):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def assert_conflict(self, res, *seats):
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["taken_seats"],
+            [
+                {"flight": self.flight.id, "row": row, "seat": seat}
+                for row, seat in seats
+            ],
+        )
+        self.assertFalse(Order.objects.filter(user=self.user).exists())
+
+    def test_taken_seat_is_a_conflict(self):
+        self.assert_conflict(self.order((2, 1), (1, 1)), (1, 1))
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_seat_taken_after_validation_is_a_conflict(self):
+        # As if the other booking committed between the check and the insert
+        with patch.object(Ticket, "validate_unique"):
+            res = self.order((1, 1), (1, 2))
+
+        self.assert_conflict(res, (1, 1))
+
+    def test_seat_listed_twice(self):
+        res = self.order((2, 1), (2, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(BOOKING_RETRIES=2, BOOKING_RETRY_DELAY=0)
+class RunBookingTest(TransactionTestCase):
+    def test_retries_lock_errors(self):
+        book = Mock(side_effect=[OperationalError("database is locked"), 1])
+
+        self.assertEqual(run_booking(book), 1)
+        self.assertEqual(book.call_count, 2)
+
+    def test_gives_up_after_retries(self):
+        book = Mock(side_effect=OperationalError("database is locked"))
+        with self.assertRaises(BookingBusy):
+            run_booking(book)
+        self.assertEqual(book.call_count, 3)
+
+        book = Mock(side_effect=RetryBooking([(1, 1, 1)]))
+        with self.assertRaises(SeatsTaken):
+            run_booking(book)
+
+    def test_other_errors_are_not_retried(self):
+        book = Mock(side_effect=OperationalError("no such table"))
+
+        with self.assertRaises(OperationalError):
+            run_booking(book)
+        self.assertEqual(book.call_count, 1)
+
+
+# Needs concurrent connections to the test database, so PostgreSQL
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+@override_settings(BOOKING_RETRY_DELAY=0.01)
+class ConcurrentBookingTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.flight = make_flight(
+            airplane=make_airplane(rows=4, seats_in_row=4)
+        )
+        self.users = [make_user() for _ in range(8)]
+        self.seats = [(row, seat) for row in (1, 2) for seat in range(1, 5)]
+
+    def book(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        responses = []
+        try:
+            # Everyone competes for the 8 seats of the first two rows
+            for _ in range(3):
+                tickets = [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row, seat in random.sample(self.seats, 2)
+                ]
+                responses.append(
+                    client.post(
+                        ORDER_URL, {"tickets": tickets}, format="json"
+                    )
+                )
+            responses.append(
+                client.post(
+                    ORDER_URL,
+                    {"auto_assign": [{"flight": self.flight.id, "seats": 2}]},
+                    format="json",
+                )
+            )
+        finally:
+            connections.close_all()
+        return responses
+
+    def test_contention_has_no_errors_or_lost_tickets(self):
+        with ThreadPoolExecutor(len(self.users)) as executor:
+            responses = [
+                res
+                for user_responses in executor.map(self.book, self.users)
+                for res in user_responses
+            ]
+
+        statuses = {res.status_code for res in responses}
+        self.assertLessEqual(
+            statuses,
+            {
+                status.HTTP_201_CREATED,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_409_CONFLICT,
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+            },
+        )
+        booked = sorted(
+            (ticket["row"], ticket["seat"])
+            for res in responses
+            if res.status_code == status.HTTP_201_CREATED
+            for ticket in res.data["tickets"]
+        )
+        self.assertTrue(booked)
+        self.assertEqual(
+            sorted(self.flight.tickets.values_list("row", "seat")), booked
+        )
+        for res in responses:
+            if res.status_code == status.HTTP_409_CONFLICT:
+                self.assertTrue(res.data["taken_seats"])
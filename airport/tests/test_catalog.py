@@ -0,0 +1,143 @@
+import gzip
+import json
+import tempfile
+from itertools import accumulate
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.catalog import catalog_cache
+from airport.models import ChangeCounter
+from airport.tests.factories import (
+    make_airplane,
+    make_airport,
+    make_route,
+    make_user,
+)
+from airport_service.compression import brotli
+
+BATCH_URL = reverse("airport:batch")
+CATALOG_URL = reverse("airport:catalog")
+
+
+class CatalogViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(CATALOG_DIR=directory.name))
+        self.client = APIClient()
+        self.client.force_authenticate(make_user())
+
+    def get_catalog(self, **headers):
+        res = self.client.get(CATALOG_URL, **headers)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_auth_required(self):
+        res = APIClient().get(CATALOG_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_columns(self):
+        london = make_airport(name="Heathrow", closest_big_city="London")
+        paris = make_airport(name="Orly", closest_big_city="Paris")
+        make_airport(name="Gatwick", closest_big_city="London")
+        route = make_route(source=paris, destination=london, distance=340)
+        airplane = make_airplane(name="Boeing 1", rows=10, seats_in_row=6)
+
+        catalog = json.loads(self.get_catalog().content)
+
+        self.assertEqual(catalog["version"], ChangeCounter.objects.get().value)
+        strings = catalog["strings"]
+        airports = catalog["airports"]
+        self.assertEqual(
+            list(accumulate(airports["id"]))[:2], [london.id, paris.id]
+        )
+        self.assertEqual(
+            [strings[index] for index in airports["closest_big_city"]],
+            ["London", "Paris", "London"],
+        )
+        self.assertEqual(strings, ["London", "Paris"])
+        self.assertEqual(airports["name"], ["Heathrow", "Orly", "Gatwick"])
+
+        routes = catalog["routes"]
+        self.assertEqual(list(accumulate(routes["id"])), [route.id])
+        self.assertEqual(
+            (routes["source"], routes["destination"], routes["distance"]),
+            ([1], [0], [340]),
+        )
+
+        airplanes = catalog["airplanes"]
+        type_index = airplanes["airplane_type"][0]
+        self.assertEqual(
+            catalog["airplane_types"]["name"][type_index],
+            airplane.airplane_type.name,
+        )
+        self.assertEqual(
+            (airplanes["rows"], airplanes["seats_in_row"]), ([10], [6])
+        )
+
+    def test_rebuilt_when_catalog_changes(self):
+        airport = make_airport(name="Heathrow")
+        first = self.get_catalog()
+
+        self.assertEqual(
+            self.client.get(
+                CATALOG_URL, HTTP_IF_NONE_MATCH=first["ETag"]
+            ).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        airport.delete()
+        second = self.get_catalog(HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(json.loads(second.content)["airports"]["id"], [])
+
+    def test_compressed(self):
+        make_airport()
+        plain = self.get_catalog()
+
+        res = self.get_catalog(
+            HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=plain["ETag"]
+        )
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertNotEqual(res["ETag"], plain["ETag"])
+        if brotli:
+            res = self.get_catalog(HTTP_ACCEPT_ENCODING="gzip, br")
+            self.assertEqual(res["Content-Encoding"], "br")
+            self.assertEqual(brotli.decompress(res.content), plain.content)
+
+    def test_batched(self):
+        make_airport(name="Heathrow")
+        etag = self.get_catalog()["ETag"]
+
+        res = self.client.post(
+            BATCH_URL,
+            {"requests": [{"path": CATALOG_URL}]},
+            format="json",
+            HTTP_ACCEPT_ENCODING="br, gzip",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        [response] = res.data["responses"]
+        self.assertEqual(response["status"], status.HTTP_200_OK)
+        self.assertEqual(response["body"]["airports"]["name"], ["Heathrow"])
+
+    def test_served_when_files_are_dropped(self):
+        make_airport(name="Heathrow")
+
+        # As if a worker with a newer version dropped them right away
+        with patch("airport.catalog.write_atomic"):
+            catalog = json.loads(self.get_catalog().content)
+
+        self.assertEqual(catalog["airports"]["name"], ["Heathrow"])
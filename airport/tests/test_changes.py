@@ -0,0 +1,154 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.archive import archive_flights
+from airport.changes import TYPES, changes
+from airport.models import Airport, ChangeCounter, Tombstone
+from airport.tests.factories import (
+    make_airport,
+    make_flight,
+    make_route,
+    make_user,
+)
+
+CHANGES_URL = reverse("airport:changes")
+
+
+def latest_version():
+    return ChangeCounter.objects.get(pk=1).value
+
+
+class ChangeVersionTest(TestCase):
+    def test_saves_take_increasing_versions(self):
+        airport = make_airport()
+        first = airport.version
+
+        route = make_route(source=airport)
+        airport.name = "Renamed"
+        airport.save(update_fields=["name"])
+        airport.refresh_from_db()
+
+        self.assertGreater(route.version, first)
+        self.assertGreater(airport.version, route.version)
+        self.assertEqual(airport.version, latest_version())
+
+    def test_deletes_leave_tombstones(self):
+        flight = make_flight()
+        ids = (flight.id, flight.route_id)
+
+        flight.route.delete()
+
+        self.assertEqual(
+            sorted(
+                Tombstone.objects.values_list("object_type", "object_id")
+            ),
+            [("flight", ids[0]), ("route", ids[1])],
+        )
+
+    def test_archived_flights_leave_tombstones(self):
+        flight = make_flight()
+
+        archive_flights([flight.id])
+
+        tombstone = Tombstone.objects.get()
+        self.assertEqual(
+            (tombstone.object_type, tombstone.object_id), ("flight", flight.id)
+        )
+        self.assertEqual(tombstone.version, latest_version())
+
+    def test_fixture_rows_take_versions(self):
+        call_command(
+            "loaddata",
+            settings.BASE_DIR / "airport_db_data.json",
+            stdout=StringIO(),
+        )
+
+        page, more = changes(0, list(TYPES), 1000)
+        self.assertFalse(more)
+        self.assertEqual(
+            len(page),
+            sum(model.objects.count() for model in TYPES.values()),
+        )
+        self.assertEqual(page[-1][0], latest_version())
+
+
+class ChangesViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user())
+
+    def get_changes(self, **params):
+        res = self.client.get(CHANGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_auth_required(self):
+        res = APIClient().get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changes_after_since(self):
+        airport = make_airport()
+        airport_id = airport.id
+        flight = make_flight()
+        since = latest_version()
+        flight.save()
+        airport.delete()
+
+        data = self.get_changes(since=since, types="flight,airport")
+
+        self.assertFalse(data["has_more"])
+        self.assertEqual(
+            [(change["type"], change["id"]) for change in data["changes"]],
+            [("flight", flight.id), ("airport", airport_id)],
+        )
+        self.assertEqual(data["changes"][0]["data"]["route"], flight.route_id)
+        self.assertFalse(data["changes"][0]["deleted"])
+        self.assertEqual(
+            (data["changes"][1]["deleted"], data["changes"][1]["data"]),
+            (True, None),
+        )
+        self.assertEqual(data["until"], latest_version())
+
+        data = self.get_changes(since=data["until"])
+        self.assertEqual(
+            (data["changes"], data["until"], data["has_more"]),
+            ([], latest_version(), False),
+        )
+
+    @override_settings(CHANGES_PAGE_SIZE=2)
+    def test_pages(self):
+        airport_ids = [make_airport().id for _ in range(3)]
+        Airport.objects.get(pk=airport_ids[0]).delete()
+        since, seen = 0, []
+
+        while True:
+            data = self.get_changes(since=since, types="airport")
+            seen += [
+                (change["id"], change["deleted"])
+                for change in data["changes"]
+            ]
+            since = data["until"]
+            if not data["has_more"]:
+                break
+
+        self.assertEqual(
+            seen,
+            [(airport_id, False) for airport_id in airport_ids[1:]]
+            + [(airport_ids[0], True)],
+        )
+
+    def test_validation(self):
+        res = self.client.get(CHANGES_URL, {"types": "flight,ticket"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(CHANGES_URL, {"since": -1})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
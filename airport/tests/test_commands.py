@@ -0,0 +1,158 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from airport.models import Flight, Ticket
+
+ENSURE_CONNECTION = (
+    "django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection"
+)
+
+
+@patch("airport.management.commands.wait_for_db.time.sleep")
+class WaitForDbCommandTest(SimpleTestCase):
+    def test_wait_for_db_ready(self, patched_sleep):
+        with patch(ENSURE_CONNECTION) as patched_ensure:
+            call_command("wait_for_db", stdout=StringIO())
+
+        self.assertEqual(patched_ensure.call_count, 1)
+        patched_sleep.assert_not_called()
+
+    def test_wait_for_db_backs_off(self, patched_sleep):
+        with patch(ENSURE_CONNECTION) as patched_ensure:
+            patched_ensure.side_effect = [OperationalError] * 5 + [None]
+            call_command("wait_for_db", max_delay=1, stdout=StringIO())
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1])
+
+    def test_wait_for_db_gives_up_after_timeout(self, patched_sleep):
+        with patch(ENSURE_CONNECTION, side_effect=OperationalError):
+            with self.assertRaises(CommandError):
+                call_command("wait_for_db", timeout=0, stdout=StringIO())
+
+
+class GenerateDatasetCommandTest(TestCase):
+    def generate(self):
+        call_command(
+            "generate_dataset",
+            airports=10,
+            routes=20,
+            flights=50,
+            tickets=1000,
+            chunk_size=20,
+            stdout=StringIO(),
+        )
+        return list(
+            Ticket.objects.order_by("flight", "row", "seat").values_list(
+                "flight__departure_time", "row", "seat"
+            )
+        )
+
+    def test_generate_dataset(self):
+        self.generate()
+
+        self.assertEqual(Flight.objects.count(), 50)
+        self.assertGreater(Ticket.objects.count(), 0)
+        for ticket in Ticket.objects.select_related("flight__airplane"):
+            airplane = ticket.flight.airplane
+            self.assertLessEqual(ticket.row, airplane.rows)
+            self.assertLessEqual(ticket.seat, airplane.seats_in_row)
+
+    def test_generate_dataset_is_deterministic(self):
+        first = self.generate()
+        Flight.objects.all().delete()
+
+        self.assertEqual(self.generate(), first)
+
+
+class BenchmarkEndpointsCommandTest(TestCase):
+    def benchmark(self, baseline, **options):
+        call_command(
+            "benchmark_endpoints",
+            existing=True,
+            iterations=1,
+            only=["flight-detail", "order-create-1"],
+            baseline=str(baseline),
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_fails_on_query_regression(self):
+        call_command(
+            "generate_dataset",
+            airports=10,
+            routes=20,
+            flights=20,
+            tickets=300,
+            stdout=StringIO(),
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = Path(directory) / "baseline.json"
+            self.benchmark(baseline, save_baseline=True)
+            results = json.loads(baseline.read_text())
+            self.assertEqual(
+                set(results), {"flight-detail", "order-create-1"}
+            )
+
+            self.benchmark(baseline, threshold=1000)
+
+            results["flight-detail"]["queries"] -= 1
+            baseline.write_text(json.dumps(results))
+            with self.assertRaises(CommandError):
+                self.benchmark(baseline, threshold=1000)
+
+            with self.assertRaises(CommandError):
+                self.benchmark(Path(directory) / "missing.json")
+
+    def test_latency_is_opt_in(self):
+        call_command(
+            "generate_dataset",
+            airports=10,
+            routes=20,
+            flights=20,
+            tickets=300,
+            stdout=StringIO(),
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = Path(directory) / "baseline.json"
+            latency = Path(directory) / "latency.json"
+            self.benchmark(
+                baseline,
+                save_baseline=True,
+                latency=True,
+                latency_baseline=str(latency),
+            )
+            self.assertEqual(
+                set(json.loads(baseline.read_text())["flight-detail"]),
+                {"queries"},
+            )
+
+            timings = json.loads(latency.read_text())
+            for result in timings.values():
+                result["p50_ms"] = result["p95_ms"] = 0
+            latency.write_text(json.dumps(timings))
+            self.benchmark(baseline, latency_baseline=str(latency))
+            with self.assertRaises(CommandError):
+                self.benchmark(
+                    baseline, latency=True, latency_baseline=str(latency)
+                )
+
+
+class ReadinessTest(TestCase):
+    def test_ready(self):
+        res = self.client.get(reverse("readiness"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {"status": "ready"})
@@ -0,0 +1,118 @@
+import gzip
+import zlib
+from unittest.mock import patch
+
+import brotli
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.tests.factories import bulk_airports, bulk_flights, make_user
+from airport.views import FlightViewSet
+from airport_service.compression import (
+    CompressedCache,
+    StreamCompressor,
+    accepted_encoding,
+)
+
+AIRPORT_URL = reverse("airport:airport-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class AcceptedEncodingTest(SimpleTestCase):
+    def test_preference_and_quality(self):
+        self.assertEqual(accepted_encoding("gzip, deflate, br"), "br")
+        self.assertEqual(accepted_encoding("gzip, br;q=0"), "gzip")
+        self.assertEqual(accepted_encoding("*"), "br")
+        self.assertEqual(accepted_encoding("*;q=0, gzip"), "gzip")
+        self.assertIsNone(accepted_encoding("identity"))
+        self.assertIsNone(accepted_encoding(""))
+
+    def test_stream_compressor_output_decompresses(self):
+        chunks = [b'[{"id":1}', b',{"id":2}', b"]"]
+        for encoding, decompress in (
+            ("gzip", gzip.decompress),
+            ("br", brotli.decompress),
+        ):
+            compressor = StreamCompressor(encoding, 5)
+            data = b"".join(compressor.compress(chunk) for chunk in chunks)
+            data += compressor.finish()
+
+            self.assertEqual(decompress(data), b"".join(chunks))
+
+    @override_settings(COMPRESSION_CACHE_BYTES=1024)
+    def test_compressed_bodies_are_cached_and_evicted(self):
+        compressed_cache = CompressedCache()
+        body = b"flight " * 100
+
+        first = compressed_cache.get_or_compress(body, "gzip", 6)
+        self.assertIs(compressed_cache.get_or_compress(body, "gzip", 6), first)
+
+        for number in range(100):
+            compressed_cache.get_or_compress(
+                f"airport {number} ".encode() * 20, "gzip", 6
+            )
+        self.assertIsNot(
+            compressed_cache.get_or_compress(body, "gzip", 6), first
+        )
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        bulk_airports(10)
+        bulk_flights(5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_negotiates_encoding(self):
+        plain = self.client.get(AIRPORT_URL)
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(plain["Vary"], "Accept, Accept-Encoding")
+
+        res = self.client.get(AIRPORT_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(res["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(res.content), plain.content)
+        self.assertEqual(res["Content-Length"], str(len(res.content)))
+
+        res = self.client.get(AIRPORT_URL, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+    @override_settings(COMPRESSION_MIN_SIZE=100_000)
+    def test_small_responses_are_not_compressed(self):
+        res = self.client.get(AIRPORT_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", res)
+
+    @override_settings(COMPRESSION_LEVELS={"text/": {"gzip": 6}})
+    def test_levels_are_per_content_type(self):
+        res = self.client.get(AIRPORT_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertNotIn("Content-Encoding", res)
+
+        res = self.client.get(
+            AIRPORT_URL,
+            {"format": "api"},
+            HTTP_ACCEPT_ENCODING="gzip, br",
+        )
+        self.assertEqual(res["Content-Encoding"], "gzip")
+
+    def test_streaming_responses_are_compressed_per_chunk(self):
+        plain = self.client.get(FLIGHT_URL)
+
+        with patch.object(FlightViewSet, "stream_batch_size", 2):
+            res = self.client.get(FLIGHT_URL, HTTP_ACCEPT_ENCODING="gzip")
+            chunks = list(res.streaming_content)
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertGreater(len(chunks), 2)
+        # Every chunk is flushed, so a client can decode as data arrives
+        decompressor = zlib.decompressobj(wbits=31)
+        self.assertTrue(decompressor.decompress(chunks[0] + chunks[1]))
+        self.assertEqual(gzip.decompress(b"".join(chunks)), plain.content)
@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight
+from airport.tests.factories import make_flight, make_user
+from airport_service.db_router import (
+    PrimaryReplicaRouter,
+    primary_reads,
+    set_replica_reads,
+)
+
+CHANGES_URL = reverse("airport:changes")
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+@override_settings(REPLICA_DATABASES=["replica_1"])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def tearDown(self):
+        set_replica_reads(False)
+
+    def test_reads_from_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Flight), "default")
+
+    def test_reads_from_replica_when_enabled(self):
+        set_replica_reads(True)
+
+        self.assertEqual(self.router.db_for_read(Flight), "replica_1")
+        self.assertEqual(self.router.db_for_write(Flight), "default")
+
+    def test_primary_reads_block(self):
+        set_replica_reads(True)
+
+        with primary_reads():
+            self.assertEqual(self.router.db_for_read(Flight), "default")
+
+        self.assertEqual(self.router.db_for_read(Flight), "replica_1")
+
+    def test_migrations_only_run_on_primary(self):
+        self.assertTrue(self.router.allow_migrate("default", "airport"))
+        self.assertFalse(self.router.allow_migrate("replica_1", "airport"))
+
+
+# The only "replica" is the primary itself, so queries still work and the
+# replica choice shows whether replica reads were enabled
+@override_settings(REPLICA_DATABASES=["default"])
+@patch("airport_service.db_router.random.choice", return_value="default")
+class ReplicaReadViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.flight = make_flight()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def book(self):
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+
+    def test_safe_requests_read_from_replica(self, patched_choice):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        patched_choice.assert_called()
+
+    def test_change_feed_reads_from_one_replica(self, patched_choice):
+        res = self.client.get(CHANGES_URL, {"since": 10 ** 9})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Every table from the same replica
+        patched_choice.assert_called_once()
+
+    def test_booking_reads_from_primary(self, patched_choice):
+        res = self.book()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        patched_choice.assert_not_called()
+
+    def test_reads_stick_to_primary_after_booking(self, patched_choice):
+        self.book()
+        self.client.get(ORDER_URL)
+
+        patched_choice.assert_not_called()
+
+    def test_pin_holds_without_cookies(self, patched_choice):
+        self.book()
+        # Nothing kept on the worker that took the booking, and a JWT
+        # client that sends no cookies back
+        cache.clear()
+        self.client.cookies.clear()
+        self.client.force_authenticate(
+            get_user_model().objects.get(pk=self.user.pk)
+        )
+
+        self.client.get(ORDER_URL)
+        patched_choice.assert_not_called()
+
+        other_client = APIClient()
+        other_client.force_authenticate(make_user())
+        other_client.get(ORDER_URL)
+        patched_choice.assert_called()
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self, patched_choice):
+        self.book()
+        self.client.force_authenticate(
+            get_user_model().objects.get(pk=self.user.pk)
+        )
+
+        self.client.get(ORDER_URL)
+        patched_choice.assert_called()
@@ -0,0 +1,108 @@
+import os
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airport
+from airport.tests.factories import bulk_flights
+from airport.views import FlightViewSet
+from airport_service.metrics import MetricsMiddleware, registry
+
+AIRPORT_URL = reverse("airport:airport-list")
+FLIGHT_URL = reverse("airport:flight-list")
+METRICS_URL = reverse("metrics")
+WORKER = f'worker="{os.getpid()}"'
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "admin12345",
+            is_staff=True,
+        )
+        Airport.objects.create(
+            name="Washington Airport", closest_big_city="Washington"
+        )
+
+    def test_metrics_admin_only(self):
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test12345")
+        )
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_requests_are_recorded_per_action(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(AIRPORT_URL)
+        self.client.get(AIRPORT_URL)
+        self.client.post(
+            AIRPORT_URL, {"name": "Kyiv Airport", "closest_big_city": "Kyiv"}
+        )
+
+        res = self.client.get(METRICS_URL)
+        body = res.content.decode()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            f'http_requests_total{{endpoint="airport-list",{WORKER}}} 2', body
+        )
+        self.assertIn(
+            f'http_requests_total{{endpoint="airport-create",{WORKER}}} 1',
+            body,
+        )
+        self.assertIn(
+            "http_request_duration_seconds_bucket"
+            f'{{endpoint="airport-list",{WORKER},le="+Inf"}} 2',
+            body,
+        )
+        self.assertIn(
+            f'db_queries_total{{endpoint="airport-list",{WORKER}}}', body
+        )
+        self.assertNotIn(
+            f'db_queries_total{{endpoint="airport-list",{WORKER}}} 0\n', body
+        )
+
+    def test_streamed_response_is_recorded_when_it_ends(self):
+        bulk_flights(5)
+        self.client.force_authenticate(self.user)
+
+        with patch.object(FlightViewSet, "stream_batch_size", 2):
+            res = self.client.get(FLIGHT_URL)
+            self.assertTrue(res.streaming)
+            self.assertNotIn("flight-list", registry.render())
+            content = b"".join(res.streaming_content)
+
+        stats = registry._stats["flight-list"]
+        self.assertEqual(stats.count, 1)
+        self.assertEqual(stats.response_bytes, len(content))
+
+    def test_sql_while_streaming_is_counted(self):
+        def chunks():
+            yield b"["
+            yield str(Airport.objects.count()).encode()
+            yield b"]"
+
+        middleware = MetricsMiddleware(
+            lambda request: StreamingHttpResponse(chunks())
+        )
+        res = middleware(RequestFactory().get("/"))
+        self.assertEqual(b"".join(res.streaming_content), b"[1]")
+
+        stats = registry._stats["other"]
+        self.assertEqual(
+            (stats.count, stats.queries, stats.response_bytes), (1, 1, 3)
+        )
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.models import Order
+from airport.tests.factories import bulk_orders, make_user
+from airport_service.counts import approximate_count
+
+ORDER_URL = reverse("airport:order-list")
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=20)
+class EstimatedCountPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        bulk_orders(15, user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_count(self):
+        res = self.client.get(ORDER_URL)
+        return res.data["count"], res.data["count_is_approximate"]
+
+    def test_exact_below_threshold(self):
+        self.assertEqual(self.get_count(), (15, False))
+
+    def test_cached_count_above_threshold(self):
+        bulk_orders(10, user=self.user)
+        # Without a planner estimate the first count is exact and cached
+        self.assertEqual(self.get_count(), (25, False))
+
+        bulk_orders(10, user=self.user)
+        with patch(
+            "airport_service.counts.refresh_count_in_background"
+        ) as refresh:
+            self.assertEqual(self.get_count(), (25, True))
+        refresh.assert_not_called()
+
+        with override_settings(COUNT_CACHE_MAX_AGE=-1), patch(
+            "airport_service.counts.refresh_count_in_background"
+        ) as refresh:
+            self.assertEqual(self.get_count(), (25, True))
+        refresh.assert_called_once()
+
+    def test_planner_estimate_until_counted(self):
+        bulk_orders(10, user=self.user)
+
+        with patch(
+            "airport_service.counts.planner_estimate", return_value=1000
+        ), patch(
+            "airport_service.counts.refresh_count_in_background"
+        ) as refresh:
+            self.assertEqual(self.get_count(), (1000, True))
+        refresh.assert_called_once()
+
+    def test_background_refresh_caches_count(self):
+        queryset = Order.objects.filter(user=self.user)
+        with patch(
+            "airport_service.counts.planner_estimate", return_value=1
+        ), patch("airport_service.counts._refresher") as refresher:
+            self.assertEqual(approximate_count(queryset), (1, False))
+            # A second request doesn't queue the same count again
+            approximate_count(queryset)
+        refresher.submit.assert_called_once()
+
+        refresh = refresher.submit.call_args.args[0]
+        with patch("airport_service.counts.connections"):
+            refresh()
+        self.assertEqual(approximate_count(queryset), (15, False))
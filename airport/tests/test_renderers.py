@@ -0,0 +1,107 @@
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import renderers
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
+
+from airport.tests.factories import bulk_flights, make_user
+from airport.views import FlightViewSet
+from airport_service.renderers import FastJSONRenderer
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    def assert_same_output(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            renderers.JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_output_matches_json_renderer(self):
+        self.assert_same_output(
+            {
+                "datetime": datetime(2024, 10, 8, 10, 30, tzinfo=timezone.utc),
+                "naive": datetime(2024, 10, 8, 10, 30, 0, 1234),
+                "date": date(2024, 10, 8),
+                "duration": timedelta(hours=2),
+                "price": Decimal("10.50"),
+                "uuid": uuid.UUID(int=1),
+                "lazy": gettext_lazy("Not found."),
+                "text": "Kyiv   Київ",
+                "nested": [{"id": 1, "float": 1.5, "none": None}],
+                1: "integer key",
+            }
+        )
+
+    def test_indented_output_matches_json_renderer(self):
+        self.assert_same_output(
+            {"id": 1, "tickets": [1, 2]}, "application/json; indent=4"
+        )
+
+    def test_falls_back_for_big_integers(self):
+        self.assert_same_output({"id": 2 ** 70})
+
+
+class StreamingListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        bulk_flights(5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_short_list_is_not_streamed(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertFalse(res.streaming)
+        self.assertEqual(len(res.data), 5)
+
+    def test_long_list_is_streamed_in_batches(self):
+        expected = self.client.get(FLIGHT_URL).content
+
+        with patch.object(FlightViewSet, "stream_batch_size", 2):
+            res = self.client.get(FLIGHT_URL)
+            chunks = list(res.streaming_content)
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b"".join(chunks), expected)
+
+    def test_batch_boundary(self):
+        with patch.object(FlightViewSet, "stream_batch_size", 5):
+            res = self.client.get(FLIGHT_URL)
+            content = b"".join(res.streaming_content)
+
+        self.assertEqual(len(json.loads(content)), 5)
+
+    async def test_async_list_is_streamed(self):
+        view = FlightViewSet.as_async_view({"get": "list"})
+        request = APIRequestFactory().get(FLIGHT_URL)
+        force_authenticate(request, self.user)
+        expected = (await view(request)).content
+
+        with patch.object(FlightViewSet, "stream_batch_size", 2):
+            request = APIRequestFactory().get(FLIGHT_URL)
+            force_authenticate(request, self.user)
+            res = await view(request)
+            content = b"".join(
+                [chunk async for chunk in res.streaming_content]
+            )
+
+        self.assertEqual(content, expected)
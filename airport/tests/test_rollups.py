@@ -0,0 +1,204 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import RouteDailyLoad, Ticket
+from airport.rollups import apply_ticket_counts, reconcile
+from airport.tests.factories import (
+    DEPARTURE_TIME,
+    bulk_flights,
+    bulk_orders,
+    bulk_tickets,
+    make_airplane,
+    make_flight,
+    make_route,
+    make_user,
+)
+
+LOAD_FACTOR_URL = reverse("airport:load-factor")
+ORDER_URL = reverse("airport:order-list")
+DAY = DEPARTURE_TIME.date()
+FIXTURE = settings.BASE_DIR / "airport_db_data.json"
+
+
+def rollup(route, day=DAY):
+    row = RouteDailyLoad.objects.filter(route=route, day=day).first()
+    return row and (row.flights, row.seats, row.tickets_sold)
+
+
+class RollupMaintenanceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.route = make_route()
+        self.airplane = make_airplane(rows=10, seats_in_row=6)
+        self.flight = make_flight(route=self.route, airplane=self.airplane)
+
+    def book(self, *seats):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data["id"]
+
+    def test_booking_and_cancelling_adjust_tickets(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order_id = self.book((1, 1), (1, 2))
+            self.book((2, 1))
+        self.assertEqual(rollup(self.route), (1, 60, 3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.tickets.filter(order_id=order_id).first().delete()
+        self.assertEqual(rollup(self.route), (1, 60, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.tickets.get(row=2).order.delete()
+        self.assertEqual(rollup(self.route), (1, 60, 1))
+
+    def test_booking_counts_tickets_once_at_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.book((1, 1), (1, 2), (1, 3))
+        # Not locked by the booking transaction
+        self.assertEqual(rollup(self.route), (1, 60, 0))
+
+        [apply_counts] = [
+            callback
+            for callback in callbacks
+            if getattr(callback, "func", None) is apply_ticket_counts
+        ]
+        with self.assertNumQueries(1):
+            apply_counts()
+        self.assertEqual(rollup(self.route), (1, 60, 3))
+
+    def test_flight_changes_recompute_rows(self):
+        self.book((1, 1))
+        other = make_flight(route=self.route)
+        self.assertEqual(rollup(self.route), (2, 120, 1))
+
+        self.flight.departure_time += timedelta(days=1)
+        self.flight.save()
+        self.assertEqual(rollup(self.route), (1, 60, 0))
+        self.assertEqual(
+            rollup(self.route, DAY + timedelta(days=1)), (1, 60, 1)
+        )
+
+        self.flight.delete()
+        other.delete()
+        self.assertFalse(RouteDailyLoad.objects.exists())
+
+    def test_airplane_capacity_change_updates_seats(self):
+        self.airplane.rows = 20
+        self.airplane.save()
+
+        self.assertEqual(rollup(self.route), (1, 120, 0))
+
+    def test_reconcile_fixes_bulk_writes(self):
+        bulk_tickets(self.flight, bulk_orders(1, user=self.user), number=5)
+        bulk_flights(2, routes=[self.route], airplanes=[self.airplane])
+        RouteDailyLoad.objects.create(
+            route=make_route(), day=date(2020, 1, 1), flights=1, seats=10
+        )
+        self.assertEqual(rollup(self.route), (1, 60, 0))
+
+        self.assertEqual(reconcile(), 2)
+        self.assertEqual(rollup(self.route), (3, 180, 5))
+        self.assertEqual(RouteDailyLoad.objects.count(), 1)
+
+        out = StringIO()
+        call_command("reconcile_load_rollups", stdout=out)
+        self.assertIn("0 rows fixed", out.getvalue())
+
+
+class FixtureTest(TestCase):
+    def test_loaddata_then_reconcile(self):
+        call_command("loaddata", FIXTURE, stdout=StringIO())
+        self.assertFalse(RouteDailyLoad.objects.exists())
+
+        self.assertGreater(reconcile(), 0)
+        self.assertEqual(
+            RouteDailyLoad.objects.aggregate(sold=Sum("tickets_sold"))["sold"],
+            Ticket.objects.count(),
+        )
+
+
+class LoadFactorApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user(is_staff=True)
+        cls.route = make_route()
+        other_route = make_route()
+        airplane = make_airplane(rows=10, seats_in_row=6)
+        cls.flights = [
+            make_flight(
+                route=route,
+                airplane=airplane,
+                departure_time=DEPARTURE_TIME + timedelta(days=days),
+                arrival_time=DEPARTURE_TIME + timedelta(days=days, hours=2),
+            )
+            for route, days in (
+                (cls.route, 0), (cls.route, 1), (other_route, 0),
+                (cls.route, 7),
+            )
+        ]
+        orders = bulk_orders(1, user=cls.admin)
+        for flight, number in zip(cls.flights, (30, 15, 60, 6)):
+            bulk_tickets(flight, orders, number=number)
+        reconcile()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_daily_load_factor_of_route(self):
+        res = self.client.get(
+            LOAD_FACTOR_URL,
+            {"route": self.route.id, "from": DAY, "to": DAY + timedelta(1)},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["period"], row["load_factor"]) for row in res.data],
+            [(str(DAY), 0.5), (str(DAY + timedelta(1)), 0.25)],
+        )
+
+    def test_weekly_load_factor_of_all_routes(self):
+        res = self.client.get(
+            LOAD_FACTOR_URL,
+            {
+                "from": DAY,
+                "to": DAY + timedelta(days=7),
+                "granularity": "week",
+            },
+        )
+
+        self.assertEqual(
+            [(row["flights"], row["tickets_sold"]) for row in res.data],
+            [(3, 105), (1, 6)],
+        )
+        self.assertEqual(res.data[0]["load_factor"], round(105 / 180, 4))
+
+    def test_admin_only_and_validated(self):
+        res = self.client.get(LOAD_FACTOR_URL, {"from": DAY, "to": "x"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(make_user())
+        res = self.client.get(LOAD_FACTOR_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
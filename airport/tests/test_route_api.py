@@ -48,17 +48,22 @@ class UnauthenticatedRouteAPITest(TestCase):
 
 
 class AuthenticatedRouteAPITest(TestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
             "test@test.com",
             "test12345",
         )
+        cls.airport1 = sample_airport(name="Washington Airport")
+        cls.airport2 = sample_airport(name="Chicago Airport")
+
+    def setUp(self):
+        self.client = APIClient()
         self.client.force_authenticate(self.user)
 
     def test_list_routes(self):
-        airport1 = sample_airport(name="Washington Airport")
-        airport2 = sample_airport(name="Chicago Airport")
+        airport1 = self.airport1
+        airport2 = self.airport2
         sample_route(source=airport1, destination=airport2)
 
         routes = Route.objects.all()
@@ -70,8 +75,8 @@ class AuthenticatedRouteAPITest(TestCase):
         self.assertEqual(res.data, serializer.data)
 
     def test_filter_routes_by_airports(self):
-        airport1 = sample_airport(name="Washington Airport")
-        airport2 = sample_airport(name="Chicago Airport")
+        airport1 = self.airport1
+        airport2 = self.airport2
         route1 = sample_route(source=airport1, destination=airport2)
         route2 = sample_route(source=airport2, destination=airport1)
 
@@ -95,8 +100,8 @@ class AuthenticatedRouteAPITest(TestCase):
         self.assertNotIn(serializer2.data, res.data)
 
     def test_retrieve_route_detail(self):
-        airport1 = sample_airport(name="Washington Airport")
-        airport2 = sample_airport(name="Chicago Airport")
+        airport1 = self.airport1
+        airport2 = self.airport2
         route = sample_route(source=airport1, destination=airport2)
 
         serializer = RouteDetailSerializer(route)
@@ -108,8 +113,8 @@ class AuthenticatedRouteAPITest(TestCase):
         self.assertEqual(res.data, serializer.data)
 
     def test_create_route_forbidden(self):
-        airport1 = sample_airport(name="Washington Airport")
-        airport2 = sample_airport(name="Chicago Airport")
+        airport1 = self.airport1
+        airport2 = self.airport2
         payload = {
             "source": airport1,
             "destination": airport2,
@@ -121,18 +126,23 @@ class AuthenticatedRouteAPITest(TestCase):
 
 
 class AdminRouteAPITest(TestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
             "admin@admin.com",
             "admin12345",
             is_staff=True
         )
+        cls.airport1 = sample_airport(name="Washington Airport")
+        cls.airport2 = sample_airport(name="Chicago Airport")
+
+    def setUp(self):
+        self.client = APIClient()
         self.client.force_authenticate(self.user)
 
     def test_create_route(self):
-        airport1 = sample_airport(name="Washington Airport")
-        airport2 = sample_airport(name="Chicago Airport")
+        airport1 = self.airport1
+        airport2 = self.airport2
         payload = {
             "source": airport1.id,
             "destination": airport2.id,
@@ -156,8 +166,8 @@ class AdminRouteAPITest(TestCase):
         self.assertEqual(airport2, destination)
 
     def test_put_route_not_allowed(self):
-        airport1 = sample_airport(name="Washington Airport")
-        airport2 = sample_airport(name="Chicago Airport")
+        airport1 = self.airport1
+        airport2 = self.airport2
         route = sample_route(source=airport1, destination=airport2)
 
         url = detail_url(route.id)
@@ -166,8 +176,8 @@ class AdminRouteAPITest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
     def test_delete_route_not_allowed(self):
-        airport1 = sample_airport(name="Washington Airport")
-        airport2 = sample_airport(name="Chicago Airport")
+        airport1 = self.airport1
+        airport2 = self.airport2
         route = sample_route(source=airport1, destination=airport2)
 
         url = detail_url(route.id)
@@ -0,0 +1,107 @@
+import gzip
+import os
+import tempfile
+from pathlib import Path
+
+import brotli
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from airport_service.schema import code_version, schema_cache
+
+SCHEMA_URL = reverse("schema")
+
+
+class SchemaViewTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(SCHEMA_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        schema_cache.clear()
+        self.addCleanup(schema_cache.clear)
+
+    def test_schema_formats(self):
+        res = self.client.get(SCHEMA_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/vnd.oai.openapi")
+        self.assertTrue(res.content.startswith(b"openapi:"))
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT="application/json")
+        self.assertEqual(
+            res["Content-Type"], "application/vnd.oai.openapi+json"
+        )
+        self.assertIn("/api/airport/flights/", res.json()["paths"])
+
+    def test_schema_gzip_and_etag(self):
+        plain = self.client.get(SCHEMA_URL, {"format": "json"})
+        res = self.client.get(
+            SCHEMA_URL, {"format": "json"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertNotEqual(res["ETag"], plain["ETag"])
+
+        res = self.client.get(
+            SCHEMA_URL, {"format": "json"}, HTTP_IF_NONE_MATCH=plain["ETag"]
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], plain["ETag"])
+
+        # The plain ETag doesn't validate the gzip representation
+        res = self.client.get(
+            SCHEMA_URL,
+            {"format": "json"},
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=plain["ETag"],
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_schema_prefers_brotli(self):
+        plain = self.client.get(SCHEMA_URL)
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(res["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(res.content), plain.content)
+
+    def test_schema_files_written_whole(self):
+        self.client.get(SCHEMA_URL)
+
+        # Written through temporary files renamed into place
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            [
+                "schema.json",
+                "schema.json.br",
+                "schema.json.gz",
+                "schema.version",
+                "schema.yaml",
+                "schema.yaml.br",
+                "schema.yaml.gz",
+            ],
+        )
+
+    def test_files_of_other_code_version_are_rebuilt(self):
+        self.client.get(SCHEMA_URL)
+        schema_cache.clear()
+        path = Path(self.directory)
+        (path / "schema.yaml").write_bytes(b"openapi: stale\n")
+
+        # Same version: the files are served as they are
+        self.assertEqual(
+            self.client.get(SCHEMA_URL).content, b"openapi: stale\n"
+        )
+
+        schema_cache.clear()
+        (path / "schema.version").write_text("older")
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertIn(b"/api/airport/flights/", res.content)
+        self.assertEqual(
+            (path / "schema.version").read_text(), code_version()
+        )
@@ -0,0 +1,284 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+
+from airport.booking import run_booking
+from airport.models import Ticket
+from airport.seat_events import flight_topic, seat_event_stream
+from airport.tests.factories import (
+    make_airplane,
+    make_flight,
+    make_order,
+    make_ticket,
+    make_user,
+)
+from airport_service.events import StreamDisconnectMiddleware, hub
+
+EVENTS_URL = reverse("airport:flight-events")
+
+
+def parse(chunk):
+    """(event name, data) of the events in an SSE chunk"""
+    events = []
+    for block in chunk.decode().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+# Committed data: snapshots are read on a connection of their own
+class SeatEventsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.flight = make_flight(
+            airplane=make_airplane(rows=2, seats_in_row=2)
+        )
+        self.order = make_order(user=make_user())
+        self.ticket = make_ticket(flight=self.flight, order=self.order)
+
+    async def open_stream(self):
+        generators = []
+
+        def keep_generator(flight_ids):
+            generators.append(seat_event_stream(flight_ids))
+            return generators[-1]
+
+        with patch("airport.views.seat_event_stream", keep_generator):
+            res = await self.async_client.get(
+                EVENTS_URL, {"flights": self.flight.id}
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        [self.generator] = generators
+        self.stream = aiter(res.streaming_content)
+        return self.stream
+
+    async def close_stream(self):
+        # Closing streaming_content doesn't close the generator it wraps,
+        # as a disconnect does by cancelling the response
+        await self.stream.aclose()
+        await self.generator.aclose()
+        self.assertEqual(hub._subscriptions, {})
+
+    async def next_events(self, stream):
+        return parse(await asyncio.wait_for(anext(stream), 5))
+
+    def book(self, row, seat):
+        return make_ticket(
+            flight=self.flight, order=self.order, row=row, seat=seat
+        )
+
+    def cancel(self, ticket):
+        ticket.delete()
+
+    async def test_snapshot_then_seat_changes(self):
+        stream = await self.open_stream()
+
+        self.assertEqual(
+            await self.next_events(stream),
+            [
+                (
+                    "snapshot",
+                    [
+                        {
+                            "flight": self.flight.id,
+                            "taken": [[1, 1]],
+                            "seats_available": 3,
+                        }
+                    ],
+                )
+            ],
+        )
+
+        ticket = await sync_to_async(self.book)(2, 1)
+        self.assertEqual(
+            await self.next_events(stream),
+            [
+                (
+                    "seats",
+                    {
+                        "flight": self.flight.id,
+                        "taken": [[2, 1]],
+                        "released": [],
+                        "seats_available_delta": -1,
+                    },
+                )
+            ],
+        )
+
+        await sync_to_async(self.cancel)(ticket)
+        [(name, data)] = await self.next_events(stream)
+        self.assertEqual(
+            (name, data["released"], data["seats_available_delta"]),
+            ("seats", [[2, 1]], 1),
+        )
+        await self.close_stream()
+
+    @override_settings(SEAT_EVENTS_KEEPALIVE=0.01)
+    async def test_keepalive(self):
+        stream = await self.open_stream()
+        await anext(stream)
+
+        self.assertEqual(
+            await asyncio.wait_for(anext(stream), 5), b": keepalive\n\n"
+        )
+        await self.close_stream()
+
+    @override_settings(EVENTS_QUEUE_SIZE=1)
+    async def test_slow_stream_is_reset(self):
+        stream = await self.open_stream()
+        await anext(stream)
+
+        for seat in (2, 3, 4):
+            hub.publish(
+                flight_topic(self.flight.id),
+                {
+                    "flight": self.flight.id,
+                    "taken": [[1, seat]],
+                    "released": [],
+                    "seats_available_delta": -1,
+                },
+            )
+        await asyncio.sleep(0)
+
+        self.assertEqual(await self.next_events(stream), [("reset", {})])
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertEqual(hub._subscriptions, {})
+
+    async def test_validation(self):
+        res = await self.async_client.get(EVENTS_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = await self.async_client.get(
+            EVENTS_URL, {"flights": f"{self.flight.id},0"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_not_served_over_wsgi(self):
+        res = self.client.get(EVENTS_URL, {"flights": self.flight.id})
+
+        self.assertEqual(res.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+
+class PublishSeatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.flights = [
+            make_flight(airplane=make_airplane(rows=2, seats_in_row=4))
+            for _ in range(2)
+        ]
+        cls.order = make_order(user=make_user())
+
+    def setUp(self):
+        patcher = patch("airport.seat_events.hub.publish")
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def book(self, seats):
+        def book():
+            tickets = [
+                make_ticket(flight=flight, order=self.order, row=1, seat=seat)
+                for flight, seat in seats
+            ]
+            # Moved within the booking: only the last seat is taken
+            tickets[0].seat = 2
+            tickets[0].save()
+            return tickets
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return run_booking(book)
+
+    def test_one_message_per_flight_per_booking(self):
+        first, second = self.flights
+
+        self.book([(first, 1), (first, 3), (second, 4)])
+
+        self.assertEqual(
+            [call.args for call in self.publish.call_args_list],
+            [
+                (
+                    flight_topic(first.id),
+                    {
+                        "flight": first.id,
+                        "taken": [[1, 3], [1, 2]],
+                        "released": [],
+                        "seats_available_delta": -2,
+                    },
+                ),
+                (
+                    flight_topic(second.id),
+                    {
+                        "flight": second.id,
+                        "taken": [[1, 4]],
+                        "released": [],
+                        "seats_available_delta": -1,
+                    },
+                ),
+            ],
+        )
+
+    def test_failing_channel_keeps_booking(self):
+        self.publish.side_effect = OSError("channel is down")
+
+        with self.assertLogs("django.test", "ERROR"):
+            self.book([(self.flights[0], 1)])
+
+        self.assertTrue(Ticket.objects.filter(order=self.order).exists())
+
+    def test_raw_save_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket(
+                flight=self.flights[0], order=self.order, row=2, seat=2
+            ).save_base(raw=True)
+
+        self.publish.assert_not_called()
+
+
+class StreamDisconnectMiddlewareTest(SimpleTestCase):
+    async def test_cancels_stream_when_client_leaves(self):
+        cancelled = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await receive()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")],
+                }
+            )
+            try:
+                await asyncio.Event().wait()
+            finally:
+                cancelled.set()
+
+        messages = asyncio.Queue()
+        await messages.put({"type": "http.request", "body": b""})
+        await messages.put({"type": "http.disconnect"})
+
+        async def send(message):
+            pass
+
+        await asyncio.wait_for(
+            StreamDisconnectMiddleware(app)(
+                {"type": "http"}, messages.get, send
+            ),
+            5,
+        )
+
+        self.assertTrue(cancelled.is_set())
@@ -0,0 +1,123 @@
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.seating import SeatMap
+from airport.tests.factories import (
+    bulk_orders,
+    bulk_tickets,
+    make_airplane,
+    make_flight,
+    make_user,
+)
+
+ORDER_URL = reverse("airport:order-list")
+
+
+class SeatMapTest(SimpleTestCase):
+    def test_runs(self):
+        seat_map = SeatMap(2, 6, taken=[(1, 3), (1, 4), (2, 1)])
+
+        self.assertEqual(
+            list(seat_map.runs()), [(2, 1, 1), (2, 1, 5), (5, 2, 2)]
+        )
+        self.assertEqual(seat_map.free, 9)
+
+    def test_tightest_block_in_one_row(self):
+        seat_map = SeatMap(3, 6, taken=[(1, 4), (2, 5), (3, 1), (3, 2)])
+
+        # Free blocks: 3 and 2 seats in row 1, 4 and 1 in row 2, 4 in row 3
+        self.assertEqual(seat_map.allocate(3), [(1, 1), (1, 2), (1, 3)])
+        self.assertEqual(
+            seat_map.allocate(4), [(2, 1), (2, 2), (2, 3), (2, 4)]
+        )
+        self.assertEqual(seat_map.allocate(1), [(2, 6)])
+
+    def test_split_into_fewest_blocks(self):
+        taken = [(row, 4) for row in range(1, 5)] + [(4, 2)]
+        seat_map = SeatMap(4, 6, taken=taken)
+
+        seats = seat_map.allocate(5)
+
+        self.assertEqual(seats, [(1, 1), (1, 2), (1, 3), (1, 5), (1, 6)])
+        self.assertEqual(len(seat_map.allocate(7)), 7)
+        self.assertEqual(seat_map.free, 19 - 12)
+
+    def test_too_few_free_seats(self):
+        seat_map = SeatMap(1, 4, taken=[(1, 2)])
+
+        self.assertIsNone(seat_map.allocate(4))
+        self.assertEqual(seat_map.free, 3)
+
+    def test_fast_on_a_nearly_full_large_airplane(self):
+        # 500 seats, every row has one gap of two seats
+        taken = [
+            (row, seat)
+            for row in range(1, 51)
+            for seat in range(1, 11)
+            if seat not in (row % 9 + 1, row % 9 + 2)
+        ]
+
+        started = time.perf_counter()
+        seats = SeatMap(50, 10, taken=taken).allocate(9)
+
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual(len(set(seats)), 9)
+
+
+class AutoAssignApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.flight = make_flight(airplane=make_airplane(rows=3, seats_in_row=4))
+        bulk_tickets(cls.flight, bulk_orders(1), number=2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def order(self, **data):
+        return self.client.post(ORDER_URL, data, format="json")
+
+    def test_group_gets_seats_together(self):
+        res = self.order(auto_assign=[{"flight": self.flight.id, "seats": 4}])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("auto_assign", res.data)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in res.data["tickets"]],
+            [(2, 1), (2, 2), (2, 3), (2, 4)],
+        )
+
+    def test_explicit_tickets_are_taken_first(self):
+        res = self.order(
+            tickets=[{"row": 1, "seat": 3, "flight": self.flight.id}],
+            auto_assign=[{"flight": self.flight.id, "seats": 1}],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in res.data["tickets"]],
+            [(1, 3), (1, 4)],
+        )
+
+    def test_not_enough_seats_creates_nothing(self):
+        res = self.order(auto_assign=[{"flight": self.flight.id, "seats": 11}])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("auto_assign", res.data)
+        self.assertEqual(self.flight.tickets.count(), 2)
+
+    def test_validation(self):
+        for data in (
+            {},
+            {"auto_assign": [{"flight": self.flight.id, "seats": 13}]},
+            {"auto_assign": [{"flight": self.flight.id, "seats": 0}]},
+        ):
+            res = self.order(**data)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,115 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.serializers import FlightListSerializer
+from airport.tests.factories import (
+    bulk_orders,
+    bulk_tickets,
+    make_crew,
+    make_flight,
+    make_user,
+)
+from airport.values_serializers import get_values_serializer
+
+FLIGHT_URL = reverse("airport:flight-list")
+AIRPORT_URL = reverse("airport:airport-list")
+
+
+def flight_detail_url(flight_id):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+class SparseFieldsetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user(is_staff=True)
+        cls.flight = make_flight()
+        cls.flight.crews.add(make_crew())
+        bulk_tickets(cls.flight, bulk_orders(2, user=cls.user), number=3)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, params):
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            res = self.client.get(url, params)
+        return res, queries
+
+    def test_fields_narrow_list_and_sql(self):
+        res, queries = self.get(
+            FLIGHT_URL, {"fields": "id,departure_time,seats_available"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data[0]), ["id", "departure_time", "seats_available"]
+        )
+        self.assertEqual(res.data[0]["seats_available"], 57)
+        self.assertNotIn("airport_route", queries[-1])
+        self.assertNotIn('"airport_airplane"."name"', queries[-1])
+
+    def test_annotation_skipped_when_not_requested(self):
+        res, queries = self.get(FLIGHT_URL, {"fields": "id,duration"})
+
+        self.assertEqual(
+            res.data[0], {"id": self.flight.id, "duration": "02:00"}
+        )
+        self.assertNotIn("COUNT", queries[-1])
+        self.assertNotIn("airport_ticket", queries[-1])
+
+    def test_exclude_drops_prefetches(self):
+        full, full_queries = self.get(flight_detail_url(self.flight.id), {})
+        res, queries = self.get(
+            flight_detail_url(self.flight.id),
+            {"exclude": "taken_seats,crews,route,airplane"},
+        )
+
+        self.assertEqual(
+            list(res.data),
+            ["id", "departure_time", "arrival_time", "duration"],
+        )
+        self.assertEqual(len(full_queries) - len(queries), 2)
+        self.assertNotIn("airport_route", queries[-1])
+
+    def test_model_serializer_columns_are_narrowed(self):
+        res, queries = self.get(AIRPORT_URL, {"fields": "name"})
+
+        self.assertEqual(list(res.data[0]), ["name"])
+        self.assertNotIn("closest_big_city", queries[-1])
+
+    def test_unknown_field_rejected(self):
+        res, _ = self.get(FLIGHT_URL, {"fields": "id,price"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("price", res.data["fields"])
+
+    def test_writes_ignore_fields(self):
+        res = self.client.post(
+            f"{AIRPORT_URL}?fields=id",
+            {"name": "Kyiv Airport", "closest_big_city": "Kyiv"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["name"], "Kyiv Airport")
+
+    def test_narrowed_values_serializer_is_not_registered(self):
+        values_serializer = get_values_serializer(FlightListSerializer)
+
+        narrowed = values_serializer.with_fields(["id"])
+
+        self.assertEqual(narrowed.lookups, ("pk",))
+        self.assertIs(
+            get_values_serializer(FlightListSerializer), values_serializer
+        )
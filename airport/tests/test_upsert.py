@@ -0,0 +1,209 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, AirplaneType, Airport, Route
+from airport.tests.factories import (
+    DEPARTURE_TIME,
+    make_airplane,
+    make_airplane_type,
+    make_airport,
+    make_flight,
+    make_route,
+    make_user,
+)
+
+AIRPORT_BULK_URL = reverse("airport:airport-bulk")
+ROUTE_BULK_URL = reverse("airport:route-bulk")
+AIRPLANE_BULK_URL = reverse("airport:airplane-bulk")
+
+
+class BulkUpsertTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user(is_staff=True))
+
+    def upsert(self, url, rows, expected_status=status.HTTP_200_OK):
+        res = self.client.post(url, rows, format="json")
+        self.assertEqual(res.status_code, expected_status, res.data)
+        return res.data
+
+    def test_admins_only(self):
+        self.client.force_authenticate(make_user())
+
+        res = self.client.post(AIRPORT_BULK_URL, [], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_airports(self):
+        make_airport(name="Heathrow", closest_big_city="London")
+
+        counts = self.upsert(
+            AIRPORT_BULK_URL,
+            [
+                {"name": "Heathrow", "closest_big_city": "London"},
+                {"name": "Orly", "closest_big_city": "Paris"},
+            ],
+        )
+
+        self.assertEqual(counts, {"created": 1, "updated": 0, "unchanged": 1})
+        self.assertEqual(Airport.objects.count(), 2)
+
+    def test_routes_by_airport_names(self):
+        source = make_airport(name="Heathrow", closest_big_city="London")
+        destination = make_airport(name="Orly", closest_big_city="Paris")
+        route = make_route(source=source, destination=destination)
+        airports = {
+            "source_name": "Heathrow",
+            "source_city": "London",
+            "destination_name": "Orly",
+            "destination_city": "Paris",
+        }
+        back = {
+            "source_name": "Orly",
+            "source_city": "Paris",
+            "destination_name": "Heathrow",
+            "destination_city": "London",
+        }
+
+        counts = self.upsert(
+            ROUTE_BULK_URL,
+            [
+                {**airports, "distance": 340},
+                {**back, "distance": 345},
+            ],
+        )
+
+        self.assertEqual(counts, {"created": 1, "updated": 1, "unchanged": 0})
+        version = route.version
+        route.refresh_from_db()
+        self.assertEqual(route.distance, 340)
+        # Bulk writes take change versions like save()
+        self.assertGreater(route.version, version)
+        self.assertEqual(
+            Route.objects.get(source=destination, destination=source).distance,
+            345,
+        )
+
+        counts = self.upsert(ROUTE_BULK_URL, [{**airports, "distance": 340}])
+        self.assertEqual(counts, {"created": 0, "updated": 0, "unchanged": 1})
+
+    def test_airplanes_create_types_and_refresh_rollups(self):
+        airplane = make_airplane(
+            name="Boeing 1",
+            rows=10,
+            seats_in_row=6,
+            airplane_type=make_airplane_type(name="Boeing"),
+        )
+        flight = make_flight(airplane=airplane)
+
+        counts = self.upsert(
+            AIRPLANE_BULK_URL,
+            [
+                {
+                    "name": "Boeing 1",
+                    "airplane_type": "Boeing",
+                    "rows": 20,
+                    "seats_in_row": 6,
+                },
+                {
+                    "name": "Airbus 1",
+                    "airplane_type": "Airbus",
+                    "rows": 30,
+                    "seats_in_row": 6,
+                },
+            ],
+        )
+
+        self.assertEqual(counts, {"created": 1, "updated": 1, "unchanged": 0})
+        airplane.refresh_from_db()
+        self.assertEqual(airplane.capacity, 120)
+        self.assertEqual(
+            Airplane.objects.get(name="Airbus 1").airplane_type.name, "Airbus"
+        )
+        self.assertEqual(AirplaneType.objects.count(), 2)
+        self.assertEqual(
+            flight.route.daily_loads.get(day=DEPARTURE_TIME.date()).seats,
+            120,
+        )
+
+    def test_csv(self):
+        res = self.client.post(
+            AIRPORT_BULK_URL,
+            "\ufeffname,closest_big_city\r\nHeathrow,London\r\nOrly,Paris\r\n",
+            content_type="text/csv",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, {"created": 2, "updated": 0, "unchanged": 0}
+        )
+        self.assertTrue(
+            Airport.objects.filter(
+                name="Heathrow", closest_big_city="London"
+            ).exists()
+        )
+
+    @override_settings(BULK_UPSERT_BATCH_SIZE=2)
+    def test_errors_by_row_write_nothing(self):
+        make_airport(name="Heathrow", closest_big_city="London")
+        route = {
+            "source_name": "Heathrow",
+            "source_city": "London",
+            "destination_name": "Orly",
+            "destination_city": "Paris",
+            "distance": 340,
+        }
+
+        errors = self.upsert(
+            ROUTE_BULK_URL,
+            [
+                {
+                    **route,
+                    "destination_name": "Heathrow",
+                    "destination_city": "London",
+                },
+                {**route, "distance": -1},
+                route,
+            ],
+            status.HTTP_400_BAD_REQUEST,
+        )["errors"]
+
+        self.assertEqual(sorted(errors), [0, 1, 2])
+        self.assertIn("non_field_errors", errors[0])
+        self.assertIn("distance", errors[1])
+        self.assertIn("destination_name", errors[2])
+
+        errors = self.upsert(
+            AIRPLANE_BULK_URL,
+            [
+                {
+                    "name": "Airbus 1",
+                    "airplane_type": "Airbus",
+                    "rows": 30,
+                    "seats_in_row": 6,
+                },
+            ]
+            * 2,
+            status.HTTP_400_BAD_REQUEST,
+        )["errors"]
+
+        self.assertEqual(list(errors), [1])
+        self.assertFalse(AirplaneType.objects.exists())
+        self.assertFalse(Route.objects.exists())
+
+    def test_batches(self):
+        with override_settings(BULK_UPSERT_BATCH_SIZE=10):
+            counts = self.upsert(
+                AIRPORT_BULK_URL,
+                [
+                    {"name": f"Airport {number}", "closest_big_city": "City"}
+                    for number in range(25)
+                ],
+            )
+
+        self.assertEqual(counts["created"], 25)
+        self.assertEqual(Airport.objects.count(), 25)
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, Flight, Order, Route
+from airport.serializers import (
+    AirplaneListSerializer,
+    FlightDetailSerializer,
+    FlightListSerializer,
+    OrderListSerializer,
+    RouteListSerializer,
+)
+from airport.tests.factories import (
+    bulk_airplanes,
+    bulk_flights,
+    bulk_orders,
+    bulk_routes,
+    bulk_tickets,
+    make_crew,
+    make_user,
+)
+from airport.values_serializers import (
+    OrderListValuesSerializer,
+    get_values_serializer,
+)
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class ValuesSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        routes = bulk_routes(3)
+        airplanes = bulk_airplanes(2, rows=3, seats_in_row=4)
+        flights = bulk_flights(4, routes=routes, airplanes=airplanes)
+        flights[0].crews.add(make_crew())
+        orders = bulk_orders(12, user=cls.user)
+        bulk_tickets(flights[0], orders)
+        bulk_tickets(flights[1], orders[:5], number=5)
+        bulk_orders(2, user=make_user())
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_flight_list_is_identical(self):
+        flights = Flight.objects.annotate(
+            seats_available=(
+                F("airplane__rows") * F("airplane__seats_in_row")
+                - Count("tickets")
+            )
+        )
+        expected = FlightListSerializer(flights, many=True).data
+
+        res = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(res.content, render(expected))
+
+    def test_route_list_is_identical(self):
+        expected = RouteListSerializer(Route.objects.all(), many=True).data
+
+        res = self.client.get(reverse("airport:route-list"))
+
+        self.assertEqual(res.content, render(expected))
+
+    def test_airplane_list_is_identical(self):
+        expected = AirplaneListSerializer(
+            Airplane.objects.all(), many=True
+        ).data
+
+        res = self.client.get(reverse("airport:airplane-list"))
+
+        self.assertEqual(res.content, render(expected))
+
+    def test_order_list_is_identical(self):
+        orders = Order.objects.filter(user=self.user)
+        expected = OrderListSerializer(orders[:10], many=True).data
+
+        res = self.client.get(reverse("airport:order-list"))
+
+        self.assertEqual(res.data["count"], 12)
+        self.assertEqual(render(res.data["results"]), render(expected))
+
+    def test_order_list_loads_tickets_with_one_query(self):
+        rows = OrderListValuesSerializer.values(
+            Order.objects.filter(user=self.user)
+        )
+
+        # Orders, their tickets and their archived tickets
+        with self.assertNumQueries(3):
+            data = OrderListValuesSerializer(rows).data
+
+        self.assertEqual(len(data), 12)
+
+    def test_only_list_serializers_have_values_serializers(self):
+        self.assertIs(
+            get_values_serializer(OrderListSerializer),
+            OrderListValuesSerializer,
+        )
+        self.assertIsNone(get_values_serializer(FlightDetailSerializer))
@@ -0,0 +1,260 @@
+"""
+Bulk upserts of airports, routes and airplanes by their natural keys.
+
+Rows are validated BULK_UPSERT_BATCH_SIZE at a time: field by field with a
+row serializer, then against the airports or airplane types they name with
+one query per batch. Only if every row is valid are the batches written,
+with INSERT ... ON CONFLICT DO UPDATE of the rows that are new or differ
+from the stored ones, all in one transaction. Like other bulk writes they
+skip save() and the model signals, so written rows take their change
+versions here and airplanes whose capacity changed refresh their load
+rollups explicitly.
+"""
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    ChangeCounter,
+    Route,
+)
+from airport.rollups import airplanes_resized
+from airport.serializers import (
+    AirplaneRowSerializer,
+    AirportRowSerializer,
+    RouteRowSerializer,
+)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+class BulkUpsert:
+    """Upsert of rows of one model, matched by unique_fields"""
+
+    model = None
+    serializer_class = None
+    unique_fields = ()
+    update_fields = ()
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    def key(self, values):
+        return tuple(values[field] for field in self.unique_fields)
+
+    def resolve(self, rows):
+        """Model field values of validated rows, a ValidationError if not"""
+        return rows
+
+    def run(self, rows):
+        """Upsert rows; returns the counts of created, updated, unchanged"""
+        if not isinstance(rows, list):
+            raise ValidationError(
+                {"non_field_errors": ["Expected a list of rows."]}
+            )
+        if len(rows) > settings.BULK_UPSERT_MAX_ROWS:
+            raise ValidationError(
+                {
+                    "non_field_errors": [
+                        f"At most {settings.BULK_UPSERT_MAX_ROWS} rows "
+                        f"are allowed."
+                    ]
+                }
+            )
+
+        counts = {"created": 0, "updated": 0, "unchanged": 0}
+        with transaction.atomic(using=self.using):
+            values = self.validate(rows)
+            for _, batch in _batches(
+                values, settings.BULK_UPSERT_BATCH_SIZE
+            ):
+                for name, count in self.write(batch).items():
+                    counts[name] += count
+        return counts
+
+    def validate(self, rows):
+        """Model field values of rows; raises the errors by row index"""
+        child = self.serializer_class()
+        values, errors, seen = [], {}, {}
+        for start, batch in _batches(rows, settings.BULK_UPSERT_BATCH_SIZE):
+            valid = []
+            for index, row in enumerate(batch, start):
+                try:
+                    valid.append((index, child.run_validation(row)))
+                except ValidationError as exc:
+                    errors[index] = exc.detail
+
+            resolved = self.resolve([attrs for _, attrs in valid])
+            for (index, _), row_values in zip(valid, resolved):
+                if isinstance(row_values, ValidationError):
+                    errors[index] = row_values.detail
+                    continue
+                # ON CONFLICT can't update a row twice in one statement
+                first = seen.setdefault(self.key(row_values), index)
+                if first != index:
+                    errors[index] = {
+                        "non_field_errors": [f"Same key as row {first}."]
+                    }
+                else:
+                    values.append(row_values)
+
+        if errors:
+            raise ValidationError({"errors": errors})
+        return values
+
+    def stored(self, batch):
+        """{key: field values} of the stored rows with the keys of batch"""
+        lookups = {
+            f"{field}__in": {values[field] for values in batch}
+            for field in self.unique_fields
+        }
+        return {
+            self.key(values): values
+            for values in self.model.objects.using(self.using)
+            .filter(**lookups)
+            .values("pk", *self.unique_fields, *self.update_fields)
+            .order_by()
+        }
+
+    def write(self, batch):
+        stored = self.stored(batch)
+        created, updated = [], []
+        for values in batch:
+            current = stored.get(self.key(values))
+            if current is None:
+                created.append(values)
+            elif any(
+                current[field] != values[field]
+                for field in self.update_fields
+            ):
+                updated.append(values)
+
+        changed = [self.model(**values) for values in created + updated]
+        # bulk_create skips ChangeTracked.save()
+        for instance, version in zip(
+            changed, ChangeCounter.take(len(changed), self.using)
+        ):
+            instance.version = version
+        if self.update_fields:
+            options = {
+                "update_conflicts": True,
+                "unique_fields": self.unique_fields,
+                "update_fields": (*self.update_fields, "version"),
+            }
+        else:
+            options = {"ignore_conflicts": True}
+        if changed:
+            self.model.objects.using(self.using).bulk_create(
+                changed, **options
+            )
+        self.written(updated, stored)
+
+        return {
+            "created": len(created),
+            "updated": len(updated),
+            "unchanged": len(batch) - len(created) - len(updated),
+        }
+
+    def written(self, updated, stored):
+        """Called after a batch with the updated rows and the old values"""
+
+
+class AirportUpsert(BulkUpsert):
+    model = Airport
+    serializer_class = AirportRowSerializer
+    unique_fields = ("name", "closest_big_city")
+
+
+class RouteUpsert(BulkUpsert):
+    model = Route
+    serializer_class = RouteRowSerializer
+    unique_fields = ("source_id", "destination_id")
+    update_fields = ("distance",)
+    ends = ("source", "destination")
+
+    def resolve(self, rows):
+        names = {row[f"{end}_name"] for row in rows for end in self.ends}
+        cities = {row[f"{end}_city"] for row in rows for end in self.ends}
+        airports = {
+            (name, city): pk
+            for pk, name, city in Airport.objects.using(self.using)
+            .filter(name__in=names, closest_big_city__in=cities)
+            .values_list("pk", "name", "closest_big_city")
+            .order_by()
+        }
+
+        resolved = []
+        for row in rows:
+            values, errors = {"distance": row["distance"]}, {}
+            for end in self.ends:
+                name, city = row[f"{end}_name"], row[f"{end}_city"]
+                if (name, city) in airports:
+                    values[f"{end}_id"] = airports[name, city]
+                else:
+                    errors[f"{end}_name"] = [f"No airport {name} in {city}."]
+            if not errors and values["source_id"] == values["destination_id"]:
+                errors["non_field_errors"] = [
+                    "Source and destination airports cannot be the same."
+                ]
+            resolved.append(ValidationError(errors) if errors else values)
+        return resolved
+
+
+class AirplaneUpsert(BulkUpsert):
+    """Airplanes by name; airplane types they name are created if new"""
+
+    model = Airplane
+    serializer_class = AirplaneRowSerializer
+    unique_fields = ("name",)
+    update_fields = ("airplane_type_id", "rows", "seats_in_row")
+
+    def resolve(self, rows):
+        airplane_types = AirplaneType.objects.using(self.using)
+        names = {row["airplane_type"] for row in rows}
+        type_ids = dict(
+            airplane_types.filter(name__in=names).values_list("name", "pk")
+        )
+        missing = names - type_ids.keys()
+        if missing:
+            airplane_types.bulk_create(
+                [
+                    AirplaneType(name=name, version=version)
+                    for name, version in zip(
+                        missing, ChangeCounter.take(len(missing), self.using)
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+            type_ids.update(
+                airplane_types.filter(name__in=missing).values_list(
+                    "name", "pk"
+                )
+            )
+
+        return [
+            {
+                "name": row["name"],
+                "airplane_type_id": type_ids[row["airplane_type"]],
+                "rows": row["rows"],
+                "seats_in_row": row["seats_in_row"],
+            }
+            for row in rows
+        ]
+
+    def written(self, updated, stored):
+        resized = []
+        for values in updated:
+            current = stored[self.key(values)]
+            if (current["rows"], current["seats_in_row"]) != (
+                values["rows"],
+                values["seats_in_row"],
+            ):
+                resized.append(current["pk"])
+        if resized:
+            airplanes_resized(resized, self.using)
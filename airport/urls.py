@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
@@ -5,8 +6,12 @@ from airport.views import (
     AirplaneViewSet,
     AirplaneTypeViewSet,
     AirportViewSet,
+    BatchView,
+    CatalogView,
+    ChangesView,
     CrewViewSet,
     FlightViewSet,
+    LoadFactorView,
     OrderViewSet,
     RouteViewSet,
 )
@@ -22,7 +27,56 @@ router.register("orders", OrderViewSet)
 router.register("routers", RouteViewSet)
 
 urlpatterns = [
-    path("", include(router.urls))
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("catalog/", CatalogView.as_view(), name="catalog"),
+    path("changes/", ChangesView.as_view(), name="changes"),
+    path(
+        "analytics/load-factor/",
+        LoadFactorView.as_view(),
+        name="load-factor",
+    ),
+    path("", include(router.urls)),
 ]
 
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = [
+        path(
+            "airports/",
+            AirportViewSet.as_async_view({"get": "list", "post": "create"}),
+            name="airport-list",
+        ),
+        path(
+            "flights/",
+            FlightViewSet.as_async_view({"get": "list", "post": "create"}),
+            name="flight-list",
+        ),
+        path(
+            "flights/<pk>/",
+            FlightViewSet.as_async_view(
+                {
+                    "get": "retrieve",
+                    "put": "update",
+                    "patch": "partial_update",
+                    "delete": "destroy",
+                }
+            ),
+            name="flight-detail",
+        ),
+        path(
+            "routers/",
+            RouteViewSet.as_async_view({"get": "list", "post": "create"}),
+            name="route-list",
+        ),
+    ] + urlpatterns
+
+# Ahead of flights/<pk>/
+urlpatterns.insert(
+    0,
+    path(
+        "flights/events/",
+        FlightViewSet.as_async_view({"get": "events"}),
+        name="flight-events",
+    ),
+)
+
 app_name = "airport"
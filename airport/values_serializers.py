@@ -0,0 +1,256 @@
+"""
+Read-only list serializers that skip model instances.
+
+A values serializer mirrors a DRF list serializer: it declares the output
+fields and the ``values_list`` lookups each one is built from, reads the
+rows with a single projection and emits plain dicts. The output must stay
+identical to the serializer it mirrors (see test_values_serializers).
+"""
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+
+from rest_framework import serializers
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from airport.models import OrderArchive, format_duration
+from airport.serializers import (
+    AirplaneListSerializer,
+    FlightListSerializer,
+    OrderListSerializer,
+    RouteListSerializer,
+    TicketListSerializer,
+)
+
+_values_serializers = {}
+
+to_datetime = serializers.DateTimeField().to_representation
+
+
+class Field:
+    """Output value built from one or more lookups of the row"""
+
+    def __init__(self, *lookups, function=None):
+        self.lookups = lookups
+        self.function = function
+
+    def compile(self, indexes):
+        """Return a function that builds the value from a row tuple"""
+        function = self.function
+        if len(indexes) == 1:
+            index = indexes[0]
+            if function is None:
+                return itemgetter(index)
+            return lambda row: function(row[index])
+
+        getter = itemgetter(*indexes)
+        return lambda row: function(*getter(row))
+
+
+class Nested:
+    """Rows of values_serializer pointing at this row through foreign_key
+
+    extra, if given, loads more representations by parent key, appended
+    after the related rows.
+    """
+
+    lookups = ("pk",)
+
+    def __init__(self, values_serializer, foreign_key, extra=None):
+        self.values_serializer = values_serializer
+        self.foreign_key = foreign_key
+        self.extra = extra
+
+    def load(self, keys):
+        """Group the representations of the related rows by parent key"""
+        values_serializer = self.values_serializer
+        queryset = values_serializer.model.objects.filter(
+            **{f"{self.foreign_key}__in": keys}
+        ).values_list(self.foreign_key, *values_serializer.lookups)
+
+        related = defaultdict(list)
+        for row in queryset:
+            related[row[0]].append(values_serializer.represent(row[1:]))
+        if self.extra is not None:
+            for key, representations in self.extra(keys).items():
+                related[key].extend(representations)
+        return related
+
+
+class ValuesSerializer:
+    """Serialize values_list rows like the mirrored serializer would"""
+
+    mirrors = None
+    fields = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """Compile the declared fields into a values_list projection"""
+        super().__init_subclass__(**kwargs)
+        cls.model = cls.mirrors.Meta.model
+        cls.lookups = tuple(
+            dict.fromkeys(
+                lookup
+                for field in cls.fields.values()
+                for lookup in field.lookups
+            )
+        )
+        cls.getters = tuple(
+            (
+                name,
+                None
+                if isinstance(field, Nested)
+                else field.compile(
+                    [cls.lookups.index(lookup) for lookup in field.lookups]
+                ),
+            )
+            for name, field in cls.fields.items()
+        )
+        cls.has_nested = any(getter is None for _, getter in cls.getters)
+        if "mirrors" in cls.__dict__:
+            _values_serializers[cls.mirrors] = cls
+
+    def __init__(self, instance, many=True, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def with_fields(cls, names):
+        """Return a variant serializing only the given fields"""
+        return _with_fields(
+            cls, tuple(name for name in cls.fields if name in names)
+        )
+
+    @classmethod
+    def values(cls, queryset):
+        """Project the queryset onto the lookups the fields need"""
+        return queryset.prefetch_related(None).values_list(*cls.lookups)
+
+    @classmethod
+    def represent(cls, row):
+        return {name: getter(row) for name, getter in cls.getters}
+
+    def nested_getter(self, name, rows):
+        """Load the nested rows of all rows with one query"""
+        index = self.lookups.index("pk")
+        related = self.fields[name].load([row[index] for row in rows])
+        return lambda row: related.get(row[index], [])
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        getters = [
+            (name, getter or self.nested_getter(name, rows))
+            for name, getter in self.getters
+        ]
+        return [
+            {name: getter(row) for name, getter in getters} for row in rows
+        ]
+
+    @property
+    def data(self):
+        return ReturnList(
+            self.to_representation(self.instance), serializer=self
+        )
+
+
+@lru_cache(maxsize=None)
+def _with_fields(values_serializer, names):
+    return type(
+        values_serializer.__name__,
+        (values_serializer,),
+        {"fields": {name: values_serializer.fields[name] for name in names}},
+    )
+
+
+def get_values_serializer(serializer_class):
+    """Return the values serializer mirroring serializer_class, if any"""
+    return _values_serializers.get(serializer_class)
+
+
+def flight_name(airplane_name, source_city, destination_city):
+    return f"{airplane_name} ({source_city} - {destination_city})"
+
+
+def route_name(source_name, destination_name):
+    return source_name + " - " + destination_name
+
+
+def multiply(first, second):
+    return first * second
+
+
+def archived_tickets(order_ids):
+    return {
+        archive.order_id: archive.ticket_representations()
+        for archive in OrderArchive.objects.filter(order_id__in=order_ids)
+    }
+
+
+class AirplaneListValuesSerializer(ValuesSerializer):
+    mirrors = AirplaneListSerializer
+    fields = {
+        "id": Field("pk"),
+        "name": Field("name"),
+        "airplane_type": Field("airplane_type__name"),
+        "capacity": Field("rows", "seats_in_row", function=multiply),
+    }
+
+
+class RouteListValuesSerializer(ValuesSerializer):
+    mirrors = RouteListSerializer
+    fields = {
+        "id": Field("pk"),
+        "distance": Field("distance"),
+        "source": Field("source__name"),
+        "destination": Field("destination__name"),
+    }
+
+
+class FlightListValuesSerializer(ValuesSerializer):
+    """Expects the seats_available annotation of FlightViewSet"""
+
+    mirrors = FlightListSerializer
+    fields = {
+        "id": Field("pk"),
+        "departure_time": Field("departure_time", function=to_datetime),
+        "arrival_time": Field("arrival_time", function=to_datetime),
+        "duration": Field(
+            "departure_time", "arrival_time", function=format_duration
+        ),
+        "route": Field(
+            "route__source__name",
+            "route__destination__name",
+            function=route_name,
+        ),
+        "airplane": Field("airplane__name"),
+        "airplane_capacity": Field(
+            "airplane__rows", "airplane__seats_in_row", function=multiply
+        ),
+        "seats_available": Field("seats_available"),
+    }
+
+
+class TicketListValuesSerializer(ValuesSerializer):
+    mirrors = TicketListSerializer
+    fields = {
+        "id": Field("pk"),
+        "row": Field("row"),
+        "seat": Field("seat"),
+        "flight": Field(
+            "flight__airplane__name",
+            "flight__route__source__closest_big_city",
+            "flight__route__destination__closest_big_city",
+            function=flight_name,
+        ),
+    }
+
+
+class OrderListValuesSerializer(ValuesSerializer):
+    mirrors = OrderListSerializer
+    fields = {
+        "id": Field("pk"),
+        "tickets": Nested(
+            TicketListValuesSerializer, "order", extra=archived_tickets
+        ),
+        "created_at": Field("created_at", function=to_datetime),
+    }
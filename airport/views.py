@@ -1,12 +1,39 @@
-from django.db.models import F, Count
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F, Count, Sum
+from django.db.models.functions import TruncWeek
+from django.http import (
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.cache import patch_vary_headers
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from airport.async_views import AsyncReadMixin
+from airport.batch import run_batch
+from airport.catalog import catalog_cache
+from airport.changes import changes, serialize_changes
+from airport.filters import IdsFilter, parse_ids
+from airport.mixins import (
+    BatchRetrieveMixin,
+    BulkUpsertMixin,
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ValuesListMixin,
+)
 from airport.models import (
     Airplane,
     AirplaneType,
@@ -15,8 +42,11 @@ from airport.models import (
     Flight,
     Order,
     Route,
+    RouteDailyLoad,
 )
 
+from airport.pagination import EstimatedCountPagination
+from airport.seat_events import seat_event_stream
 from airport.serializers import (
     AirplaneSerializer,
     AirplaneListSerializer,
@@ -24,12 +54,18 @@ from airport.serializers import (
     AirplaneDetailSerializer,
     AirplaneImageSerializer,
     AirportSerializer,
+    BatchSerializer,
+    BatchResultSerializer,
+    ChangesQuerySerializer,
+    ChangesSerializer,
     CrewSerializer,
     CrewListSerializer,
     CrewDetailSerializer,
     FlightSerializer,
     FlightListSerializer,
     FlightDetailSerializer,
+    LoadFactorQuerySerializer,
+    LoadFactorSerializer,
     OrderSerializer,
     OrderListSerializer,
     OrderDetailSerializer,
@@ -37,12 +73,21 @@ from airport.serializers import (
     RouteListSerializer,
     RouteDetailSerializer,
 )
+from airport.upsert import AirplaneUpsert, AirportUpsert, RouteUpsert
+from airport_service.compression import accepted_encoding
+from airport_service.metrics import set_endpoint_label
 from user.permissions import (
     IsAdminOrIfAuthenticatedReadOnly, IsAdminUserOrReadOnly
 )
 
 
 class AirplaneViewSet(
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ValuesListMixin,
+    BatchRetrieveMixin,
+    BulkUpsertMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -51,7 +96,10 @@ class AirplaneViewSet(
 ):
     queryset = Airplane.objects.select_related("airplane_type")
     serializer_class = AirplaneSerializer
+    bulk_upsert_class = AirplaneUpsert
+    filter_backends = (IdsFilter, )
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly, )
+    field_dependencies = {"capacity": ("rows", "seats_in_row")}
 
     def get_serializer_class(self):
 
@@ -85,6 +133,9 @@ class AirplaneViewSet(
 
 
 class AirplaneTypeViewSet(
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet
@@ -94,13 +145,28 @@ class AirplaneTypeViewSet(
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly, )
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    BatchRetrieveMixin,
+    BulkUpsertMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
+    bulk_upsert_class = AirportUpsert
+    filter_backends = (IdsFilter, )
     permission_classes = (IsAdminUserOrReadOnly, )
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminUser, )
@@ -124,12 +190,22 @@ class CrewViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class FlightViewSet(viewsets.ModelViewSet):
+class FlightViewSet(
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ValuesListMixin,
+    BatchRetrieveMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Flight.objects.select_related(
-        "route", "airplane"
+        "route__source", "route__destination", "airplane__airplane_type"
     ).prefetch_related("tickets")
     serializer_class = FlightSerializer
     permission_classes = (IsAdminUserOrReadOnly, )
+    filter_backends = (IdsFilter, )
+    field_dependencies = {"duration": ("departure_time", "arrival_time")}
 
     def get_queryset(self):
         """Retrieve the flights with filters"""
@@ -144,7 +220,7 @@ class FlightViewSet(viewsets.ModelViewSet):
         if arrival_date:
             queryset = queryset.filter(arrival_time__date=arrival_date)
 
-        if self.action == "list":
+        if self.action == "list" and self.wants_field("seats_available"):
             queryset = queryset.annotate(
                 seats_available=(
                     F("airplane__rows")
@@ -187,24 +263,86 @@ class FlightViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "flights",
+                type={"type": "string"},
+                required=True,
+                description="Comma-separated ids of the flights to follow "
+                            "(ex. ?flights=1,2,3)"
+            )
+        ],
+        responses={(200, "text/event-stream"): OpenApiTypes.STR},
+    )
+    def events(self, request, *args, **kwargs):
+        """Seat changes of flights as server-sent events, over ASGI only
+
+        Starts with a "snapshot" event of the taken seats and
+        seats_available of each flight, then sends a "seats" event per
+        change with the seats taken and released and the
+        seats_available_delta.
+        """
+        return Response(
+            {"detail": "Seat events are only served over ASGI."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+
+    async def aevents(self, request, *args, **kwargs):
+        if not isinstance(request._request, ASGIRequest):
+            return self.events(request, *args, **kwargs)
+
+        flight_ids = parse_ids(
+            request.query_params.get("flights", ""), "flights"
+        )
+        if not flight_ids:
+            raise ValidationError({"flights": "This field is required."})
+        found = {
+            flight_id
+            async for flight_id in Flight.objects.filter(
+                pk__in=flight_ids
+            ).values_list("pk", flat=True)
+        }
+        if found != flight_ids:
+            raise NotFound(
+                "No flights with ids "
+                + ", ".join(map(str, sorted(flight_ids - found)))
+            )
+
+        response = StreamingHttpResponse(
+            seat_event_stream(sorted(found)),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # Keep nginx from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
 
-class OrderPagination(PageNumberPagination):
+class OrderPagination(EstimatedCountPagination):
     page_size = 10
     max_page_size = 100
 
 
 class OrderViewSet(
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ValuesListMixin,
+    BatchRetrieveMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Order.objects.prefetch_related(
+    queryset = Order.objects.select_related("archive").prefetch_related(
         "tickets__flight__airplane", "tickets__flight__route"
     )
     serializer_class = OrderSerializer
     pagination_class = OrderPagination
     permission_classes = (IsAuthenticated, )
+    # Archived tickets are read from the archive relation
+    field_dependencies = {"tickets": ("tickets", "archive")}
 
     def get_queryset(self):
         return self.queryset.filter(user=self.request.user)
@@ -224,6 +362,13 @@ class OrderViewSet(
 
 
 class RouteViewSet(
+    MetricsMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ValuesListMixin,
+    BatchRetrieveMixin,
+    BulkUpsertMixin,
+    AsyncReadMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -233,7 +378,9 @@ class RouteViewSet(
         "source", "destination"
     )
     serializer_class = RouteSerializer
+    bulk_upsert_class = RouteUpsert
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly, )
+    filter_backends = (IdsFilter, )
 
     def get_serializer_class(self):
 
@@ -278,3 +425,141 @@ class RouteViewSet(
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+class BatchView(APIView):
+    """Run several GET requests to the airport API in one round trip
+
+    Sub-requests share the authentication of the batch request and are
+    checked for permissions like separate requests. Retrieves of the same
+    resource are served by one query, see BatchRetrieveMixin.
+    """
+
+    @extend_schema(request=BatchSerializer, responses=BatchResultSerializer)
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        paths = [
+            item["path"] for item in serializer.validated_data["requests"]
+        ]
+
+        results = run_batch(request, paths)
+
+        # Sub-requests relabel the request for their own viewsets
+        set_endpoint_label("batch")
+        return Response(
+            {
+                "responses": [
+                    {"path": path, "status": status_code, "body": body}
+                    for path, (status_code, body) in zip(paths, results)
+                ]
+            }
+        )
+
+
+class LoadFactorView(ReplicaReadMixin, APIView):
+    """Tickets sold per seat by day or week, read from the rollups
+
+    All routes are summed up unless ?route= is given.
+    """
+
+    permission_classes = (IsAdminUser, )
+    default_days = 30
+
+    @extend_schema(
+        parameters=[LoadFactorQuerySerializer],
+        responses=LoadFactorSerializer(many=True),
+    )
+    def get(self, request):
+        query = LoadFactorQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        end = params.get("to") or timezone.now().date()
+        start = params.get("from") or end - timedelta(
+            days=self.default_days - 1
+        )
+        rollups = RouteDailyLoad.objects.filter(day__range=(start, end))
+        if "route" in params:
+            rollups = rollups.filter(route_id=params["route"])
+
+        if params["granularity"] == "week":
+            period = TruncWeek("day")
+        else:
+            period = F("day")
+        rows = (
+            rollups.annotate(period=period)
+            .values("period")
+            .annotate(
+                flights=Sum("flights"),
+                seats=Sum("seats"),
+                tickets_sold=Sum("tickets_sold"),
+            )
+            .order_by("period")
+        )
+        return Response(LoadFactorSerializer(rows, many=True).data)
+
+
+class ChangesView(ReplicaReadMixin, APIView):
+    """Flights and catalog rows changed after version ?since=
+
+    Changes come in version order, CHANGES_PAGE_SIZE at a time; deleted
+    rows come with deleted set and no data. Pass until back as since for
+    the next page, or for the next sync.
+    """
+
+    permission_classes = (IsAuthenticated, )
+
+    @extend_schema(
+        parameters=[ChangesQuerySerializer], responses=ChangesSerializer
+    )
+    def get(self, request):
+        query = ChangesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since = query.validated_data["since"]
+
+        page, has_more = changes(
+            since, query.validated_data["types"], settings.CHANGES_PAGE_SIZE
+        )
+        return Response(
+            {
+                "changes": serialize_changes(page),
+                "until": page[-1][0] if page else since,
+                "has_more": has_more,
+            }
+        )
+
+
+class CatalogView(ReplicaReadMixin, APIView):
+    """Snapshot of airplane types, airports, airplanes and routes
+
+    Columnar JSON for client bootstrap, see airport.catalog for the
+    layout. Continue with /changes/?since=<version> for the catalog types.
+    """
+
+    permission_classes = (IsAuthenticated, )
+
+    @extend_schema(responses={(200, "application/json"): OpenApiTypes.OBJECT})
+    def get(self, request):
+        snapshot = catalog_cache.get()
+        encoding = accepted_encoding(
+            request.headers.get("Accept-Encoding", ""), list(snapshot.encoded)
+        )
+        etag = snapshot.etag(encoding)
+
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        elif encoding:
+            response = HttpResponse(
+                snapshot.encoded[encoding], content_type="application/json"
+            )
+            response["Content-Encoding"] = encoding
+        else:
+            response = HttpResponse(
+                snapshot.content, content_type="application/json"
+            )
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, max-age=0, must-revalidate"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
@@ -1,23 +0,0 @@
-import time
-
-from django.db import connection
-from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
-
-
-class Command(BaseCommand):
-    """Django command that waits for database to be available"""
-
-    def handle(self, *args, **options):
-        """Entrypoint for command"""
-        self.stdout.write("Waiting to database...")
-        db_up = False
-        while not db_up:
-            try:
-                connection.ensure_connection()
-                db_up = True
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
-
-        self.stdout.write(self.style.SUCCESS("Database ready!"))
@@ -0,0 +1,197 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def accepted_encoding(accept_encoding, encodings=ENCODINGS):
+    """Pick the first of encodings the Accept-Encoding header allows"""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    for encoding in encodings:
+        if qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compression_levels(content_type):
+    """Levels per encoding for content_type from COMPRESSION_LEVELS"""
+    media_type = content_type.split(";")[0].strip().lower()
+    levels = settings.COMPRESSION_LEVELS.get(media_type)
+    if levels is None:
+        levels = settings.COMPRESSION_LEVELS.get(
+            media_type.split("/")[0] + "/"
+        )
+    return levels
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return zlib.compress(data, level, wbits=31)
+
+
+class StreamCompressor:
+    """Compress chunks as they come, flushing after each one"""
+
+    def __init__(self, encoding, level):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.flush
+            self.finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._compressor.flush
+
+    def compress(self, chunk):
+        return self._compress(chunk) + self._flush()
+
+
+class CompressedCache:
+    """Per-process LRU of compressed bodies keyed by a digest of the body
+
+    Responses that repeat byte for byte, like an unchanged airport list,
+    are compressed once per worker.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, data, encoding, level):
+        key = (
+            hashlib.blake2b(data, digest_size=16).digest(),
+            encoding,
+            level,
+        )
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                return compressed
+
+        compressed = compress(data, encoding, level)
+        if len(compressed) > settings.COMPRESSION_CACHE_BYTES // 8:
+            return compressed
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+            while self._size > settings.COMPRESSION_CACHE_BYTES:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+compressed_cache = CompressedCache()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with brotli or gzip, as the client prefers
+
+    Bodies shorter than COMPRESSION_MIN_SIZE, like token pairs, are sent
+    as they are; that also keeps secrets out of compressed responses that
+    echo user input. Content types without an entry in COMPRESSION_LEVELS
+    and responses that already have a Content-Encoding are left alone.
+    Streaming responses are compressed chunk by chunk.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        levels = compression_levels(response.get("Content-Type", ""))
+        if not levels:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = accepted_encoding(
+            request.headers.get("Accept-Encoding", ""),
+            [encoding for encoding in ENCODINGS if encoding in levels],
+        )
+        if encoding is None:
+            return response
+        level = levels[encoding]
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                response, StreamCompressor(encoding, level)
+            )
+            del response.headers["Content-Length"]
+        else:
+            compressed = compressed_cache.get_or_compress(
+                response.content, encoding, level
+            )
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # A strong ETag must not match both encodings, see RFC 9110 8.8.1
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def compress_stream(response, compressor):
+        # Pull the iterator into scope before streaming_content is replaced
+        chunks = response.streaming_content
+
+        if response.is_async:
+
+            async def compressed_chunks():
+                async for chunk in chunks:
+                    data = compressor.compress(chunk)
+                    if data:
+                        yield data
+                yield compressor.finish()
+
+        else:
+
+            def compressed_chunks():
+                for chunk in chunks:
+                    data = compressor.compress(chunk)
+                    if data:
+                        yield data
+                yield compressor.finish()
+
+        return compressed_chunks()
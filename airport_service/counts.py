@@ -0,0 +1,126 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# One thread per worker process, so slow counts queue up instead of
+# piling onto the database
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="count")
+
+
+def planner_estimate(queryset):
+    """Rows the PostgreSQL planner expects queryset to return, else None"""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_key(queryset):
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        sql, params = "", ()
+    digest = hashlib.blake2b(
+        f"{queryset.db}\0{sql}\0{params!r}".encode(), digest_size=16
+    ).hexdigest()
+    return f"count:{digest}"
+
+
+def refresh_count(queryset, key):
+    """Count queryset exactly and cache the result under key"""
+    try:
+        count = queryset.count()
+        cache.set(key, (count, time.time()), settings.COUNT_CACHE_TIMEOUT)
+        return count
+    finally:
+        cache.delete(f"{key}:refreshing")
+
+
+def refresh_count_in_background(queryset, key):
+    """Queue refresh_count unless a refresh of key is already queued"""
+    if not cache.add(f"{key}:refreshing", True, settings.COUNT_CACHE_MAX_AGE):
+        return
+
+    # Pin the database, replica routing doesn't carry over to the thread
+    queryset = queryset.using(queryset.db)
+
+    def run():
+        try:
+            refresh_count(queryset, key)
+        finally:
+            connections.close_all()
+
+    _refresher.submit(run)
+
+
+def approximate_count(queryset):
+    """(count, exact) from the count cache or the planner estimate
+
+    Counts older than COUNT_CACHE_MAX_AGE seconds, or missing ones, are
+    refreshed in the background. Without a cached count or a planner
+    estimate, the exact count is taken now and cached.
+    """
+    key = _count_key(queryset)
+    cached = cache.get(key)
+    if cached is not None:
+        count, counted_at = cached
+        if time.time() - counted_at > settings.COUNT_CACHE_MAX_AGE:
+            refresh_count_in_background(queryset, key)
+        return count, False
+
+    estimate = planner_estimate(queryset)
+    if estimate is None:
+        return refresh_count(queryset, key), True
+    refresh_count_in_background(queryset, key)
+    return estimate, False
+
+
+def estimated_count(queryset, exact_limit):
+    """(count, exact) of queryset
+
+    Counts up to exact_limit rows exactly, with a LIMIT so the database
+    stops early. Larger counts come from approximate_count().
+    """
+    count = queryset.order_by()[: exact_limit + 1].count()
+    if count <= exact_limit:
+        return count, True
+
+    approximate, exact = approximate_count(queryset)
+    # Stale or not, there are more rows than the exact part counted
+    return max(approximate, count), exact
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates counts above ESTIMATED_COUNT_THRESHOLD"""
+
+    @cached_property
+    def _estimated_count(self):
+        return estimated_count(
+            self.object_list, settings.ESTIMATED_COUNT_THRESHOLD
+        )
+
+    @property
+    def count(self):
+        return self._estimated_count[0]
+
+    @property
+    def count_is_approximate(self):
+        return not self._estimated_count[1]
@@ -0,0 +1,72 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def set_replica_reads(enabled):
+    """Allow or forbid reads from replicas in the current context"""
+    _replica_reads.set(enabled)
+
+
+@contextmanager
+def primary_reads():
+    """Force reads inside the block to go to the primary database"""
+    previous = _replica_reads.get()
+    _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.set(previous)
+
+
+def pin_to_primary(user):
+    """Read from the primary for a while after user wrote something
+
+    The pin is kept on the user's row in the primary, so it holds on
+    whichever worker serves the user's next request, with or without
+    cookies (JWT clients rarely keep them).
+    """
+    if settings.REPLICA_DATABASES:
+        user.primary_reads_until = timezone.now() + timedelta(
+            seconds=settings.REPLICA_PIN_SECONDS
+        )
+        type(user).objects.using(DEFAULT_DB_ALIAS).filter(pk=user.pk).update(
+            primary_reads_until=user.primary_reads_until
+        )
+
+
+def is_pinned_to_primary(user):
+    # Authentication loads the user before replica reads are enabled, so
+    # the row comes from the primary and checking it takes no query
+    until = getattr(user, "primary_reads_until", None)
+    return until is not None and until > timezone.now()
+
+
+class PrimaryReplicaRouter:
+    """Route reads to a random replica while replica reads are enabled
+
+    Replica reads are off unless a request enables them (see
+    airport.mixins.ReplicaReadMixin), so management commands, writes and
+    everything inside a booking read from the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.REPLICA_DATABASES:
+            return random.choice(settings.REPLICA_DATABASES)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
@@ -0,0 +1,242 @@
+"""
+Publish/subscribe for pushing events to clients over ASGI.
+
+The Hub of each worker fans messages out to its subscribers, one bounded
+asyncio queue each, so an idle subscriber is a suspended coroutine and an
+empty queue. Messages reach the hubs of every worker through the channel
+named by EVENTS_CHANNEL: LocalChannel delivers within the process (a single
+worker, tests), PostgresChannel through LISTEN/NOTIFY.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Messages of some topics, queued for one client"""
+
+    def __init__(self, topics):
+        self.topics = topics
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, message):
+        # Runs in the loop thread. A client this far behind has to start
+        # over from a fresh snapshot
+        if self.queue.full():
+            self.overflowed = True
+        else:
+            self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        """Next message, None after timeout seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def pending(self):
+        """Messages already queued"""
+        messages = []
+        while not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
+
+class Hub:
+    """In-process fan-out of channel messages to subscriptions"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+        self._channel = None
+
+    @property
+    def channel(self):
+        with self._lock:
+            if self._channel is None:
+                self._channel = import_string(settings.EVENTS_CHANNEL)(
+                    self.receive
+                )
+            return self._channel
+
+    def publish(self, topic, message):
+        """Send a JSON-serializable message to subscribers in all workers"""
+        self.channel.publish(topic, message)
+
+    @asynccontextmanager
+    async def subscribe(self, topics):
+        subscription = Subscription(topics)
+        self.channel.listen()
+        with self._lock:
+            for topic in topics:
+                self._subscriptions[topic].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                for topic in topics:
+                    self._subscriptions[topic].discard(subscription)
+                    if not self._subscriptions[topic]:
+                        del self._subscriptions[topic]
+
+    def receive(self, topic, message):
+        """Queue message for the subscriptions of topic; any thread"""
+        with self._lock:
+            subscriptions = tuple(self._subscriptions.get(topic, ()))
+
+        # One wakeup per event loop, not per subscription
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+        for loop, loop_subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(
+                    self._deliver, loop_subscriptions, message
+                )
+            except RuntimeError:
+                # The loop of a finished test or worker
+                pass
+
+    @staticmethod
+    def _deliver(subscriptions, message):
+        for subscription in subscriptions:
+            subscription.put(message)
+
+
+class LocalChannel:
+    """Deliver messages within this process only"""
+
+    def __init__(self, receive):
+        self.receive = receive
+
+    def publish(self, topic, message):
+        self.receive(topic, message)
+
+    def listen(self):
+        pass
+
+
+class PostgresChannel:
+    """Deliver messages to every worker through PostgreSQL LISTEN/NOTIFY
+
+    Each worker listens on its own connection from a daemon thread. The
+    connection must go straight to PostgreSQL (or a session-pooling
+    PgBouncer), LISTEN doesn't survive transaction pooling.
+    """
+
+    name = "airport_events"
+    poll_interval = 5
+    retry_interval = 1
+
+    def __init__(self, receive, using="default"):
+        self.receive = receive
+        self.using = using
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def publish(self, topic, message):
+        payload = json.dumps({"topic": topic, "message": message})
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.name, payload])
+
+    def listen(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="events", daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        wrapper = connections[self.using]
+        while True:
+            connection = None
+            try:
+                connection = wrapper.get_new_connection(
+                    wrapper.get_connection_params()
+                )
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.name}")
+                while True:
+                    select.select([connection], [], [], self.poll_interval)
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        payload = json.loads(notify.payload)
+                        self.receive(payload["topic"], payload["message"])
+            except Exception:
+                logger.exception("Event listener failed, reconnecting")
+                if connection is not None:
+                    connection.close()
+                time.sleep(self.retry_interval)
+
+
+hub = Hub()
+
+
+class StreamDisconnectMiddleware:
+    """ASGI middleware that cancels event streams of departed clients
+
+    Django 4.2 keeps iterating a streaming response after the client
+    disconnects. For text/event-stream responses this watches for
+    http.disconnect once the request body is read and cancels the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        body_read = asyncio.Event()
+
+        async def receive_body():
+            message = await receive()
+            if not message.get("more_body"):
+                body_read.set()
+            return message
+
+        async def watch(task):
+            await body_read.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            task.cancel()
+
+        watcher = None
+
+        async def send_response(message):
+            nonlocal watcher
+            if message["type"] == "http.response.start" and any(
+                name.lower() == b"content-type"
+                and value.startswith(b"text/event-stream")
+                for name, value in message.get("headers", ())
+            ):
+                watcher = asyncio.create_task(watch(task))
+            await send(message)
+
+        task = asyncio.create_task(
+            self.app(scope, receive_body, send_response)
+        )
+        try:
+            await task
+        except asyncio.CancelledError:
+            if watcher is None or not watcher.done():
+                raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
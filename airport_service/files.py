@@ -0,0 +1,14 @@
+import os
+from pathlib import Path
+
+
+def write_atomic(path, content):
+    """Write content to path so that readers see the old or the new file
+
+    Workers may read the file while it is written: the content goes to a
+    temporary file next to it, which then replaces path in one rename.
+    """
+    path = Path(path)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}")
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
@@ -0,0 +1,302 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Upper bounds in seconds, the Prometheus client defaults
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_current_request = ContextVar("metrics_request", default=None)
+
+_END = object()
+
+
+class RequestMetrics:
+    """Measurements collected while handling a single request"""
+
+    __slots__ = ("label", "queries", "sql_time", "serializer_time")
+
+    def __init__(self):
+        self.label = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+
+
+class EndpointStats:
+    __slots__ = (
+        "count",
+        "buckets",
+        "latency_sum",
+        "queries",
+        "sql_time",
+        "serializer_time",
+        "response_bytes",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    """Per-process aggregates keyed by endpoint label, e.g. flight-list
+
+    Each series carries a worker label, the process id, so the series of
+    the workers behind one address stay apart and add up with sum().
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, latency, metrics, response_bytes):
+        with self._lock:
+            stats = self._stats.get(label)
+            if stats is None:
+                stats = self._stats[label] = EndpointStats()
+
+            stats.count += 1
+            stats.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            stats.latency_sum += latency
+            stats.queries += metrics.queries
+            stats.sql_time += metrics.sql_time
+            stats.serializer_time += metrics.serializer_time
+            stats.response_bytes += response_bytes
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def render(self):
+        """Export the aggregates in the Prometheus text format"""
+        with self._lock:
+            snapshot = sorted(self._stats.items())
+        # At render time: workers forked after import have their own pid
+        worker = os.getpid()
+
+        lines = [
+            "# HELP http_request_duration_seconds Request latency.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for label, stats in snapshot:
+            cumulative = 0
+            for bound, count in zip(
+                (*LATENCY_BUCKETS, "+Inf"), stats.buckets
+            ):
+                cumulative += count
+                lines.append(
+                    f"http_request_duration_seconds_bucket"
+                    f'{{endpoint="{label}",worker="{worker}",le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f"http_request_duration_seconds_sum"
+                f'{{endpoint="{label}",worker="{worker}"}} '
+                f"{stats.latency_sum}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count"
+                f'{{endpoint="{label}",worker="{worker}"}} '
+                f"{stats.count}"
+            )
+
+        for name, attribute, description in (
+            ("http_requests_total", "count", "Requests handled."),
+            ("db_queries_total", "queries", "SQL queries executed."),
+            ("db_query_seconds_total", "sql_time", "Time spent in SQL."),
+            (
+                "serializer_seconds_total",
+                "serializer_time",
+                "Time spent serializing, excluding SQL.",
+            ),
+            (
+                "http_response_bytes_total",
+                "response_bytes",
+                "Response body bytes.",
+            ),
+        ):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for label, stats in snapshot:
+                lines.append(
+                    f'{name}{{endpoint="{label}",worker="{worker}"}} '
+                    f"{getattr(stats, attribute)}"
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _sql_timer(execute, sql, params, many, context):
+    metrics = _current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+def install_sql_timer(connection, **kwargs):
+    if _sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_timer)
+
+
+connection_created.connect(install_sql_timer)
+
+
+def set_endpoint_label(label):
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.label = label
+
+
+def time_serializer(serializer):
+    """Add the top-level representation time of serializer to the request
+
+    SQL run while serializing (e.g. evaluating a lazy queryset) is not
+    counted as serializer time.
+    """
+    metrics = _current_request.get()
+    if metrics is None:
+        return serializer
+
+    to_representation = serializer.to_representation
+
+    def timed_to_representation(instance):
+        started = time.perf_counter()
+        sql_time = metrics.sql_time
+        try:
+            return to_representation(instance)
+        finally:
+            metrics.serializer_time += (
+                time.perf_counter() - started
+                - (metrics.sql_time - sql_time)
+            )
+
+    serializer.to_representation = timed_to_representation
+    return serializer
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and response size per endpoint"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+        for connection in connections.all(initialized_only=True):
+            install_sql_timer(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current_request.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+        self.record(request, response, metrics, started)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_request.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+        self.record(request, response, metrics, started)
+        return response
+
+    def record(self, request, response, metrics, started):
+        if not response.streaming:
+            self.record_request(
+                request, len(response.content), metrics, started
+            )
+            return
+
+        # Measured once the last chunk is sent, with the SQL run meanwhile
+        content = response.streaming_content
+        if response.is_async:
+            response.streaming_content = self.measure_async_stream(
+                content, request, metrics, started
+            )
+        else:
+            response.streaming_content = self.measure_stream(
+                content, request, metrics, started
+            )
+
+    def measure_stream(self, content, request, metrics, started):
+        size = 0
+        chunks = iter(content)
+        try:
+            while True:
+                token = _current_request.set(metrics)
+                try:
+                    chunk = next(chunks, _END)
+                finally:
+                    _current_request.reset(token)
+                if chunk is _END:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            # Also when the client leaves and the generator is closed
+            self.record_request(request, size, metrics, started)
+
+    async def measure_async_stream(self, content, request, metrics, started):
+        size = 0
+        chunks = aiter(content)
+        try:
+            while True:
+                token = _current_request.set(metrics)
+                try:
+                    chunk = await anext(chunks, _END)
+                finally:
+                    _current_request.reset(token)
+                if chunk is _END:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.record_request(request, size, metrics, started)
+
+    @staticmethod
+    def record_request(request, response_bytes, metrics, started):
+        latency = time.perf_counter() - started
+        label = metrics.label
+        if label is None:
+            match = request.resolver_match
+            label = match.url_name if match and match.url_name else "other"
+
+        registry.record(label, latency, metrics, response_bytes)
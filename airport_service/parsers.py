@@ -0,0 +1,28 @@
+import codecs
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """A CSV table with a header line, parsed into a list of dicts
+
+    Values stay strings, empty cells included; serializers convert them.
+    """
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name == "utf-8":
+            # Spreadsheets like to start UTF-8 files with a BOM
+            encoding = "utf-8-sig"
+
+        try:
+            lines = codecs.getreader(encoding)(stream)
+            return [dict(row) for row in csv.DictReader(lines, strict=True)]
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f"CSV parse error - {exc}")
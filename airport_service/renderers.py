@@ -0,0 +1,79 @@
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Values orjson would encode differently from DRF's encoder are passed to
+# JSONEncoder.default, e.g. datetimes become "...Z" instead of "...+00:00"
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson
+    else 0
+)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer encoding with orjson when it is installed
+
+    The output is the same as JSONRenderer's compact output. Indented
+    output (the browsable API, "Accept: application/json; indent=4") and
+    anything orjson can't encode, like integers over 64 bits, fall back to
+    the standard json module.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        try:
+            ret = orjson.dumps(
+                data, default=JSONEncoder().default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        # Same escaping as JSONRenderer, keeps the output a JavaScript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+def _array_items(renderer, batch):
+    """Encode the items of batch, without the enclosing brackets"""
+    return renderer.render(list(batch))[1:-1].strip()
+
+
+def stream_json_array(batches, renderer):
+    """Encode a JSON array batch by batch for a StreamingHttpResponse"""
+    separator = b"["
+    for batch in batches:
+        if batch:
+            yield separator + _array_items(renderer, batch)
+            separator = b","
+
+    yield b"[]" if separator == b"[" else b"]"
+
+
+async def astream_json_array(batches, renderer):
+    """Async counterpart of stream_json_array for async batches"""
+    separator = b"["
+    async for batch in batches:
+        if batch:
+            yield separator + _array_items(renderer, batch)
+            separator = b","
+
+    yield b"[]" if separator == b"[" else b"]"
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import threading
+from importlib import import_module
+from pathlib import Path
+
+import drf_spectacular
+import rest_framework
+from django.apps import apps
+from django.conf import settings
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+from airport_service.compression import brotli
+from airport_service.files import write_atomic
+
+SCHEMA_FORMATS = {
+    "yaml": (OpenApiYamlRenderer, "application/vnd.oai.openapi"),
+    "json": (OpenApiJsonRenderer, "application/vnd.oai.openapi+json"),
+}
+
+
+# Written last: the build of the code version it holds is complete
+VERSION_FILE = "schema.version"
+
+
+def code_version():
+    """Fingerprint of the code the schema is generated from
+
+    The sources of the project's apps and URLconf, and the versions of the
+    schema libraries.
+    """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    directories = {
+        Path(import_module(settings.ROOT_URLCONF).__file__).parent,
+        *(
+            Path(app_config.path)
+            for app_config in apps.get_app_configs()
+            if Path(app_config.path).resolve().is_relative_to(base_dir)
+        ),
+    }
+    digest = hashlib.sha256(
+        f"{rest_framework.VERSION} {drf_spectacular.__version__}".encode()
+    )
+    for path in sorted(
+        path for directory in directories for path in directory.rglob("*.py")
+    ):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:32]
+
+
+def generate_schema():
+    """Render the OpenAPI schema in every served format"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        schema_format: renderer().render(schema, renderer_context={})
+        for schema_format, (renderer, _) in SCHEMA_FORMATS.items()
+    }
+
+
+def write_schema_files(directory=None):
+    """Write schema.<format> and its compressed copies for every format,
+    then the code version they were built from"""
+    directory = Path(directory or settings.SCHEMA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for schema_format, content in generate_schema().items():
+        path = directory / f"schema.{schema_format}"
+        write_atomic(path, content)
+        write_atomic(
+            path.with_suffix(f".{schema_format}.gz"),
+            gzip.compress(content, compresslevel=9, mtime=0),
+        )
+        if brotli:
+            write_atomic(
+                path.with_suffix(f".{schema_format}.br"),
+                brotli.compress(content, quality=11),
+            )
+    write_atomic(directory / VERSION_FILE, code_version().encode())
+
+
+class SchemaFile:
+    __slots__ = ("content", "encoded", "etags", "content_type")
+
+    def __init__(self, content, encoded, content_type):
+        self.content = content
+        self.encoded = encoded
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        # A strong ETag must not match two encodings, see RFC 9110 8.8.1
+        self.etags = {None: f'"{digest}"'} | {
+            encoding: f'"{digest}-{encoding}"' for encoding in encoded
+        }
+        self.content_type = content_type
+
+    def etag(self, encoding=None):
+        """ETag of the representation with content coding encoding"""
+        return self.etags[encoding]
+
+
+class SchemaCache:
+    """Prebuilt schema files, loaded once per process
+
+    Missing files, and files built from another version of the code, are
+    regenerated on first use. With DEBUG on the schema is regenerated once
+    per process, and since the development server restarts on every code
+    change, the served schema follows the code.
+    """
+
+    def __init__(self):
+        self._files = None
+        self._lock = threading.Lock()
+
+    def get(self, schema_format):
+        if self._files is None:
+            with self._lock:
+                if self._files is None:
+                    self._files = self._load()
+        return self._files[schema_format]
+
+    def clear(self):
+        self._files = None
+
+    @staticmethod
+    def _load():
+        directory = Path(settings.SCHEMA_DIR)
+        if settings.DEBUG or _built_version(directory) != code_version():
+            write_schema_files(directory)
+
+        files = {}
+        for schema_format, (_, content_type) in SCHEMA_FORMATS.items():
+            path = directory / f"schema.{schema_format}"
+            encoded = {}
+            # In order of preference
+            for encoding, suffix in (("br", "br"), ("gzip", "gz")):
+                encoded_path = path.with_suffix(f".{schema_format}.{suffix}")
+                if encoded_path.exists():
+                    encoded[encoding] = encoded_path.read_bytes()
+            files[schema_format] = SchemaFile(
+                path.read_bytes(), encoded, content_type
+            )
+        return files
+
+
+def _built_version(directory):
+    try:
+        return (directory / VERSION_FILE).read_text()
+    except FileNotFoundError:
+        return None
+
+
+schema_cache = SchemaCache()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -23,10 +24,27 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
 
+# DJANGO_PROFILE=production turns off DEBUG, the debug toolbar and the
+# browsable API, and caches compiled templates
+PRODUCTION = os.environ.get("DJANGO_PROFILE", "development") == "production"
+
+# manage.py test switches to the test profile (see PASSWORD_HASHERS)
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION and os.environ.get("DJANGO_DEBUG", "1") == "1"
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+]
+
+# Serve the hot read endpoints with async views. Only useful under ASGI;
+# the debug toolbar middleware is sync-only, so it is left out.
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS") == "1"
 
-ALLOWED_HOSTS = []
+DEBUG_TOOLBAR = DEBUG and not ASYNC_READ_VIEWS
 
 
 # Application definition
@@ -40,15 +58,15 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "rest_framework_simplejwt",
-    "debug_toolbar",
     "drf_spectacular",
     "airport",
     "user",
 ]
 
 MIDDLEWARE = [
+    "airport_service.metrics.MetricsMiddleware",
+    "airport_service.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -57,6 +75,12 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.insert(
+        INSTALLED_APPS.index("drf_spectacular"), "debug_toolbar"
+    )
+    MIDDLEWARE.insert(3, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "airport_service.urls"
 
 TEMPLATES = [
@@ -75,6 +99,18 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        ),
+    ]
+
 WSGI_APPLICATION = "airport_service.wsgi.application"
 
 INTERNAL_IPS = [
@@ -91,10 +127,42 @@ DATABASES = {
         "NAME": os.environ["POSTGRES_DB"],
         "USER": os.environ["POSTGRES_USER"],
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
-        "HOST": os.environ["POSTGRES_HOST"]
+        "HOST": os.environ["POSTGRES_HOST"],
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        # Keep connections open between requests and check them before
+        # reuse; set DB_CONN_MAX_AGE=0 to connect per request
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": (
+            os.environ.get("DB_CONN_HEALTH_CHECKS", "1") == "1"
+        ),
+        # Server-side cursors don't survive transaction pooling in
+        # PgBouncer, see docker-compose.yml
+        "DISABLE_SERVER_SIDE_CURSORS": (
+            os.environ.get("DB_TRANSACTION_POOLING") == "1"
+        ),
     }
 }
 
+# Read replicas, e.g. POSTGRES_REPLICA_HOSTS=replica1,replica2. Locally
+# POSTGRES_REPLICA_HOSTS=db adds a second alias for the same server.
+REPLICA_DATABASES = []
+
+for index, replica_host in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")),
+    start=1,
+):
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["airport_service.db_router.PrimaryReplicaRouter"]
+
+# How long a user reads from the primary after writing
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -118,6 +186,10 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PBKDF2 is slow on purpose and dominated the test suite's runtime
+if TESTING:
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -150,20 +222,109 @@ AUTH_USER_MODEL = "user.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport_service.throttling.BatchAwareAnonRateThrottle",
+        "airport_service.throttling.BatchAwareUserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "10/minute", "user": "30/minute"},
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "airport_service.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
+if PRODUCTION:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
+        "airport_service.renderers.FastJSONRenderer",
+    )
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
+    "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_REFRESH_SERIALIZER": (
+        "user.serializers.RevocableTokenRefreshSerializer"
+    ),
+    "TOKEN_VERIFY_SERIALIZER": (
+        "user.serializers.RevocableTokenVerifySerializer"
+    ),
+}
+
+# Revoked refresh tokens are checked against a per-worker Bloom filter
+# that is rebuilt from the database at this interval (seconds). Tokens
+# revoked on other workers are added at the sync interval (seconds), the
+# longest a revoked token can still be used on another worker
+TOKEN_REVOCATION_REBUILD_INTERVAL = int(
+    os.environ.get("TOKEN_REVOCATION_REBUILD_INTERVAL", 60)
+)
+TOKEN_REVOCATION_SYNC_INTERVAL = float(
+    os.environ.get("TOKEN_REVOCATION_SYNC_INTERVAL", 1)
+)
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+
+# Response compression, see airport_service.compression. Levels are per
+# media type, or per top-level type with a trailing slash; other content
+# types are not compressed
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_LEVELS = {
+    "application/json": {"br": 4, "gzip": 6},
+    # A compressor per open event stream costs more than the events save
+    "text/event-stream": {},
+    "text/": {"br": 5, "gzip": 6},
 }
+COMPRESSION_CACHE_BYTES = 8 * 1024 * 1024
+
+# Paginated API lists and admin changelists count up to this many rows
+# exactly. Larger counts are cached, and refreshed in the background once
+# older than COUNT_CACHE_MAX_AGE seconds; the planner estimate (PostgreSQL)
+# stands in until the first count is cached. See airport_service.counts
+ESTIMATED_COUNT_THRESHOLD = 10_000
+COUNT_CACHE_MAX_AGE = 300
+COUNT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Upper bounds of ?ids= lists and of sub-requests per batch request
+BATCH_MAX_IDS = 100
+BATCH_MAX_REQUESTS = 20
+
+# Order transactions that hit a serialization failure or deadlock are
+# retried this many times, after BOOKING_RETRY_DELAY seconds doubled per
+# attempt (with jitter); then the client gets a 503
+BOOKING_RETRIES = 3
+BOOKING_RETRY_DELAY = 0.05
+
+# Bulk upserts of airports, routes and airplanes (see airport.upsert) are
+# validated and written this many rows per query, up to
+# BULK_UPSERT_MAX_ROWS rows per request
+BULK_UPSERT_BATCH_SIZE = 1000
+BULK_UPSERT_MAX_ROWS = 100_000
+
+# Changes per page of the change feed (/api/airport/changes/)
+CHANGES_PAGE_SIZE = 500
+
+# Catalog snapshots for client bootstrap (/api/airport/catalog/), rebuilt
+# when the catalog changes, see airport.catalog
+CATALOG_DIR = os.environ.get("CATALOG_DIR", BASE_DIR / "catalog")
+
+# Seat events over ASGI, see airport.seat_events. The channel carries
+# events between workers: airport_service.events.PostgresChannel through
+# LISTEN/NOTIFY, airport_service.events.LocalChannel only within a worker,
+# which would drop the events of other workers; it is the default for tests
+# only. Streams further than EVENTS_QUEUE_SIZE events behind are reset
+EVENTS_CHANNEL = os.environ.get(
+    "EVENTS_CHANNEL",
+    "airport_service.events.LocalChannel"
+    if TESTING
+    else "airport_service.events.PostgresChannel",
+)
+EVENTS_QUEUE_SIZE = 100
+SEAT_EVENTS_KEEPALIVE = 15
+SEAT_EVENTS_RETRY_MS = 3000
+
+# Prebuilt OpenAPI schema, see "manage.py build_schema"
+SCHEMA_DIR = os.environ.get("SCHEMA_DIR", BASE_DIR / "schema")
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Airport Service API",
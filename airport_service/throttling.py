@@ -0,0 +1,22 @@
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class BatchedRequestMixin:
+    """Let batch sub-requests through, the batch request was throttled
+
+    Otherwise a batch of N paths would take N + 1 slots of the rate and
+    could be cut off halfway with a 429 per remaining path.
+    """
+
+    def allow_request(self, request, view):
+        if getattr(request, "batched", False):
+            return True
+        return super().allow_request(request, view)
+
+
+class BatchAwareAnonRateThrottle(BatchedRequestMixin, AnonRateThrottle):
+    pass
+
+
+class BatchAwareUserRateThrottle(BatchedRequestMixin, UserRateThrottle):
+    pass
@@ -0,0 +1,91 @@
+import json
+
+from django.db import connections
+from django.db.utils import DatabaseError
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from airport_service.compression import accepted_encoding
+from airport_service.metrics import registry
+from airport_service.schema import schema_cache
+
+
+def readiness(request):
+    """Readiness probe: 200 when every database answers, 503 otherwise"""
+    for alias in connections:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError:
+            return JsonResponse(
+                {"status": "unavailable", "database": alias}, status=503
+            )
+
+    return JsonResponse({"status": "ready"})
+
+
+@require_safe
+def schema(request):
+    """Prebuilt OpenAPI schema, YAML by default or JSON on request"""
+    schema_format = request.GET.get("format")
+    if schema_format not in ("json", "yaml"):
+        accept = request.headers.get("Accept", "")
+        schema_format = "json" if "json" in accept else "yaml"
+
+    schema_file = schema_cache.get(schema_format)
+
+    encoding = accepted_encoding(
+        request.headers.get("Accept-Encoding", ""), list(schema_file.encoded)
+    )
+
+    etag = schema_file.etag(encoding)
+
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    elif encoding:
+        response = HttpResponse(
+            schema_file.encoded[encoding],
+            content_type=schema_file.content_type,
+        )
+        response["Content-Encoding"] = encoding
+    else:
+        response = HttpResponse(
+            schema_file.content, content_type=schema_file.content_type
+        )
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=0, must-revalidate"
+    patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+    return response
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "txt"  # noqa: VNE003
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, str):
+            data = json.dumps(data)
+        return data.encode(self.charset)
+
+
+class MetricsView(APIView):
+    """Per-endpoint metrics of this worker in the Prometheus text format"""
+
+    permission_classes = (IsAdminUser, )
+    renderer_classes = (PrometheusRenderer, )
+    throttle_classes = ()
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        return Response(
+            registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -0,0 +1,108 @@
+"""
+Bytes on the wire and compression CPU cost for typical list payloads.
+
+Lists are fetched uncompressed from the configured (seeded) database, then
+compressed with every encoding and level in LEVELS:
+
+    python benchmarks/compression.py
+    python benchmarks/compression.py -p /api/airport/flights/ -n 50
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_service.settings")
+
+DEFAULT_PATHS = (
+    "/api/airport/flights/",
+    "/api/airport/routers/",
+    "/api/airport/airports/",
+    "/api/airport/orders/",
+)
+LEVELS = (("gzip", (1, 6, 9)), ("br", (1, 4, 5, 11)))
+# Chunk size of streamed lists, about 500 flights
+STREAM_CHUNK = 128 * 1024
+
+
+def cpu_ms(function, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        result = function()
+    return (time.process_time() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-n", "--repeat", type=int, default=20)
+    parser.add_argument(
+        "-p", "--path", action="append", dest="paths",
+        help="Path to request, may be repeated",
+    )
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+    from rest_framework.views import APIView
+
+    from airport_service.compression import StreamCompressor, compress
+
+    # Throttling would reject most of the requests; it isn't what's measured
+    APIView.throttle_classes = ()
+
+    client = APIClient()
+    user = get_user_model().objects.order_by("id").first()
+    if user is not None:
+        client.force_authenticate(user)
+
+    print(
+        f"{'path':26} {'encoding':9} {'bytes':>10} {'ratio':>6} "
+        f"{'cpu ms':>8} {'stream ms':>9}"
+    )
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+    ):
+        for path in paths:
+            response = client.get(path)
+            if response.streaming:
+                body = b"".join(response.streaming_content)
+            else:
+                body = response.content
+            print(f"{path:26} {'identity':9} {len(body):10}")
+
+            chunks = [
+                body[start:start + STREAM_CHUNK]
+                for start in range(0, len(body), STREAM_CHUNK)
+            ]
+            for encoding, levels in LEVELS:
+                for level in levels:
+                    one_shot_ms, compressed = cpu_ms(
+                        lambda: compress(body, encoding, level), args.repeat
+                    )
+
+                    def stream():
+                        compressor = StreamCompressor(encoding, level)
+                        return b"".join(
+                            [compressor.compress(chunk) for chunk in chunks]
+                            + [compressor.finish()]
+                        )
+
+                    stream_ms, _ = cpu_ms(stream, args.repeat)
+                    print(
+                        f"{'':26} {f'{encoding}-{level}':9} "
+                        f"{len(compressed):10} "
+                        f"{len(body) / max(len(compressed), 1):6.1f} "
+                        f"{one_shot_ms:8.2f} {stream_ms:9.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-request database connection overhead.
+
+Simulates request cycles (request_started, one query, request_finished)
+against the configured database with connections closed after every request
+and with persistent connections, and optionally through a pooler:
+
+    python benchmarks/connection_overhead.py -n 500
+    python benchmarks/connection_overhead.py -n 500 --pooler-port 6432
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_service.settings")
+
+
+def measure(connection, requests):
+    from django.core.signals import request_finished, request_started
+
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        request_finished.send(sender=None)
+        timings.append(time.perf_counter() - started)
+
+    connection.close()
+    timings.sort()
+    p99 = timings[min(len(timings) * 99 // 100, len(timings) - 1)]
+    return statistics.mean(timings) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-n", "--requests", type=int, default=500)
+    parser.add_argument("--pooler-host", default=None)
+    parser.add_argument("--pooler-port", default=None)
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from django.db import connection
+
+    scenarios = [
+        ("connect per request", {"CONN_MAX_AGE": 0}),
+        (
+            "persistent + health checks",
+            {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+        ),
+    ]
+    if args.pooler_port:
+        scenarios.append(
+            (
+                "pooler, connect per request",
+                {
+                    "CONN_MAX_AGE": 0,
+                    "HOST": args.pooler_host
+                    or connection.settings_dict["HOST"],
+                    "PORT": args.pooler_port,
+                },
+            )
+        )
+
+    original = dict(connection.settings_dict)
+    for name, overrides in scenarios:
+        connection.close()
+        connection.settings_dict.update(original)
+        connection.settings_dict.update(overrides)
+        mean_ms, p99_ms = measure(connection, args.requests)
+        print(f"{name:30} mean {mean_ms:.3f} ms, p99 {p99_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Closed-loop HTTP load test for comparing the WSGI and ASGI deployments.
+
+Start both servers with the same number of workers, e.g.
+
+    gunicorn airport_service.wsgi -w 4 -b :8000
+    ASYNC_READ_VIEWS=1 gunicorn airport_service.asgi -w 4 -b :8001 \\
+        -k uvicorn.workers.UvicornWorker
+
+and run the same scenario against each:
+
+    python benchmarks/load_test.py http://localhost:8000 -c 64 -d 30
+    python benchmarks/load_test.py http://localhost:8001 -c 64 -d 30
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = (
+    "/api/airport/flights/",
+    "/api/airport/flights/1/",
+    "/api/airport/routers/",
+    "/api/airport/airports/",
+)
+
+
+def percentile(values, fraction):
+    index = min(int(len(values) * fraction), len(values) - 1)
+    return values[index]
+
+
+def worker(base_url, paths, headers, deadline, latencies, errors):
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80)
+    request_number = 0
+
+    while time.monotonic() < deadline:
+        path = paths[request_number % len(paths)]
+        request_number += 1
+        started = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(path)
+            connection.close()
+            continue
+
+        latencies.append(time.perf_counter() - started)
+        if response.status >= 400:
+            errors.append(path)
+
+    connection.close()
+
+
+def run(base_url, paths, concurrency, duration, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    deadline = time.monotonic() + duration
+    latencies = []
+    errors = []
+
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(base_url, paths, headers, deadline, latencies, errors),
+        )
+        for _ in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("base_url")
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("-d", "--duration", type=float, default=30)
+    parser.add_argument("-t", "--token", help="JWT access token")
+    parser.add_argument(
+        "-p", "--path", action="append", dest="paths",
+        help="Path to request, may be repeated",
+    )
+    args = parser.parse_args()
+
+    result = run(
+        args.base_url,
+        args.paths or DEFAULT_PATHS,
+        args.concurrency,
+        args.duration,
+        args.token,
+    )
+    print(
+        f"{result['requests']} requests, {result['errors']} errors, "
+        f"{result['rps']:.1f} req/s, p50 {result['p50_ms']:.1f} ms, "
+        f"p99 {result['p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+In-process request latency and worker memory for the current settings.
+
+Run it once per settings profile against the same database and compare:
+
+    python benchmarks/request_overhead.py -n 2000
+    DJANGO_PROFILE=production python benchmarks/request_overhead.py -n 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_service.settings")
+
+DEFAULT_PATHS = (
+    "/api/airport/flights/",
+    "/api/airport/airports/",
+)
+
+
+def rss_mb():
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-n", "--requests", type=int, default=1000)
+    parser.add_argument(
+        "-p", "--path", action="append", dest="paths",
+        help="Path to request, may be repeated",
+    )
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import override_settings
+    from rest_framework.views import APIView
+
+    # Throttling would reject most of the requests; it isn't what's measured
+    APIView.throttle_classes = ()
+
+    client = Client()
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+    ):
+        for path in paths:
+            client.get(path)
+
+        rss_before = rss_mb()
+        timings = []
+        for request_number in range(args.requests):
+            started = time.perf_counter()
+            client.get(paths[request_number % len(paths)])
+            timings.append(time.perf_counter() - started)
+        rss_after = rss_mb()
+
+    timings.sort()
+    p99 = timings[min(len(timings) * 99 // 100, len(timings) - 1)]
+    profile = "production" if settings.PRODUCTION else "development"
+    print(
+        f"{profile} (DEBUG={settings.DEBUG}): "
+        f"mean {statistics.mean(timings) * 1000:.2f} ms, "
+        f"p99 {p99 * 1000:.2f} ms, "
+        f"RSS {rss_before:.1f} -> {rss_after:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from user.revocation import prune_expired_revocations
+
+
+class Command(BaseCommand):
+    """Django command that deletes revocations of expired tokens"""
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        deleted = prune_expired_revocations()
+        self.stdout.write(
+            self.style.SUCCESS(f"Pruned {deleted} expired revocations")
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0003_revokedtoken"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="primary_reads_until",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-19 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0004_user_primary_reads_until"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="revokedtoken",
+            name="revoked_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,179 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from user.models import RevokedToken
+
+# A revocation commits some time after its revoked_at, and worker clocks
+# differ; each sync reads back this far before the previous one
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        size = math.ceil(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        )
+        self.size = max(size, 8)
+        self.hash_count = max(
+            round(self.size / capacity * math.log(2)), 1
+        )
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationList:
+    """Per-worker revoked jti filter backed by the RevokedToken table
+
+    Lookups only query the database when the filter reports a possible hit.
+    Revocations made by other workers are added to the filter with one
+    indexed query at most every TOKEN_REVOCATION_SYNC_INTERVAL seconds, so
+    a revoked token stays usable on another worker for at most that long.
+    The filter is rebuilt from the table, dropping expired tokens, once it
+    is older than TOKEN_REVOCATION_REBUILD_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._filter = None
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._sync_from = None
+        self._lock = threading.Lock()
+
+    @property
+    def rebuild_interval(self):
+        return getattr(settings, "TOKEN_REVOCATION_REBUILD_INTERVAL", 60)
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, "TOKEN_REVOCATION_SYNC_INTERVAL", 1)
+
+    @property
+    def error_rate(self):
+        return getattr(settings, "TOKEN_REVOCATION_ERROR_RATE", 0.001)
+
+    def rebuild(self):
+        """Load every unexpired revoked jti into a fresh filter"""
+        sync_from = timezone.now()
+        active = RevokedToken.objects.filter(expires_at__gt=sync_from)
+        bloom = BloomFilter(
+            # Leave headroom for revocations made before the next rebuild
+            capacity=active.count() * 2 + 1024,
+            error_rate=self.error_rate,
+        )
+        for jti in active.values_list("jti", flat=True).iterator():
+            bloom.add(jti)
+
+        self._filter = bloom
+        self._built_at = self._synced_at = time.monotonic()
+        self._sync_from = sync_from
+
+    def sync(self):
+        """Add the revocations made since the last rebuild or sync"""
+        sync_from = timezone.now()
+        for jti in RevokedToken.objects.filter(
+            revoked_at__gte=self._sync_from - SYNC_OVERLAP
+        ).values_list("jti", flat=True):
+            self._filter.add(jti)
+
+        self._synced_at = time.monotonic()
+        self._sync_from = sync_from
+
+    def _current_filter(self):
+        if (
+            self._filter is None
+            or time.monotonic() - self._built_at > self.rebuild_interval
+        ):
+            with self._lock:
+                if (
+                    self._filter is None
+                    or time.monotonic() - self._built_at
+                    > self.rebuild_interval
+                ):
+                    self.rebuild()
+        elif time.monotonic() - self._synced_at > self.sync_interval:
+            with self._lock:
+                if time.monotonic() - self._synced_at > self.sync_interval:
+                    self.sync()
+        return self._filter
+
+    def is_revoked(self, jti):
+        if jti not in self._current_filter():
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """Revoke jti; TokenError if it is revoked already
+
+        The insert decides: of two requests revoking the same token at
+        once, on any workers, only one gets its row in.
+        """
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            raise TokenError("Token is revoked")
+        self._current_filter().add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._built_at = self._synced_at = 0.0
+            self._sync_from = None
+
+
+revocation_list = RevocationList()
+
+
+def _token_expiry(token):
+    return datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+
+
+def revoke_token(token):
+    """Revoke the given refresh token until it expires; TokenError if it
+    is revoked already"""
+    revocation_list.revoke(
+        token[api_settings.JTI_CLAIM], _token_expiry(token)
+    )
+
+
+def check_not_revoked(token):
+    """Raise TokenError if the token's jti was revoked"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    if jti and revocation_list.is_revoked(jti):
+        raise TokenError("Token is revoked")
+
+
+def prune_expired_revocations():
+    """Delete revocations of tokens that have expired anyway"""
+    deleted, _ = RevokedToken.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
@@ -1,5 +1,13 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+
+from user.revocation import check_not_revoked, revoke_token
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,3 +30,36 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        """Reject revoked refresh tokens and revoke rotated ones"""
+        refresh = self.token_class(attrs["refresh"])
+        if not (
+            api_settings.ROTATE_REFRESH_TOKENS
+            and api_settings.BLACKLIST_AFTER_ROTATION
+        ):
+            check_not_revoked(refresh)
+            return super().validate(attrs)
+
+        # Revoked before the new tokens are issued: of concurrent refreshes
+        # with the same token, only the one that revokes it gets them
+        revoke_token(refresh)
+        return super().validate(attrs)
+
+
+class RevocableTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        """Reject tokens whose jti was revoked"""
+        data = super().validate(attrs)
+        check_not_revoked(UntypedToken(attrs["token"]))
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        revoke_token(RefreshToken(attrs["refresh"]))
+        return {}
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.models import RevokedToken
+from user.revocation import BloomFilter, revocation_list
+
+TOKEN_REFRESH_URL = reverse("user:token_refresh")
+TOKEN_VERIFY_URL = reverse("user:token_verify")
+LOGOUT_URL = reverse("user:logout")
+
+
+class BloomFilterTest(TestCase):
+    def test_added_values_are_found(self):
+        bloom = BloomFilter(capacity=100, error_rate=0.01)
+        values = [f"jti-{i}" for i in range(100)]
+        for value in values:
+            bloom.add(value)
+
+        for value in values:
+            self.assertIn(value, bloom)
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        false_positives = sum(
+            f"other-{i}" in bloom for i in range(10000)
+        )
+        self.assertLess(false_positives, 300)
+
+
+class TokenRevocationTest(TestCase):
+    def setUp(self):
+        revocation_list.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "test12345",
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+
+    def test_refresh_revokes_rotated_token(self):
+        res = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": str(self.refresh)}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("refresh", res.data)
+        self.assertTrue(
+            RevokedToken.objects.filter(jti=self.refresh["jti"]).exists()
+        )
+
+        res = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": str(self.refresh)}
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_token(self):
+        res = self.client.post(LOGOUT_URL, {"refresh": str(self.refresh)})
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.client.post(TOKEN_VERIFY_URL, {"token": str(self.refresh)})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": str(self.refresh)}
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_verify_valid_token_skips_database(self):
+        revocation_list.rebuild()
+
+        with self.assertNumQueries(0):
+            res = self.client.post(
+                TOKEN_VERIFY_URL, {"token": str(self.refresh)}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def revoke_on_other_worker(self, token):
+        RevokedToken.objects.create(
+            jti=token["jti"], expires_at=timezone.now() + timedelta(days=1)
+        )
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=3600)
+    def test_concurrent_refresh_is_rejected(self):
+        revocation_list.rebuild()
+        # Another refresh with the same token got in first; this worker's
+        # filter hasn't seen it
+        self.revoke_on_other_worker(self.refresh)
+
+        res = self.client.post(
+            TOKEN_REFRESH_URL, {"refresh": str(self.refresh)}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn("access", res.data)
+
+    @override_settings(TOKEN_REVOCATION_SYNC_INTERVAL=0)
+    def test_revocations_of_other_workers_are_synced(self):
+        revocation_list.rebuild()
+        self.revoke_on_other_worker(self.refresh)
+
+        with self.assertNumQueries(2):
+            res = self.client.post(
+                TOKEN_VERIFY_URL, {"token": str(self.refresh)}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -5,7 +5,7 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
-from user.views import CreateUserView, ManageUserView
+from user.views import CreateUserView, LogoutView, ManageUserView
 
 
 urlpatterns = [
@@ -18,6 +18,7 @@ urlpatterns = [
     ),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
     path("profile/", ManageUserView.as_view(), name="profile"),
+    path("logout/", LogoutView.as_view(), name="logout"),
 ]
 
 app_name = "user"